@@ -4,12 +4,15 @@ import sys
 import asyncio
 import logging
 import random
+import signal
 
 from discord.errors import HTTPException
 
 from core.bot_client import BeenBag
 from db.pool import init_pool, close_pool
 from http_server.server import start_http_server, stop_http_server
+from core import profiler, leader
+from config import settings as cfg
 # settings.py (or at top of bot.py)
 import os
 
@@ -29,6 +32,7 @@ log = logging.getLogger("beenbag.startup")
 BACKOFF_START = 5          # seconds
 BACKOFF_MAX   = 600        # 10 minutes cap
 NON429_DELAY  = 30         # delay for non-429 HTTPException or generic errors
+CHILD_RESTART_DELAY = 10   # clustered mode: wait before restarting a crashed cluster process
 
 
 def _get_env() -> tuple[int, str, str]:
@@ -41,6 +45,9 @@ def _get_env() -> tuple[int, str, str]:
 
 def _new_bot(db_pool) -> BeenBag:
     """Factory to ensure a fresh Bot per login attempt."""
+    if cfg.CLUSTERED:
+        # only our shard range; bot.guilds (and so the spawn loops) are local guilds only
+        return BeenBag(db_pool=db_pool, shard_count=cfg.SHARD_COUNT, shard_ids=cfg.cluster_shard_ids())
     return BeenBag(db_pool=db_pool)
 
 
@@ -92,16 +99,29 @@ async def run():
     print("=== BOT.PY ENTRYPOINT REACHED ===", flush=True)
 
     port, db_url, token = _get_env()
+    if cfg.CLUSTERED:
+        port += cfg.CLUSTER_ID or 0  # cluster 0 keeps PORT; the rest get PORT+1, PORT+2, ...
+        log.info("Cluster %s/%s: shards %s of %s", cfg.CLUSTER_ID, cfg.CLUSTER_COUNT,
+                 cfg.cluster_shard_ids(), cfg.SHARD_COUNT)
+
+    # Loop-lag probe + stall watchdog run for the whole process, across login retries.
+    profiler.start_loop_monitor()
 
     # Init DB and HTTP first so health checks pass even if Discord is blocked.
     pool = await init_pool(db_url)
     runner = await start_http_server(port=port, db_pool=pool)
-    log.info("HTTP server listening on 0.0.0.0:%s (health: / or /healthz)", port)
+    if cfg.CLUSTERED:
+        leader.start(db_url)  # singleton jobs run only on whichever process holds the lock
+    log.info("HTTP server listening on 0.0.0.0:%s (liveness: /, readiness: /healthz, metrics: /metrics)", port)
 
     try:
         await login_with_backoff(token, pool)
     finally:
         # Clean shutdown of HTTP and DB resources.
+        try:
+            await leader.stop()
+        except Exception:
+            log.exception("Error while releasing leadership")
         try:
             await stop_http_server(runner)
         except Exception:
@@ -112,8 +132,50 @@ async def run():
             log.exception("Error while closing DB pool")
 
 
+async def supervise():
+    """
+    Clustered mode: run one child per cluster (this same script with CLUSTER_ID
+    set) and restart any that exit. SIGTERM/SIGINT are passed on to the children.
+    """
+    async def keep_alive(cid: int):
+        env = {**os.environ, "CLUSTER_ID": str(cid)}
+        while not stopping.is_set():
+            proc = await asyncio.create_subprocess_exec(sys.executable, os.path.abspath(__file__), env=env)
+            procs[cid] = proc
+            if stopping.is_set() and proc.returncode is None:
+                proc.terminate()  # signal landed while we were spawning; on_signal missed it
+            code = await proc.wait()
+            if stopping.is_set():
+                return
+            log.warning("Cluster %s exited with %s; restarting in %ss", cid, code, CHILD_RESTART_DELAY)
+            try:
+                await asyncio.wait_for(stopping.wait(), CHILD_RESTART_DELAY)
+                return  # told to stop during the delay: never spawn again
+            except asyncio.TimeoutError:
+                pass
+
+    procs: dict = {}
+    stopping = asyncio.Event()
+    loop = asyncio.get_running_loop()
+
+    def on_signal():
+        stopping.set()
+        for p in procs.values():
+            if p.returncode is None:
+                p.terminate()
+
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        try:
+            loop.add_signal_handler(sig, on_signal)
+        except NotImplementedError:  # Windows
+            pass
+
+    log.info("Starting %s clusters over %s shards", cfg.CLUSTER_COUNT, cfg.SHARD_COUNT)
+    await asyncio.gather(*(keep_alive(cid) for cid in range(cfg.CLUSTER_COUNT)))
+
+
 if __name__ == "__main__":
     try:
-        asyncio.run(run())
+        asyncio.run(supervise() if cfg.CLUSTERED and cfg.CLUSTER_ID is None else run())
     except KeyboardInterrupt:
         pass
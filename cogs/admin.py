@@ -10,6 +10,8 @@ from config import settings
 from db.pool import get_pool  # optional, we mainly use self.bot.db_pool
 from tasks.spawns import start_guild_spawn_task, spawn_once_in_channel
 from utils.prefixes import warm_prefix_cache, get_cached_prefix  # cache helpers
+from core import profiler
+from core.checks import forget_game_channels
 
 # --------- Channel token parsing (mention / link / id) ---------
 # Accepts: <#123>, https://discord.com/channels/GUILD/123, or 123
@@ -299,6 +301,7 @@ class Admin(commands.Cog):
                 command_prefix,
                 lvl_ann,
             )
+            forget_game_channels(guild_id)
             # Replace spawn channels
             await conn.execute("DELETE FROM guild_spawn_channels WHERE guild_id = $1", guild_id)
             for ch_id in spawn_channels:
@@ -641,6 +644,7 @@ class Admin(commands.Cog):
 
         async with self.bot.db_pool.acquire() as conn:
             await self._array_add(conn, ctx.guild.id, "game_channel_ids", target.id)
+        forget_game_channels(ctx.guild.id)
 
         await ctx.send(f"✅ Added {target.mention} to **game channels**.")
 
@@ -658,6 +662,7 @@ class Admin(commands.Cog):
 
         async with self.bot.db_pool.acquire() as conn:
             await self._array_remove(conn, ctx.guild.id, "game_channel_ids", target.id)
+        forget_game_channels(ctx.guild.id)
 
         await ctx.send(f"✅ Removed {target.mention} from **game channels** (if it was set).")
 
@@ -735,6 +740,33 @@ class Admin(commands.Cog):
             mentions.append(ch.mention if ch else f"`{cid}` (missing)")
         await ctx.send("😄 React channels:\n• " + "\n• ".join(mentions))
 
+    @commands.is_owner()
+    @commands.command(name="perf")
+    async def perf(self, ctx: commands.Context, prefix: str = ""):
+        """Loop lag, slowest commands/listeners (p50/p95/p99) and recent loop stalls. Usage: !perf [prefix]"""
+        def ms(x: float) -> str:
+            return f"{x * 1000:.0f}ms"
+
+        lag = profiler.histogram("loop.lag").snapshot()
+        lines = [
+            f"**Loop lag** p50 {ms(lag['p50'])} • p95 {ms(lag['p95'])} • p99 {ms(lag['p99'])} • max {ms(lag['max'])}",
+            "",
+            "**Slowest by p95** (count • p50 / p95 / p99)",
+        ]
+        for name, h in profiler.top(prefix, n=12):
+            if name == "loop.lag":
+                continue
+            lines.append(f"`{name}` {h['count']} • {ms(h['p50'])} / {ms(h['p95'])} / {ms(h['p99'])}")
+
+        stalls = list(profiler.loop_monitor.stalls)[-3:]
+        if stalls:
+            lines += ["", "**Recent loop stalls**"]
+            for st in reversed(stalls):
+                where = st["stack"][0] if st["stack"] else "?"
+                lines.append(f"{st['blocked_for']:.2f}s in {st['task']} at `{where}`")
+
+        await ctx.send("\n".join(lines)[:1990])
+
 
 async def setup(bot: commands.Bot):
     await bot.add_cog(Admin(bot))
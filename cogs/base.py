@@ -9,9 +9,11 @@ import discord
 from discord.ext import commands
 from PIL import Image
 
-from services import base_shop
+from services import asset_cdn, base_shop, catalog
 from services.room_gen2 import generate_base
-from utils.game_helpers import get_items, take_items, give_items, gid_from_ctx
+from services.room_cache import room_cache, room_key
+from core import profiler
+from utils.game_helpers import apply_items, NotEnoughItems, gid_from_ctx
 
 from services.monetization import IS_DEV
 # --------------------------------------------------------------------
@@ -989,6 +991,7 @@ async def _set_slot(conn, guild_id: int, user_id: int, room_id: int, slot: str,
         VALUES ($1,$2,$3,$4,$5::bigint)
         ON CONFLICT (room_id, slot) DO UPDATE SET item_id = EXCLUDED.item_id
     """, guild_id, user_id, room_id, slot, int(new_item_id))
+    room_cache.invalidate_room(room_id)
 
     return prev
 
@@ -1001,25 +1004,13 @@ async def _clear_slot(conn, room_id: int, slot: str) -> Optional[int]:
     """, room_id, slot)
     if not row:
         return None
+    room_cache.invalidate_room(room_id)
     try:
         return int(row["item_id"])
     except (TypeError, ValueError):
         return None
 
 
-# --------------------------------------------------------------------
-# Item metadata (name/category)
-# --------------------------------------------------------------------
-
-async def _item_meta(conn, item_id: int) -> tuple[str, str]:
-    r = await conn.fetchrow(
-        "SELECT name, category FROM base_shop_items WHERE item_id=$1", item_id
-    )
-    if not r:
-        raise KeyError("Unknown item_id")
-    return r["name"], r["category"]
-
-
 # --------------------------------------------------------------------
 # Split placements for generator
 # --------------------------------------------------------------------
@@ -1039,53 +1030,48 @@ def _split_for_generate(slots_to_item_id: dict[str, int], id_to_name: dict[int,
     return flooring, inside, outline, decorations
 
 
-# --------------------------------------------------------------------
-# Shop browsing helpers
-# --------------------------------------------------------------------
+async def _render_room_png(
+    room_type: str,
+    placed: dict[str, int],
+    id_to_name: dict[int, str],
+    *,
+    room_id: Optional[int] = None,
+    lights: Optional[dict] = None,
+    left_door: bool = False,
+    right_door: bool = False,
+) -> bytes:
+    """
+    Render (or reuse) a room PNG from the shared cache. Pass room_id only when
+    `placed` is the room's persisted state, so slot writes can invalidate it.
+    """
+    lights = lights or {}
+    key = room_key(room_type, placed, lights, left_door, right_door)
+    img_bytes = room_cache.get(key)
+    if img_bytes is None:
+        flooring, inside, outline, decorations = _split_for_generate(placed, id_to_name)
+        loop = asyncio.get_running_loop()
 
-async def _fetch_categories(conn) -> list[str]:
-    rows = await conn.fetch("""
-        SELECT category
-        FROM base_shop_items
-        WHERE NOT disabled
-        GROUP BY category
-        ORDER BY lower(category)
-    """)
-    return [r["category"] for r in rows] or ["General"]
-
-
-async def _fetch_items_in_category(conn, category: str) -> list[asyncpg.Record]:
-    # Case-insensitive match for safety
-    return await conn.fetch("""
-        SELECT item_id, name, description, category, purchase_limit, sort_order
-          FROM base_shop_items
-         WHERE lower(category) = lower($1) AND NOT disabled
-         ORDER BY sort_order, item_id
-    """, category)
-
-
-async def _fetch_costs_map(conn, item_ids: list[int]) -> dict[int, dict[str, int]]:
-    if not item_ids:
-        return {}
-    rows = await conn.fetch("""
-        SELECT item_id, currency_item, amount
-          FROM base_shop_item_costs
-         WHERE item_id = ANY($1::bigint[])
-         ORDER BY currency_item
-    """, item_ids)
-    out: dict[int, dict[str, int]] = {}
-    for r in rows:
-        out.setdefault(r["item_id"], {})[r["currency_item"]] = r["amount"]
-    return out
+        def _do() -> bytes:
+            out = generate_base(
+                room_type=room_type,
+                flooring=flooring,
+                walls={"inside": inside, "outline": outline},
+                decorations=decorations,
+                lights=lights, left_door=left_door, right_door=right_door
+            )
+            return out.getvalue()
 
+        with profiler.timed("render:room", slow=None):
+            img_bytes = await loop.run_in_executor(_EXEC, _do)
+        room_cache.put(key, img_bytes)
+    if room_id is not None:
+        room_cache.bind_room(room_id, key)
+    return img_bytes
 
-async def _base_get_costs(conn, item_id: int) -> dict[str, int]:
-    rows = await conn.fetch(
-        "SELECT currency_item, amount FROM base_shop_item_costs WHERE item_id=$1 ORDER BY currency_item",
-        item_id,
-    )
-    return {r["currency_item"]: r["amount"] for r in rows}
 
+# --------------------------------------------------------------------
+# Shop browsing helpers
+# --------------------------------------------------------------------
 
 def _fmt_costs(costs: dict[str, int]) -> str:
     if not costs:
@@ -1142,6 +1128,24 @@ async def _load_preview_bytes(path: Path, *, tint_inside: bool) -> bytes:
     return await loop.run_in_executor(_EXEC, _do)
 
 
+def _blank_preview_bytes() -> bytes:
+    buf = io.BytesIO()
+    Image.new("RGBA", (64, 64), (0, 0, 0, 0)).save(buf, format="PNG")
+    return buf.getvalue()
+
+
+async def _hosted_preview(pool, path: Optional[Path], *, tint_inside: bool) -> asset_cdn.Hosted:
+    """Shop preview image: hosted once per (file, tint) on /i/, else attached each time."""
+    if path is None:
+        return await asset_cdn.prepare(pool, "preview:blank", lambda: asyncio.to_thread(_blank_preview_bytes),
+                                       filename="preview.png")
+    return await asset_cdn.prepare(
+        pool, asset_cdn.static_key("preview", path, int(tint_inside)),
+        lambda: _load_preview_bytes(path, tint_inside=tint_inside),
+        filename="preview.png",
+    )
+
+
 # --------------------------------------------------------------------
 # Inventory list
 # --------------------------------------------------------------------
@@ -1186,25 +1190,6 @@ def _inventory_pages(rows, per_page: int = 12):
     return pages
 
 
-# --------------------------------------------------------------------
-# Shared fetch for a single item + costs
-# --------------------------------------------------------------------
-
-async def _fetch_item_and_costs(conn: asyncpg.Connection, item_id: int):
-    row = await conn.fetchrow(
-        "SELECT item_id, name, description, category FROM base_shop_items WHERE item_id = $1",
-        item_id,
-    )
-    if not row:
-        raise KeyError("no such item")
-    cost_rows = await conn.fetch(
-        "SELECT currency_item, amount FROM base_shop_item_costs WHERE item_id = $1 ORDER BY currency_item",
-        item_id,
-    )
-    costs: Dict[str, int] = {r["currency_item"]: r["amount"] for r in cost_rows}
-    return row, costs
-
-
 def _format_costs(costs: Dict[str, int]) -> str:
     if not costs:
         return "free"
@@ -1217,14 +1202,15 @@ def _format_costs(costs: Dict[str, int]) -> str:
 # --------------------------------------------------------------------
 
 class BaseBrowseView(discord.ui.View):
-    def __init__(self, ctx: commands.Context, pool, initial_category: str, categories: list[str]):
+    def __init__(self, ctx: commands.Context, pool, initial_category: str, snap: catalog.Catalog):
         super().__init__(timeout=120)
         self.ctx = ctx
         self.pool = pool
         self.category = initial_category
+        self.snap = snap
+        categories = list(snap.base.pages)
         self.categories = categories
-        self.items_cache: dict[str, list[asyncpg.Record]] = {}
-        self.costs_cache: dict[str, dict[int, dict[str, int]]] = {}
+        self.items_cache: dict[str, tuple[catalog.CatalogItem, ...]] = {}
         self.idx = 0
         self.message: Optional[discord.Message] = None
         self._lock = asyncio.Lock()
@@ -1245,29 +1231,17 @@ class BaseBrowseView(discord.ui.View):
                 pass
 
     async def _load_category(self):
-        async with self.pool.acquire() as con:
-            if self.category not in self.items_cache:
-                items = await _fetch_items_in_category(con, self.category)
-                self.items_cache[self.category] = items
-                ids = [r["item_id"] for r in items]
-                self.costs_cache[self.category] = await _fetch_costs_map(con, ids)
+        if self.category not in self.items_cache:
+            self.items_cache[self.category] = self.snap.base.page(self.category)
 
-    async def _item_embed_and_file(self, item: asyncpg.Record) -> tuple[discord.Embed, discord.File]:
+    async def _item_embed_and_image(self, item: catalog.CatalogItem) -> tuple[discord.Embed, asset_cdn.Hosted]:
         name = item["name"]
         category = item["category"]
         folder = _folder_for_category(category)
         path = _find_image_path(folder, name)
-        if not path:
-            buf = io.BytesIO()
-            Image.new("RGBA", (64, 64), (0, 0, 0, 0)).save(buf, format="PNG")
-            png_bytes = buf.getvalue()
-        else:
-            tint_inside = _is_inside_wall(category)
-            png_bytes = await _load_preview_bytes(path, tint_inside=tint_inside)
-
-        file = discord.File(io.BytesIO(png_bytes), filename="preview.png")
+        image = await _hosted_preview(self.pool, path, tint_inside=_is_inside_wall(category))
 
-        costs = (self.costs_cache.get(self.category, {}).get(item["item_id"], {}))
+        costs = item.cost_map
         e = discord.Embed(
             title=name,
             description=item["description"] or "",
@@ -1277,8 +1251,8 @@ class BaseBrowseView(discord.ui.View):
         e.add_field(name="Category", value=category, inline=True)
         e.add_field(name="Price", value=_format_costs(costs), inline=False)
         e.set_footer(text=f"{self.idx+1} / {len(self.items_cache.get(self.category, []))} • Buy: {self.ctx.clean_prefix}base buy {item['item_id']}")
-        e.set_image(url="attachment://preview.png")
-        return e, file
+        e.set_image(url=image.url)
+        return e, image
 
     async def _send_first(self):
         await self._load_category()
@@ -1296,8 +1270,8 @@ class BaseBrowseView(discord.ui.View):
         self.idx = 0
         self.prev_btn.disabled = True
         self.next_btn.disabled = (len(items) <= 1)
-        e, file = await self._item_embed_and_file(items[self.idx])
-        self.message = await self.ctx.send(embed=e, file=file, view=self)
+        e, image = await self._item_embed_and_image(items[self.idx])
+        self.message = await self.ctx.send(embed=e, files=image.attachments, view=self)
 
     async def _update_message(self, interaction: discord.Interaction):
         if not interaction.response.is_done():
@@ -1323,9 +1297,9 @@ class BaseBrowseView(discord.ui.View):
                 await self.message.edit(embed=e, attachments=[], view=self)
             return
 
-        e, file = await self._item_embed_and_file(items[self.idx])
+        e, image = await self._item_embed_and_image(items[self.idx])
         if self.message:
-            await self.message.edit(embed=e, attachments=[file], view=self)
+            await self.message.edit(embed=e, attachments=image.attachments, view=self)
 
     async def _reset_to_category(self, category: str):
         self.category = category
@@ -1362,7 +1336,6 @@ class RoomsViewer(discord.ui.View):
         super().__init__(timeout=120)
         self.ctx, self.pool, self.member, self.rooms = ctx, pool, member, rooms
         self.idx = 0
-        self.cache: dict[int, bytes] = {}  # room_id -> image bytes
         self.message: Optional[discord.Message] = None
         self._lock = asyncio.Lock()
 
@@ -1400,31 +1373,9 @@ class RoomsViewer(discord.ui.View):
     async def _embed_and_file(self, room):
         async with self.pool.acquire() as con:
             placed = await _load_slots(con, room["room_id"])
-            # Build int-only ID list for name lookup
-            ids = sorted({int(v) for v in placed.values() if v is not None})
-            name_rows = []
-            if ids:
-                name_rows = await con.fetch("""
-                    SELECT item_id, name
-                      FROM base_shop_items
-                     WHERE item_id = ANY($1::bigint[])
-                """, ids)
-        id_to_name = {r["item_id"]: r["name"] for r in name_rows}
-        flooring, inside, outline, decorations = _split_for_generate(placed, id_to_name)
-
-        img_bytes = self.cache.get(room["room_id"])
-        if not img_bytes:
-            out = generate_base(
-                room_type=room["room_type"],
-                flooring=flooring,
-                walls={"inside": inside, "outline": outline},
-                decorations=decorations,
-                lights={}, left_door=False, right_door=False
-            )
-            # out is BytesIO → cache its bytes
-            out.seek(0)
-            img_bytes = out.getvalue()
-            self.cache[room["room_id"]] = img_bytes
+        ids = {int(v) for v in placed.values() if v is not None}
+        id_to_name = (await catalog.get(self.pool)).base.names(ids)
+        img_bytes = await _render_room_png(room["room_type"], placed, id_to_name, room_id=room["room_id"])
 
         file = discord.File(io.BytesIO(img_bytes), filename="room.png")
         e = (discord.Embed(
@@ -1504,7 +1455,7 @@ class DecoratorView(discord.ui.View):
         self.slot_select.callback = self._on_slot_select
         self.add_item(self.slot_select)
 
-        embed = await self._build_embed(preview=False)
+        embed, _ = await self._build_embed(preview=False)
         self.message = await self.ctx.send(embed=embed, view=self)
 
     async def _on_room_select(self, interaction: discord.Interaction):
@@ -1569,8 +1520,8 @@ class DecoratorView(discord.ui.View):
 
     async def _on_preview(self, interaction: discord.Interaction):
         async with self._lock:
-            embed = await self._build_embed(preview=True)
-            await self._edit(interaction, embed)
+            embed, file = await self._build_embed(preview=True)
+            await self._edit(interaction, embed, file)
 
     async def _on_confirm(self, interaction: discord.Interaction):
         async with self._lock:
@@ -1597,7 +1548,8 @@ class DecoratorView(discord.ui.View):
                 if prev and prev != self.current_item_id:
                     await _inv_give_one(con, guild_id, user_id, prev)
 
-            await self._refresh_b(interaction, toast="Saved!")
+            # Same state as the last preview -> same cache key, so this reuses its bytes
+            await self._refresh_b(interaction, toast="Saved!", preview=True)
 
     async def _on_clear(self, interaction: discord.Interaction):
         async with self._lock:
@@ -1613,25 +1565,20 @@ class DecoratorView(discord.ui.View):
 
             await self._refresh_b(interaction, toast="Cleared.")
 
-    async def _build_embed(self, preview: bool) -> discord.Embed:
+    async def _build_embed(self, preview: bool) -> tuple[discord.Embed, Optional[discord.File]]:
         room = self.rooms[self.room_idx]
 
         # Current persisted placements and name cache
         async with self.pool.acquire() as con:
             placed = await _load_slots(con, room["room_id"])
+            persisted = dict(placed)
 
             # Merge transient selection (for preview info) BEFORE building ids
             if self.current_slot and self.current_item_id:
                 placed[self.current_slot] = int(self.current_item_id)
 
-            ids = sorted({int(v) for v in placed.values() if v is not None})
-            name_rows = []
-            if ids:
-                name_rows = await con.fetch(
-                    "SELECT item_id, name FROM base_shop_items WHERE item_id = ANY($1::bigint[])",
-                    ids
-                )
-        id_to_name = {r["item_id"]: r["name"] for r in name_rows}
+        ids = {int(v) for v in placed.values() if v is not None}
+        id_to_name = (await catalog.get(self.pool)).base.names(ids)
 
         flooring, inside, outline, decorations = _split_for_generate(placed, id_to_name)
 
@@ -1645,42 +1592,43 @@ class DecoratorView(discord.ui.View):
         e.add_field(name="Inside wall", value=inside or FALLBACKS["inside_wall"], inline=True)
         e.add_field(name="Outline wall", value=outline or FALLBACKS["outline_wall"], inline=True)
 
+        f = None
         if preview:
-            buf = generate_base(
-                room_type=room["room_type"],
-                flooring=flooring,
-                walls={"inside": inside, "outline": outline},
-                decorations=decorations,
-                lights={},
-                left_door=False, right_door=False
+            # only bind to the room when nothing transient is merged in
+            img_bytes = await _render_room_png(
+                room["room_type"], placed, id_to_name,
+                room_id=room["room_id"] if placed == persisted else None,
             )
-            buf.seek(0)
-            f = discord.File(buf, filename="preview.png")
+            f = discord.File(io.BytesIO(img_bytes), filename="preview.png")
             e.set_image(url="attachment://preview.png")
-            if self.message:
-                await self.message.edit(attachments=[f], embed=e, view=self)
-        return e
+        return e, f
 
-    async def _refresh_b(self, interaction: discord.Interaction, toast: Optional[str] = None):
+    async def _refresh_b(self, interaction: discord.Interaction, toast: Optional[str] = None, preview: bool = False):
         if not interaction.response.is_done():
             try:
                 await interaction.response.defer()
             except Exception:
                 pass
-        embed = await self._build_embed(preview=False)
+        embed, file = await self._build_embed(preview=preview)
         if self.message:
-            await self.message.edit(embed=embed, view=self)
+            if file:
+                await self.message.edit(embed=embed, attachments=[file], view=self)
+            else:
+                await self.message.edit(embed=embed, view=self)
         if toast:
             await self._toast(interaction, toast)
 
-    async def _edit(self, interaction: discord.Interaction, embed: discord.Embed):
+    async def _edit(self, interaction: discord.Interaction, embed: discord.Embed, file: Optional[discord.File] = None):
         if not interaction.response.is_done():
             try:
                 await interaction.response.defer()
             except Exception:
                 pass
         if self.message:
-            await self.message.edit(embed=embed, view=self)
+            if file:
+                await self.message.edit(embed=embed, attachments=[file], view=self)
+            else:
+                await self.message.edit(embed=embed, view=self)
 
     async def _toast(self, interaction: discord.Interaction, msg: str):
         try:
@@ -1711,8 +1659,8 @@ class BaseViewCog(commands.Cog):
     @base_group.command(name="browse")
     async def base_browse(self, ctx: commands.Context, *, category: Optional[str] = None):
         """Browse items by category with arrows and a category dropdown."""
-        async with self.bot.db_pool.acquire() as con:
-            cats = await _fetch_categories(con)
+        snap = await catalog.get(self.bot.db_pool)
+        cats = list(snap.base.pages)
         if not cats:
             return await ctx.send("There are no categories in the base shop yet.")
 
@@ -1724,17 +1672,16 @@ class BaseViewCog(commands.Cog):
         else:
             chosen = cats[0]
 
-        view = BaseBrowseView(ctx, self.bot.db_pool, chosen, cats)
+        view = BaseBrowseView(ctx, self.bot.db_pool, chosen, snap)
         await view._send_first()
 
     @base_group.command(name="view")
     async def base_view(self, ctx: commands.Context, item_id: int):
         """Preview a base shop item by ID (embed with image, name, price, id)."""
-        async with self.bot.db_pool.acquire() as con:
-            try:
-                row, costs = await _fetch_item_and_costs(con, item_id)
-            except KeyError:
-                return await ctx.send(f"❌ No item with ID **{item_id}**.")
+        row = (await catalog.get(self.bot.db_pool)).base.by_id.get(item_id)
+        if row is None:
+            return await ctx.send(f"❌ No item with ID **{item_id}**.")
+        costs = row.cost_map
 
         name = row["name"]
         category = row["category"]
@@ -1746,14 +1693,11 @@ class BaseViewCog(commands.Cog):
                 f"❌ Image not found for **{name}**. Looked in `assets/house/decorations/{folder}/`."
             )
 
-        tint_inside = _is_inside_wall(category)
-
         try:
-            png_bytes = await _load_preview_bytes(img_path, tint_inside=tint_inside)
+            image = await _hosted_preview(self.bot.db_pool, img_path, tint_inside=_is_inside_wall(category))
         except Exception as e:
             return await ctx.send(f"❌ Failed to load image: {e!s}")
 
-        file = discord.File(io.BytesIO(png_bytes), filename="preview.png")
         e = discord.Embed(
             title=name,
             description=row["description"] or "",
@@ -1762,9 +1706,9 @@ class BaseViewCog(commands.Cog):
         e.add_field(name="ID", value=str(item_id), inline=True)
         e.add_field(name="Category", value=category, inline=True)
         e.add_field(name="Price", value=_format_costs(costs), inline=False)
-        e.set_image(url="attachment://preview.png")
+        e.set_image(url=image.url)
 
-        await ctx.send(embed=e, file=file)
+        await ctx.send(embed=e, files=image.attachments)
 
     @base_group.command(name="decorate")
     async def base_decorate(self, ctx: commands.Context, room_id: Optional[int] = None):
@@ -1808,11 +1752,10 @@ class BaseViewCog(commands.Cog):
         """List all room upgrades (one per room type)."""
         gid, uid = gid_from_ctx(ctx), ctx.author.id
 
+        ups = (await catalog.get(self.bot.db_pool)).upgrades.page("upgrades")
+        if not ups:
+            return await ctx.send("No room upgrades are available right now.")
         async with self.bot.db_pool.acquire() as con:
-            ups = await _up_fetch_all(con)
-            if not ups:
-                return await ctx.send("No room upgrades are available right now.")
-            costs = await _up_costs_map(con, [u["upgrade_id"] for u in ups])
             owned = await _owned_room_types(con, gid, uid)
 
         e = discord.Embed(title="🏠 House Upgrades", color=discord.Color.gold())
@@ -1827,7 +1770,7 @@ class BaseViewCog(commands.Cog):
                 lines.append(desc)
             lines.append(f"**Room type:** `{rtype}` • **Status:** {'✅ Owned' if have else '🛒 Buyable'}")
             if not have:
-                lines.append(f"**Price:** {_fmt_costs(costs.get(up_id, {}))}")
+                lines.append(f"**Price:** {_fmt_costs(u.cost_map)}")
                 lines.append(f"Buy: `{ctx.clean_prefix}base upgrades buy {up_id}`")
             e.add_field(name=f"#{up_id} — {name}", value="\n".join(lines), inline=False)
 
@@ -1839,55 +1782,36 @@ class BaseViewCog(commands.Cog):
         """Buy a room upgrade (one per type)."""
         gid, uid = gid_from_ctx(ctx), ctx.author.id
 
+        up = (await catalog.get(self.bot.db_pool)).upgrades.by_id.get(upgrade_id)
+        if not up:
+            return await ctx.send("❌ Unknown upgrade id.")
+        if up.disabled:
+            return await ctx.send("❌ That upgrade is not available right now.")
+        room_type = up.room_type
+        costs = up.cost_map
+
         async with self.bot.db_pool.acquire() as con:
-            up = await con.fetchrow("""
-                SELECT upgrade_id, name, description, room_type, disabled
-                  FROM upgrades_shop_items
-                 WHERE upgrade_id=$1
-            """, upgrade_id)
-            if not up:
-                return await ctx.send("❌ Unknown upgrade id.")
-            if up["disabled"]:
-                return await ctx.send("❌ That upgrade is not available right now.")
-
-            room_type = up["room_type"]
             already = await con.fetchval("""
                 SELECT 1 FROM base_rooms WHERE guild_id=$1 AND user_id=$2 AND room_type=$3
             """, gid, uid, room_type)
             if already:
                 return await ctx.send(f"❌ You already own the **{room_type}** room.")
 
-            rows = await con.fetch("""
-                SELECT currency_item, amount FROM upgrades_shop_costs WHERE upgrade_id=$1
-            """, upgrade_id)
-            costs = {r["currency_item"]: r["amount"] for r in rows}
-
-            deficits = []
-            for cur, amt in costs.items():
-                have = await get_items(con, uid, cur, gid)
-                if have < amt:
-                    deficits.append((cur, amt, have))
-            if deficits:
-                msg = ["❌ Not enough:"]
-                msg += [f"• {c}: need **{n}**, have **{h}**" for c, n, h in deficits]
-                return await ctx.send("\n".join(msg))
-
-            async with con.transaction():
-                for cur, amt in costs.items():
-                    if amt > 0:
-                        await take_items(uid, cur, amt, con, gid)
-
-                try:
+            # Charge + unlock together: a short wallet or a parallel unlock rolls back both
+            try:
+                async with con.transaction():
+                    await apply_items(con, gid, [(uid, cur, -amt) for cur, amt in costs.items() if amt > 0])
                     await con.execute("""
                         INSERT INTO base_rooms (guild_id, user_id, room_type, seed, name)
                         VALUES ($1,$2,$3,(random()*2147483647)::int,$4)
                     """, gid, uid, room_type, up["name"])
-                except asyncpg.UniqueViolationError:
-                    # rare race: refund and tell the user
-                    for cur, amt in costs.items():
-                        if amt > 0:
-                            await give_items(uid, cur, amt, "items", False, con, gid)
-                    return await ctx.send("❌ Looks like you already got that room in a parallel action. Refunded.")
+            except NotEnoughItems as e:
+                msg = ["❌ Not enough:"]
+                msg += [f"• {c}: need **{n}**, have **{h}**" for _, c, n, h in e.shortfalls]
+                return await ctx.send("\n".join(msg))
+            except asyncpg.UniqueViolationError:
+                # rare race: the transaction rolled back, so nothing was taken
+                return await ctx.send("❌ Looks like you already got that room in a parallel action. Nothing was charged.")
 
         await ctx.send(f"🏠 Upgrade purchased: **{up['name']}** → unlocked **{room_type}** room.")
 
@@ -1915,46 +1839,33 @@ class BaseViewCog(commands.Cog):
         guild_id = ctx.guild.id
         user_id = ctx.author.id
 
+        item = (await catalog.get(self.bot.db_pool)).base.by_id.get(item_id)
+        if not item:
+            return await ctx.send(f"❌ No base shop item with ID **{item_id}**.")
+        if item.disabled:
+            return await ctx.send("❌ That item is not available right now.")
+
+        name = item.name
+        costs = item.cost_map
+        total_costs = {cur: amt * quantity for cur, amt in costs.items() if amt > 0}
+
         async with self.bot.db_pool.acquire() as con:
-            item = await con.fetchrow(
-                "SELECT item_id, name, disabled FROM base_shop_items WHERE item_id=$1",
-                item_id,
-            )
-            if not item:
-                return await ctx.send(f"❌ No base shop item with ID **{item_id}**.")
-            if item["disabled"]:
-                return await ctx.send("❌ That item is not available right now.")
 
-            name = item["name"]
+            try:
+                async with con.transaction():
+                    if not IS_DEV:
+                        await apply_items(con, guild_id, [(user_id, cur, -need) for cur, need in total_costs.items()])
 
-            rows = await con.fetch(
-                "SELECT currency_item, amount FROM base_shop_item_costs WHERE item_id=$1",
-                item_id,
-            )
-            costs = {r["currency_item"]: r["amount"] for r in rows}
-            total_costs = {cur: amt * quantity for cur, amt in costs.items() if amt > 0}
-
-            deficits = []
-            for cur, need in total_costs.items():
-                have = await get_items(con, user_id, cur, guild_id)
-                if have < need:
-                    deficits.append((cur, need, have))
-            if deficits and not IS_DEV:
+                    await con.execute("""
+                        INSERT INTO base_inventory (guild_id, user_id, item_id)
+                        SELECT $1, $2, $3 FROM generate_series(1, $4)
+                    """, guild_id, user_id, item_id, quantity)
+            except NotEnoughItems as e:
                 msg = ["❌ Not enough currency:"]
-                for cur, need, have in deficits:
+                for _, cur, need, have in e.shortfalls:
                     msg.append(f"• {cur}: need **{need}**, have **{have}**")
                 return await ctx.send("\n".join(msg))
 
-            async with con.transaction():
-                for cur, need in total_costs.items():
-                    if need > 0 and not IS_DEV:
-                        await take_items(user_id, cur, need, con, guild_id)
-
-                await con.execute("""
-                    INSERT INTO base_inventory (guild_id, user_id, item_id)
-                    SELECT $1, $2, $3 FROM generate_series(1, $4)
-                """, guild_id, user_id, item_id, quantity)
-
         def fmt_costs(c: dict[str, int]) -> str:
             if not c:
                 return "free"
@@ -1974,30 +1885,6 @@ class BaseViewCog(commands.Cog):
 # Upgrades helpers
 # --------------------------------------------------------------------
 
-async def _up_fetch_all(conn):
-    return await conn.fetch("""
-        SELECT upgrade_id, name, description, room_type, sort_order, disabled
-          FROM upgrades_shop_items
-         WHERE NOT disabled
-         ORDER BY sort_order, upgrade_id
-    """)
-
-
-async def _up_costs_map(conn, ids: list[int]) -> dict[int, dict[str, int]]:
-    if not ids:
-        return {}
-    rows = await conn.fetch("""
-        SELECT upgrade_id, currency_item, amount
-          FROM upgrades_shop_costs
-         WHERE upgrade_id = ANY($1::bigint[])
-         ORDER BY currency_item
-    """, ids)
-    out: dict[int, dict[str, int]] = {}
-    for r in rows:
-        out.setdefault(r["upgrade_id"], {})[r["currency_item"]] = r["amount"]
-    return out
-
-
 async def _owned_room_types(conn, guild_id: int, user_id: int) -> set[str]:
     rows = await conn.fetch(
         "SELECT room_type FROM base_rooms WHERE guild_id=$1 AND user_id=$2",
@@ -2082,6 +1969,11 @@ async def setup(bot):
     except Exception as e:
         # Don't block the cog if sync fails; just log to your console
         print(f"[Base] Shop sync failed: {e!r}")
+    # Swap in a catalog snapshot that matches what was just synced
+    try:
+        await catalog.reload(bot.db_pool)
+    except Exception as e:
+        print(f"[Base] Catalog load failed: {e!r}")
 
     # 2) Register the cog
     await bot.add_cog(BaseViewCog(bot))
@@ -1,18 +1,21 @@
 # cogs/debug_tracer.py
-import asyncio, inspect, logging, os, random, textwrap, traceback
+import asyncio, logging, os, random, sys, textwrap, traceback
 from collections import defaultdict
 from discord.ext import commands
 
 log = logging.getLogger("beenbag.tracer")
 
 INSTANCE_ID = os.getenv("RENDER_INSTANCE_ID") or hex(random.getrandbits(32))[2:8]
+if os.getenv("CLUSTER_ID"):
+    INSTANCE_ID += f"/c{os.environ['CLUSTER_ID']}"  # clustered processes are expected, not duplicates
 
 def _short_stack(skip=0, limit=12):
-    frames = inspect.stack()[skip+1: skip+1+limit]
+    # walk frames directly; inspect.stack() reads source files for every frame and stalls the loop
+    f = sys._getframe(skip + 1)
     out = []
-    for f in frames:
-        fn = os.path.basename(f.filename)
-        out.append(f"{fn}:{f.lineno} in {f.function}")
+    while f is not None and len(out) < limit:
+        out.append(f"{os.path.basename(f.f_code.co_filename)}:{f.f_lineno} in {f.f_code.co_name}")
+        f = f.f_back
     return " > ".join(out)
 
 class DebugTracer(commands.Cog):
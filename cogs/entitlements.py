@@ -3,6 +3,8 @@ import logging
 import random
 from discord.ext import commands, tasks
 from services.monetization import sync_entitlements, IS_DEV
+from db.pool import get_bg_pool
+from core import leader
 
 BASE_INTERVAL = 10 * 60         # 10 minutes
 MAX_INTERVAL  = 60 * 60         # cap at 60 minutes
@@ -19,11 +21,11 @@ class EntitlementSync(commands.Cog):
 
     @tasks.loop(seconds=BASE_INTERVAL, reconnect=True)
     async def sync_loop(self):
-        if IS_DEV:
+        if IS_DEV or not leader.is_leader():
             return
         try:
             logging.info("[entitlements] sync run starting")
-            await sync_entitlements(self.bot.db_pool)  # uses 429-aware fetcher you added
+            await sync_entitlements(get_bg_pool())  # uses 429-aware fetcher you added
             logging.info("[entitlements] sync complete")
 
             # success: reset interval to base (+tiny jitter)
@@ -43,10 +45,10 @@ class EntitlementSync(commands.Cog):
         await self.bot.wait_until_ready()
 
         # One-shot immediate sync on startup (doesn't rely on the loop interval)
-        if not IS_DEV:
+        if not IS_DEV and leader.is_leader():
             try:
                 logging.info("[entitlements] initial sync starting…")
-                await sync_entitlements(self.bot.db_pool)
+                await sync_entitlements(get_bg_pool())
                 logging.info("[entitlements] initial sync complete")
             except Exception:
                 logging.exception("[entitlements] initial sync failed")
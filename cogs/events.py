@@ -5,15 +5,19 @@ from utils.prefixes import get_cached_prefix
 from utils.game_helpers import gain_exp,ensure_player,sucsac,lb_inc
 from tasks.spawns import start_all_guild_spawn_tasks, start_guild_spawn_task, stop_guild_spawn_task
 from tasks.fish_food import give_fish_food_task
+from tasks.purchase_archive import purchase_archive_task
+from tasks.media_purge import media_purge_task
 from services.discord_limits import call_with_gate
 from services.monetization import has_premium 
-from services import achievements,barn,statuses
+from services import achievements,asset_cdn,barn,media,purchase_limits,statuses,mojang
 from datetime import datetime, timezone
 import random
 from constants import MOBS,RARITIES,COLOR_MAP
 import discord
 import asyncio
 from config import settings
+from db import queries
+from db.pool import get_bg_pool
 
 BASE_RATE = 2
 BASE_PER  = 1800.0               # 30 minutes
@@ -28,17 +32,30 @@ class Events(commands.Cog):
         self.bot = bot
         self._ready_once = False
         self._presence_task_started = False
+        self._bg_tasks_started = False
     @commands.Cog.listener()
     async def on_ready(self):
         print(f"✅ Logged in as {self.bot.user} ({self.bot.user.id})")
         #await self.bot.change_presence(activity=discord.Game("DEV: local build"))
         # achievements schema first (safe re-run)
         from services import achievements
-        await achievements.ensure_schema(self.bot.db_pool)
-        await achievements.sync_master(self.bot.db_pool)
+        # schema/backfills can take a while; keep them off the interactive pool
+        await achievements.ensure_schema(get_bg_pool())
+        await achievements.sync_master(get_bg_pool())
+        await barn.ensure_schema(get_bg_pool())
+        await purchase_limits.ensure_schema(get_bg_pool())  # before anyone can !buy
+        await mojang.ensure_schema(get_bg_pool())
+        await asset_cdn.ensure_schema(get_bg_pool())
+        await media.ensure_schema(get_bg_pool())
         if not self._presence_task_started:
             asyncio.create_task(statuses.cycle_presence(self.bot))
             self._presence_task_started = True
+        if not self._bg_tasks_started:
+            if settings.FISH_FOOD_PAYOUTS:  # economy change, opt-in
+                asyncio.create_task(give_fish_food_task(self.bot, get_bg_pool()))
+            asyncio.create_task(purchase_archive_task(self.bot, get_bg_pool()))
+            asyncio.create_task(media_purge_task(self.bot, get_bg_pool()))
+            self._bg_tasks_started = True
         # start spawn tasks only in the right environment
         for g in self.bot.guilds:
             if settings.IS_DEV:
@@ -209,7 +226,7 @@ class Events(commands.Cog):
         guild_id = message.guild.id
         # auto–eye-roll on every message from that specific user
         # inside on_message, after you computed guild_id
-        async with self.bot.db_pool.acquire() as conn:
+        async with queries.acquire(self.bot.db_pool, "on_message") as conn:
             react_ids = await conn.fetchval(
                 "SELECT react_channel_ids FROM guild_settings WHERE guild_id=$1",
                 guild_id
@@ -224,7 +241,7 @@ class Events(commands.Cog):
         if message.author.bot:
             return
 
-        async with self.bot.db_pool.acquire() as conn:
+        async with queries.acquire(self.bot.db_pool, "on_message") as conn:
             await conn.execute(
                 """
                 INSERT INTO accountinfo (discord_id,guild_id)
@@ -247,7 +264,7 @@ class Events(commands.Cog):
         # 0) Try to capture any active spawn in this channel
         name = message.content.strip().lower().replace(" ", "")
         now = datetime.now(timezone.utc)
-        async with self.bot.db_pool.acquire() as conn:
+        async with queries.acquire(self.bot.db_pool, "on_message") as conn:
             # find the oldest not-yet-expired spawn in this channel
             spawn = await conn.fetchrow(
                 """
@@ -284,48 +301,23 @@ class Events(commands.Cog):
                         achievements.try_grant(self.bot.db_pool, message, user_id, "chicken_jockey")
 
 
-                # 1) Add to the barn (or sacrifice if full)
-                #    First ensure the player/barn rows exist:
+                # 1) Add to the barn (or sacrifice if hostile / full)
                 await ensure_player(conn,message.author.id,guild_id)
-                await barn.ensure_player_and_barn(conn,message.author.id,guild_id)
                 await lb_inc(conn,"mobs_caught",message.author.id,guild_id,+1)
-                await conn.execute(
-                    "INSERT INTO barn_upgrades (user_id,guild_id) VALUES ($1,$2) ON CONFLICT DO NOTHING;",
-                    message.author.id,guild_id
-                )
-                # count current barn occupancy
-                occ = await conn.fetchval(
-                    "SELECT COALESCE(SUM(count),0) FROM barn WHERE user_id = $1 AND guild_id = $2",
-                    message.author.id,guild_id
-                )
-                size = await conn.fetchval(
-                    "SELECT barn_size FROM new_players_guild  WHERE user_id = $1 AND guild_id = $2",
-                    message.author.id,guild_id
-                )
-                    
+
                 if MOBS[mob_name]["hostile"]:
                     sac = True
                     reward = await sucsac(message.channel,message.author,mob_name,is_golden,"because it can't be captured",conn)
                     note = f"this mob is not catchable so it was sacrificed for {reward} emeralds"
-                elif occ >= size:
-                    sac = True
-                    reward = await sucsac(message.channel,message.author,mob_name,is_golden,"because the barn was too full",conn)
-                    note = f"sacrificed for {reward} emeralds (barn is full)."
-                    
                 else:
-
-                    # insert into barn with the golden flag
-                    await conn.execute(
-                        """
-                INSERT INTO barn (user_id, guild_id, mob_name, is_golden, count)
-                VALUES ($1, $4, $2, $3, 1)
-                ON CONFLICT (guild_id, user_id, mob_name, is_golden)
-                DO UPDATE SET count = barn.count + 1
-                        """,
-                        message.author.id, mob_name, is_golden, guild_id
-                    )
-
-                    note = f"placed in your barn ({occ+1}/{size})."
+                    # one statement: creates the barn row if needed, checks space, inserts
+                    placed, occ, size, _ = await barn.try_add_mobs(conn, message.author.id, guild_id, mob_name, is_golden)
+                    if placed:
+                        note = f"placed in your barn ({occ+1}/{size})."
+                    else:
+                        sac = True
+                        reward = await sucsac(message.channel,message.author,mob_name,is_golden,"because the barn was too full",conn)
+                        note = f"sacrificed for {reward} emeralds (barn is full)."
                 # 2) Delete the spawn so no one else can catch it
                 await conn.execute(
                     "DELETE FROM active_spawns WHERE spawn_id = $1",
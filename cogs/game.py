@@ -4,6 +4,7 @@ from utils.parsing import parse_item_and_qty, _norm_item_from_args
 from constants import BLOCKED_SHOP_ITEMS
 import discord
 from core.decorators import premium_cooldown, premium_only, send_premium_only_message
+from db.pool import get_bg_pool, reader
 class Game(commands.Cog):
     def __init__(self, bot):
         self.bot = bot  # expects bot.db_pool to be set elsewhere
@@ -12,8 +13,8 @@ class Game(commands.Cog):
     @commands.Cog.listener()
     async def on_ready(self):
         # Ensure tables + sync registry when the bot boots
-        await achievements.ensure_schema(self.bot.db_pool)
-        await achievements.sync_master(self.bot.db_pool)
+        await achievements.ensure_schema(get_bg_pool())
+        await achievements.sync_master(get_bg_pool())
         activity = discord.Activity(type=discord.ActivityType.watching, name="your server")
         await self.bot.change_presence(
             status=discord.Status.online,   # online | idle | dnd | invisible
@@ -25,7 +26,7 @@ class Game(commands.Cog):
         user = ctx.author
         if who and ctx.message.mentions:
             user = ctx.message.mentions[0]
-        await achievements.open_achievements_menu(self.bot.db_pool, ctx, user.id)
+        await achievements.open_achievements_menu(reader(5.0, "achievements"), ctx, user.id)
     # ---------- Crafting ----------
     @commands.command(name="craft")
     @commands.cooldown(1, 1, commands.BucketType.member)
@@ -95,7 +96,7 @@ class Game(commands.Cog):
     async def shop_cmd(self, ctx):
         # choose ONE: either shop.show(...) or shop.shop(...)
         # Here assuming services.shop.show(ctx, pool)
-        await shop.shop(self.bot.db_pool,ctx)
+        await shop.shop(reader(300.0, "shop"), ctx)
 
     @commands.command(name="buy")
     async def buy(self, ctx, *args):
@@ -129,7 +130,7 @@ class Game(commands.Cog):
 
     @commands.command(name="inv", aliases=["inventory"])
     async def inv(self, ctx, *, who: str = None):
-        await inventory.inv(self.bot.db_pool,ctx,who)
+        await inventory.inv(reader(2.0, "inv"), ctx, who)
 
     @commands.command(name="give")
     async def give(self, ctx, who: str, *, mob: str):
@@ -175,12 +176,12 @@ class Game(commands.Cog):
     @commands.command(name="bestiary", aliases=["bs", "bes"])
     async def bestiary(self, ctx, *, who: str = None):
         # services.barn.bestiary(pool, ctx, who)
-        await barn.bestiary(self.bot.db_pool, ctx, who)
+        await barn.bestiary(reader(10.0, "bestiary"), ctx, who)
 
     @commands.command(name="barn")
     async def barn_cmd(self, ctx, *, who: str = None):
         # services.barn.barn(pool, ctx, who)
-        await barn.barn(self.bot.db_pool, ctx, who)
+        await barn.barn(reader(2.0, "barn"), ctx, who)
 
     @commands.command(name="upbarn")
     async def upbarn(self, ctx):
@@ -271,8 +272,8 @@ class Game(commands.Cog):
     
     @commands.command(name="quiz",aliases = ["trivia"])
     @premium_cooldown(1, 86400, commands.BucketType.member)
-    async def quiz_cmd(self, ctx: commands.Context):
-        await quiz.quiz(self.bot.db_pool,ctx,5)
+    async def quiz_cmd(self, ctx: commands.Context, *, topic: str = None):
+        await quiz.quiz(self.bot.db_pool, ctx, 5, topic=topic)
     @quiz_cmd.error
     async def quiz_error(self, ctx, error):
         if isinstance(error, commands.CommandOnCooldown):
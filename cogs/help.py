@@ -1,7 +1,10 @@
 # cogs/help.py
 # A single-file, modern help command with categories, buttons, and a dropdown.
 import asyncio
-from typing import List, Optional, Tuple
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, FrozenSet, List, Optional, Tuple
 
 import discord
 from discord.ext import commands
@@ -541,6 +544,30 @@ def make_command_embed(ctx: commands.Context, cmd: commands.Command) -> discord.
     e.set_footer(text=f"Use {prefix}help {cmd.qualified_name} for subcommands (if any).")
     return e
 
+def _usage_and_desc(c: commands.Command) -> Tuple[str, str]:
+    meta = _meta_for(c)
+    desc = (meta.get("desc") or c.short_doc or c.help or "No description").strip()
+    usage = meta.get("usage") or command_signature(c)  # prefer centralized usage
+    return usage, desc
+
+def _category_embed(title: str, prefix: str, category_name: str, lines: List[str]) -> discord.Embed:
+    e = discord.Embed(
+        title=title,
+        description=f"**Category:** {category_name}",
+        color=discord.Color.blurple(),
+    )
+    # Split into multiple fields of ≤1024 chars
+    chunks = list(_chunk_lines_for_field(lines, DISCORD_FIELD_LIMIT))
+    if not chunks:
+        chunks = ["No commands available."]
+
+    e.add_field(name="Commands", value=chunks[0], inline=False)
+    for chunk in chunks[1:]:
+        e.add_field(name="Commands (cont.)", value=chunk, inline=False)
+
+    e.set_footer(text=f"Use {prefix}help <command> for details. • {len(lines)} command(s)")
+    return e
+
 def make_category_embeds(
     ctx: commands.Context,
     title: str,
@@ -553,40 +580,103 @@ def make_category_embeds(
     for category_name, cmds in pairs:
         if not cmds:
             continue
-
-        e = discord.Embed(
-            title=title,
-            description=f"**Category:** {category_name}",
-            color=discord.Color.blurple(),
-        )
-
-        # Build lines first
-        lines = []
-        for c in cmds:
-            meta = _meta_for(c)
-            desc = (meta.get("desc") or c.short_doc or c.help or "No description").strip()
-            usage = meta.get("usage")  # prefer centralized usage
-            if usage:
-                lines.append(f"`{prefix}{usage}` — {desc}")
-            else:
-                lines.append(f"`{prefix}{command_signature(c)}` — {desc}")
-
-        # Split into multiple fields of ≤1024 chars
-        chunks = list(_chunk_lines_for_field(lines, DISCORD_FIELD_LIMIT))
-        if not chunks:
-            chunks = ["No commands available."]
-
-        e.add_field(name="Commands", value=chunks[0], inline=False)
-        for chunk in chunks[1:]:
-            e.add_field(name="Commands (cont.)", value=chunk, inline=False)
-
-        e.set_footer(text=f"Use {prefix}help <command> for details. • {len(cmds)} command(s)")
-        embeds.append(e)
+        lines = [f"`{prefix}{usage}` — {desc}" for usage, desc in map(_usage_and_desc, cmds)]
+        embeds.append(_category_embed(title, prefix, category_name, lines))
 
     if not embeds:
         embeds.append(discord.Embed(title=title, description="No commands available.", color=discord.Color.blurple()))
     return embeds
 
+# -------- Compiled help index --------
+# HELP_TEXTS/HELP_CATEGORIES are joined with the loaded commands once, and the
+# category embeds rendered from it are kept per (prefix, visible commands), so a
+# repeat !help is a couple of dict lookups. The index is rebuilt only when the
+# set of commands changes (extensions loaded after this one, or a reload).
+
+VISIBLE_TTL = 30.0      # seconds a (guild, channel, user) check result is reused
+VISIBLE_CACHE_MAX = 2000
+RENDER_CACHE_MAX = 64
+
+@dataclass(frozen=True)
+class _Entry:
+    cmd: commands.Command
+    category: str
+    usage: str  # without prefix
+    desc: str
+
+@dataclass(frozen=True)
+class _HelpIndex:
+    key: FrozenSet[commands.Command]
+    entries: Tuple[_Entry, ...]  # category order, then qualified name
+
+_index: Optional[_HelpIndex] = None
+_visible: "OrderedDict[tuple, Tuple[FrozenSet[str], float]]" = OrderedDict()
+# (prefix, visible names) -> (embeds, [(category, count)]). Embeds are shared, never mutated.
+_rendered: "OrderedDict[tuple, Tuple[Tuple[discord.Embed, ...], Tuple[Tuple[str, int], ...]]]" = OrderedDict()
+
+def _category_key(name: str):
+    return (CATEGORY_ORDER.index(name) if name in CATEGORY_ORDER else len(CATEGORY_ORDER), name.lower())
+
+def _compile(bot: commands.Bot) -> _HelpIndex:
+    entries = []
+    for cmd in bot.commands:
+        if cmd.hidden:
+            continue
+        cat_name = HELP_CATEGORIES.get(cmd.qualified_name) or HELP_CATEGORIES.get(cmd.name) or "Other"
+        usage, desc = _usage_and_desc(cmd)
+        entries.append(_Entry(cmd, cat_name, usage, desc))
+    entries.sort(key=lambda e: (_category_key(e.category), e.cmd.qualified_name))
+    return _HelpIndex(frozenset(bot.commands), tuple(entries))
+
+def help_index(bot: commands.Bot) -> _HelpIndex:
+    global _index
+    if _index is None or _index.key != frozenset(bot.commands):
+        _index = _compile(bot)
+        _visible.clear()
+        _rendered.clear()
+    return _index
+
+async def _visible_names(ctx: commands.Context, index: _HelpIndex) -> FrozenSet[str]:
+    """Names of the commands this user may run here; checks are cached briefly."""
+    key = (getattr(ctx.guild, "id", None), ctx.channel.id, ctx.author.id)
+    now = time.monotonic()
+    hit = _visible.get(key)
+    if hit and hit[1] > now:
+        return hit[0]
+    names = []
+    for e in index.entries:
+        try:
+            if not await e.cmd.can_run(ctx):
+                continue
+        except Exception:
+            pass
+        names.append(e.cmd.qualified_name)
+    names = frozenset(names)
+    _visible[key] = (names, now + VISIBLE_TTL)
+    _visible.move_to_end(key)
+    while len(_visible) > VISIBLE_CACHE_MAX:
+        _visible.popitem(last=False)
+    return names
+
+def _render(index: _HelpIndex, title: str, prefix: str, visible: FrozenSet[str]):
+    key = (prefix, visible)
+    hit = _rendered.get(key)
+    if hit is not None:
+        _rendered.move_to_end(key)
+        return hit
+    groups: Dict[str, List[str]] = {}
+    for e in index.entries:  # already in display order
+        if e.cmd.qualified_name in visible:
+            groups.setdefault(e.category, []).append(f"`{prefix}{e.usage}` — {e.desc}")
+    embeds = tuple(_category_embed(title, prefix, cat, lines) for cat, lines in groups.items())
+    if not embeds:
+        embeds = (discord.Embed(title=title, description="No commands available.", color=discord.Color.blurple()),)
+    out = (embeds, tuple((cat, len(lines)) for cat, lines in groups.items()))
+    _rendered[key] = out
+    while len(_rendered) > RENDER_CACHE_MAX:
+        _rendered.popitem(last=False)
+    return out
+
 # -------- Views (Buttons + Dropdown) --------
 
 class Paginator(discord.ui.View):
@@ -638,48 +728,30 @@ class PrettyHelp(commands.HelpCommand):
         super().__init__(command_attrs={"help": "Show help for commands and categories."})
 
     async def send_bot_help(self, mapping):
+        # `mapping` is ignored: the compiled index already groups every command
         ctx = self.context
         bot = ctx.bot
 
-        # Group visible commands by Cog
-        pairs: List[Tuple[str, List[commands.Command]]] = []
-        # Group commands by our custom category names
-        category_map = {}
-        for cog, cmds in mapping.items():
-            for cmd in cmds:
-                if cmd.hidden:
-                    continue
-                try:
-                    if not await cmd.can_run(ctx):
-                        continue
-                except Exception:
-                    pass
-                # Look up category from mapping
-                cat_name = HELP_CATEGORIES.get(cmd.qualified_name) or HELP_CATEGORIES.get(cmd.name) or "Other"
-                category_map.setdefault(cat_name, []).append(cmd)
-
-        # Sort categories and commands
-        pairs = []
-        for cat_name, cmds in sorted(category_map.items(), key=lambda x: x[0].lower()):
-            cmds.sort(key=lambda c: c.qualified_name)
-            pairs.append((cat_name, cmds))
-        pairs.sort(key=lambda x: CATEGORY_ORDER.index(x[0]) if x[0] in CATEGORY_ORDER else len(CATEGORY_ORDER))    
-        embeds = make_category_embeds(ctx, f"{bot.user.name} Help", pairs)
-        options = [discord.SelectOption(label=cog_name, description=f"{len(cmds)} command(s)") for cog_name, cmds in pairs]
-        view = Paginator(embeds, author_id=ctx.author.id, options=options)
+        index = help_index(bot)
+        visible = await _visible_names(ctx, index)
+        embeds, counts = _render(index, f"{bot.user.name} Help", ctx.clean_prefix, visible)
+        options = [discord.SelectOption(label=cat_name, description=f"{n} command(s)") for cat_name, n in counts]
+        view = Paginator(list(embeds), author_id=ctx.author.id, options=options)
 
         try:
             await ctx.send(embed=embeds[0], view=view)
         except discord.HTTPException:
             lines = []
-            for cat_name, cmds in pairs:
-                lines.append(f"**{cat_name}**")
-                for c in cmds:
-                    meta = _meta_for(c)
-                    desc = meta.get("desc") or c.short_doc or c.help or "No description"
-                    usage = meta.get("usage") or command_signature(c)
-                    lines.append(f"- {ctx.clean_prefix}{usage} — {desc}")
-                lines.append("")  # blank line between categories
+            last_cat = None
+            for e in index.entries:
+                if e.cmd.qualified_name not in visible:
+                    continue
+                if e.category != last_cat:
+                    if last_cat is not None:
+                        lines.append("")  # blank line between categories
+                    lines.append(f"**{e.category}**")
+                    last_cat = e.category
+                lines.append(f"- {ctx.clean_prefix}{e.usage} — {e.desc}")
             await _safe_send_long(ctx, lines)
 
     async def send_cog_help(self, cog):
@@ -716,6 +788,7 @@ class HelpCog(commands.Cog):
         self._old_help = bot.help_command
         bot.help_command = PrettyHelp()
         bot.help_command.cog = self
+        help_index(bot)  # the rest is picked up once the other extensions have loaded
 
     def cog_unload(self):
         self.bot.help_command = self._old_help
@@ -1,5 +1,6 @@
 # cogs/images.py
 import re
+import asyncio
 from io import BytesIO
 from typing import Optional
 
@@ -8,6 +9,7 @@ from discord.ext import commands
 from PIL import Image, ImageDraw, ImageFilter
 from core.decorators import *
 from services import achievements
+from services.image_cache import fetch_asset
 
 NUM_RE = re.compile(r"^\d*\.?\d+$")
 
@@ -24,8 +26,7 @@ def _circular_feather_mask(size: tuple[int, int], feather_ratio: float = 0.08) -
 
 async def _fetch_avatar(member: discord.abc.User, size: int = 512) -> Image.Image:
     # Get a static PNG of the avatar at a sane size
-    asset = member.display_avatar.replace(size=size)
-    data = await asset.read()
+    data = await fetch_asset(member.display_avatar.replace(size=size))
     img = Image.open(BytesIO(data)).convert("RGBA")
     # Some avatars are not square; make square by fitting on transparent canvas
     if img.width != img.height:
@@ -71,8 +72,8 @@ class Images(commands.Cog):
 
         # Fetch avatars
         try:
-            base = await _fetch_avatar(p2, size=512)  # background
-            overlay = await _fetch_avatar(p1, size=512)
+            # background, overlay
+            base, overlay = await asyncio.gather(_fetch_avatar(p2, size=512), _fetch_avatar(p1, size=512))
         except Exception:
             return await ctx.send("I couldn’t fetch one of those avatars. Try again?")
 
@@ -4,6 +4,8 @@ import discord
 from discord import ui
 from discord.ext import commands
 from services import progression,exp_display
+from db import queries
+from db.pool import reader
 from constants import VALID_METRICS  # e.g. {"mobs_caught":"Mobs Caught", ...}
 
 PAGE_SIZE = 10
@@ -13,6 +15,82 @@ EMERALD_ITEM_NAME = "emeralds"  # change to "emeralds" if that’s your row name
 
 PAGE_SIZE = 10
 
+# Named so db.queries can time them; the aggregates are the usual slow ones.
+# A page that takes longer than this is better reported than waited on.
+LB_TIMEOUT = float(os.getenv("LB_QUERY_TIMEOUT", "5"))
+LB_MAX_LAG = 60.0  # seconds of replica staleness a leaderboard page tolerates
+
+LB_EMERALDS_GUILD = queries.register("lb.emeralds.guild", """
+    SELECT player_id AS user_id, SUM(quantity)::bigint AS value
+    FROM player_items
+    WHERE guild_id = $1
+      AND LOWER(item_name) = LOWER($2)
+    GROUP BY player_id
+    ORDER BY value DESC, player_id
+    OFFSET $3 LIMIT $4
+""", timeout=LB_TIMEOUT, warm=True)
+LB_EMERALDS_GUILD_COUNT = queries.register("lb.emeralds.guild.count", """
+    SELECT COUNT(*) FROM (
+      SELECT player_id
+      FROM player_items
+      WHERE guild_id = $1
+        AND LOWER(item_name) = LOWER($2)
+      GROUP BY player_id
+    ) t
+""", timeout=LB_TIMEOUT, warm=True)
+LB_EMERALDS_GLOBAL = queries.register("lb.emeralds.global", """
+    SELECT player_id AS user_id, SUM(quantity)::bigint AS value
+    FROM player_items
+    WHERE LOWER(item_name) = LOWER($1)
+    GROUP BY player_id
+    ORDER BY value DESC, player_id
+    OFFSET $2 LIMIT $3
+""", timeout=LB_TIMEOUT, warm=True)
+LB_EMERALDS_GLOBAL_COUNT = queries.register("lb.emeralds.global.count", """
+    SELECT COUNT(*) FROM (
+      SELECT player_id
+      FROM player_items
+      WHERE LOWER(item_name) = LOWER($1)
+      GROUP BY player_id
+    ) t
+""", timeout=LB_TIMEOUT, warm=True)
+LB_EXP_GUILD = queries.register("lb.experience.guild", """
+    SELECT discord_id AS user_id, MAX(experience)::bigint AS value
+    FROM accountinfo
+    WHERE guild_id = $1
+    GROUP BY discord_id
+    ORDER BY value DESC, discord_id
+    OFFSET $2 LIMIT $3
+""", timeout=LB_TIMEOUT, warm=True)
+LB_EXP_GUILD_COUNT = queries.register("lb.experience.guild.count", """
+    SELECT COUNT(DISTINCT discord_id)
+    FROM accountinfo
+    WHERE guild_id = $1
+""", timeout=LB_TIMEOUT, warm=True)
+LB_EXP_GLOBAL = queries.register("lb.experience.global", """
+    SELECT discord_id AS user_id, SUM(overallexp)::bigint AS value
+    FROM accountinfo
+    GROUP BY discord_id
+    ORDER BY value DESC, discord_id
+    OFFSET $1 LIMIT $2
+""", timeout=LB_TIMEOUT, warm=True)
+LB_EXP_GLOBAL_COUNT = queries.register("lb.experience.global.count",
+    "SELECT COUNT(DISTINCT discord_id) FROM accountinfo", timeout=LB_TIMEOUT, warm=True)
+LB_COUNTERS_PAGE = queries.register("lb.counters.page", """
+    SELECT user_id, value
+    FROM lb_counters
+    WHERE metric = $1
+      AND guild_id = $2::bigint
+    ORDER BY value DESC, user_id
+    OFFSET $3 LIMIT $4
+""", timeout=LB_TIMEOUT, warm=True)
+LB_COUNTERS_COUNT = queries.register("lb.counters.count", """
+    SELECT COUNT(*)
+    FROM lb_counters
+    WHERE metric = $1
+      AND guild_id = $2::bigint
+""", timeout=LB_TIMEOUT, warm=True)
+
 async def fetch_lb(conn, *, metric: str, scope: str, guild_id: Optional[int], offset: int, limit: int) -> Tuple[List[dict], int]:
     """
     scope: 'guild' or 'global'
@@ -23,119 +101,30 @@ async def fetch_lb(conn, *, metric: str, scope: str, guild_id: Optional[int], of
     # --- Special metric: Emeralds (from player_items) ---
     if metric == "emeralds":
         if scope == "guild" and guild_id is not None:
-            rows = await conn.fetch(
-                """
-                SELECT player_id AS user_id, SUM(quantity)::bigint AS value
-                FROM player_items
-                WHERE guild_id = $1
-                  AND LOWER(item_name) = LOWER($2)
-                GROUP BY player_id
-                ORDER BY value DESC, player_id
-                OFFSET $3 LIMIT $4
-                """,
-                guild_id, EMERALD_ITEM_NAME, offset, limit
-            )
-            total = await conn.fetchval(
-                """
-                SELECT COUNT(*) FROM (
-                  SELECT player_id
-                  FROM player_items
-                  WHERE guild_id = $1
-                    AND LOWER(item_name) = LOWER($2)
-                  GROUP BY player_id
-                ) t
-                """,
-                guild_id, EMERALD_ITEM_NAME
-            )
+            rows = await queries.fetch(conn, LB_EMERALDS_GUILD, guild_id, EMERALD_ITEM_NAME, offset, limit)
+            total = await queries.fetchval(conn, LB_EMERALDS_GUILD_COUNT, guild_id, EMERALD_ITEM_NAME)
         else:
             # Global: sum across all guilds by player_id
-            rows = await conn.fetch(
-                """
-                SELECT player_id AS user_id, SUM(quantity)::bigint AS value
-                FROM player_items
-                WHERE LOWER(item_name) = LOWER($1)
-                GROUP BY player_id
-                ORDER BY value DESC, player_id
-                OFFSET $2 LIMIT $3
-                """,
-                EMERALD_ITEM_NAME, offset, limit
-            )
-            total = await conn.fetchval(
-                """
-                SELECT COUNT(*) FROM (
-                  SELECT player_id
-                  FROM player_items
-                  WHERE LOWER(item_name) = LOWER($1)
-                  GROUP BY player_id
-                ) t
-                """,
-                EMERALD_ITEM_NAME
-            )
+            rows = await queries.fetch(conn, LB_EMERALDS_GLOBAL, EMERALD_ITEM_NAME, offset, limit)
+            total = await queries.fetchval(conn, LB_EMERALDS_GLOBAL_COUNT, EMERALD_ITEM_NAME)
         return [dict(r) for r in rows], int(total or 0)
 
     # --- Special metric: Experience (from accountinfo.overallexp) ---
     if metric == "experience":
         if scope == "guild" and guild_id is not None:
-            rows = await conn.fetch(
-                """
-                SELECT discord_id AS user_id, MAX(experience)::bigint AS value
-                FROM accountinfo
-                WHERE guild_id = $1
-                GROUP BY discord_id
-                ORDER BY value DESC, discord_id
-                OFFSET $2 LIMIT $3
-                """,
-                guild_id, offset, limit
-            )
-            total = await conn.fetchval(
-                """
-                SELECT COUNT(DISTINCT discord_id)
-                FROM accountinfo
-                WHERE guild_id = $1
-                """,
-                guild_id
-            )
+            rows = await queries.fetch(conn, LB_EXP_GUILD, guild_id, offset, limit)
+            total = await queries.fetchval(conn, LB_EXP_GUILD_COUNT, guild_id)
         else:
             # Global: sum overallexp across all guilds by user
-            rows = await conn.fetch(
-                """
-                SELECT discord_id AS user_id, SUM(overallexp)::bigint AS value
-                FROM accountinfo
-                GROUP BY discord_id
-                ORDER BY value DESC, discord_id
-                OFFSET $1 LIMIT $2
-                """,
-                offset, limit
-            )
-            total = await conn.fetchval(
-                "SELECT COUNT(DISTINCT discord_id) FROM accountinfo"
-            )
+            rows = await queries.fetch(conn, LB_EXP_GLOBAL, offset, limit)
+            total = await queries.fetchval(conn, LB_EXP_GLOBAL_COUNT)
         return [dict(r) for r in rows], int(total or 0)
 
     # --- Default: lb_counters (uses 0 as the sentinel for global) ---
     wanted_gid = guild_id if (scope == "guild" and guild_id is not None) else 0
 
-    rows = await conn.fetch(
-        """
-        SELECT user_id, value
-        FROM lb_counters
-        WHERE metric = $1
-          AND guild_id = $2::bigint
-        ORDER BY value DESC, user_id
-        OFFSET $3 LIMIT $4
-        """,
-        metric, wanted_gid, offset, limit
-    )
-
-    total = await conn.fetchval(
-        """
-        SELECT COUNT(*)
-        FROM lb_counters
-        WHERE metric = $1
-          AND guild_id = $2::bigint
-        """,
-        metric, wanted_gid
-    )
+    rows = await queries.fetch(conn, LB_COUNTERS_PAGE, metric, wanted_gid, offset, limit)
+    total = await queries.fetchval(conn, LB_COUNTERS_COUNT, metric, wanted_gid)
     return [dict(r) for r in rows], int(total or 0)
 
 
@@ -211,7 +200,7 @@ class LBView(ui.View):
         offset = self.page * PAGE_SIZE
         gid = self.ctx.guild.id if (self.scope == "guild" and self.ctx.guild) else None
 
-        async with self.ctx.bot.db_pool.acquire() as conn:
+        async with queries.acquire(reader(LB_MAX_LAG, "leaderboard"), "leaderboard") as conn:
             rows, total = await fetch_lb(
                 conn,
                 metric=self.metric, scope=self.scope, guild_id=gid,
@@ -6,6 +6,8 @@ import aiohttp, asyncpg
 from contextlib import suppress
 import discord
 
+from core import leader
+
 CODE_RE = re.compile(r"\b([A-Z0-9]{8})\b")
 API_BASE = "https://www.googleapis.com/youtube/v3/commentThreads"
 
@@ -97,6 +99,8 @@ class GlobalCommentPoller:
         await self.bot.wait_until_ready()
         async with aiohttp.ClientSession() as session:
             while self._alive and not self.bot.is_closed():
+                if not leader.is_leader():  # clustered: one poller for the whole bot
+                    await asyncio.sleep(self.poll_seconds); continue
                 try:
                     items = await _fetch_newest_comments(
                         session, self.api_key, self.video_id, self.max_results
@@ -132,16 +136,15 @@ class GlobalCommentPoller:
                             author_name or "YouTube User",
                         )
 
-                        user = self.bot.get_user(pending_row["discord_id"])
-                        if user:
-                            with suppress(Exception):
-                                # in cogs/link_comments_api.py, inside GlobalCommentPoller when a code matches:
-                                content = (
-                                    f"✅ Linked your YouTube channel **{author_name}**."
-                                    + (f" (ID: {author_cid})" if author_cid else "")
-                                )
-                                # queue it — this returns immediately; the outbox will pace sends
-                                await self.bot.outbox.dm(pending_row["discord_id"], content)
+                        # by id: the user may only be cached on another cluster's
+                        # shards, and the outbox fetches them over REST if needed
+                        with suppress(Exception):
+                            content = (
+                                f"✅ Linked your YouTube channel **{author_name}**."
+                                + (f" (ID: {author_cid})" if author_cid else "")
+                            )
+                            # queue it — this returns immediately; the outbox will pace sends
+                            await self.bot.outbox.dm(pending_row["discord_id"], content)
 
                         self._seen.add(comment_id)
                         pending_by_code.pop(code, None)
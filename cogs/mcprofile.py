@@ -1,71 +1,41 @@
 # cogs/mcprofile.py
 import re
-import json
-import base64
 import asyncio
-from typing import Optional, Dict, Tuple, List
+from typing import Optional, Tuple, List
 import io
 import aiohttp
 import discord
 from discord.ext import commands
 
-MOJANG_USERNAME_URL = "https://api.mojang.com/users/profiles/minecraft/{username}"
-MOJANG_SESSION_URL  = "https://sessionserver.mojang.com/session/minecraft/profile/{uuid}"
+from core import metrics
+from services import mojang
+from services.image_cache import image_cache
+
 UUID_RE = re.compile(r"^[0-9a-fA-F]{32}$")  # undashed UUID
+RENDER_TTL = 3600  # crafatar renders follow skin changes; keep them an hour
 
 def dashed_uuid(u: str) -> str:
     u = u.replace("-", "")
     return f"{u[0:8]}-{u[8:12]}-{u[12:16]}-{u[16:20]}-{u[20:32]}"
 
-async def mojang_lookup_uuid(session: aiohttp.ClientSession, name: str) -> Optional[str]:
-    url = MOJANG_USERNAME_URL.format(username=name)
-    async with session.get(url, timeout=aiohttp.ClientTimeout(total=5)) as r:
-        if r.status in (204, 404):
-            return None
-        r.raise_for_status()
-        data = await r.json()
-        return data.get("id")
-
-async def mojang_profile_textures(session: aiohttp.ClientSession, uuid_nodash: str) -> Dict:
-    url = MOJANG_SESSION_URL.format(uuid=uuid_nodash)
-    async with session.get(url, timeout=aiohttp.ClientTimeout(total=5)) as r:
-        r.raise_for_status()
-        prof = await r.json()
-
-    name = prof.get("name")
-    props = prof.get("properties", [])
-    textures_b64 = next((p["value"] for p in props if p.get("name") == "textures"), None)
-
-    skin_url = None
-    cape_url = None
-    slim = False
-
-    if textures_b64:
-        decoded = json.loads(base64.b64decode(textures_b64).decode("utf-8"))
-        tex = decoded.get("textures", {})
-        skin_obj = tex.get("SKIN")
-        cape_obj = tex.get("CAPE")
-
-        if skin_obj:
-            skin_url = skin_obj.get("url")
-            slim = skin_obj.get("metadata", {}).get("model") == "slim"
-        if cape_obj:
-            cape_url = cape_obj.get("url")
-
-    return {"name": name, "skin_url": skin_url, "cape_url": cape_url, "slim": slim}
-
 async def fetch_image(session: aiohttp.ClientSession, url: str) -> Optional[bytes]:
-    """Return image bytes or None. Small timeout so we don't hang."""
+    """Return image bytes or None, through the shared image cache."""
+    return await image_cache.get_or_fetch(url, lambda: _download_image(session, url), ttl=RENDER_TTL)
+
+async def _download_image(session: aiohttp.ClientSession, url: str) -> Optional[bytes]:
+    """Small timeout so we don't hang."""
     try:
         timeout = aiohttp.ClientTimeout(connect=3, total=6)
         async with session.get(url, timeout=timeout) as r:
             if r.status != 200:
+                metrics.UPSTREAM_ERRORS.inc(upstream="crafatar", op="image", status=r.status)
                 return None
             ctype = r.headers.get("Content-Type", "")
             if not ctype.startswith("image/"):
                 return None
             return await r.read()
-    except Exception:
+    except Exception as e:
+        metrics.UPSTREAM_ERRORS.inc(upstream="crafatar", op="image", status=type(e).__name__)
         return None
 
 class MCProfile(commands.Cog):
@@ -75,6 +45,7 @@ class MCProfile(commands.Cog):
 
     def cog_unload(self):
         asyncio.create_task(self.session.close())
+        asyncio.create_task(mojang.close())
 
     @commands.command(
         name="mcprofile",
@@ -88,18 +59,29 @@ class MCProfile(commands.Cog):
             if UUID_RE.match(candidate):
                 uuid_nodash = candidate.lower()
             else:
-                uuid_nodash = await mojang_lookup_uuid(self.session, handle)
+                try:
+                    uuid_nodash = await mojang.resolve_uuid(self.bot.db_pool, handle)
+                except aiohttp.ClientResponseError as e:
+                    metrics.UPSTREAM_ERRORS.inc(upstream="mojang", op="uuid", status=e.status)
+                    await ctx.reply(f"⚠️ Mojang API error ({e.status}). Try again later.")
+                    return
+                except Exception as e:
+                    metrics.UPSTREAM_ERRORS.inc(upstream="mojang", op="uuid", status=type(e).__name__)
+                    await ctx.reply("⚠️ Something went wrong talking to Mojang.")
+                    return
                 if not uuid_nodash:
                     await ctx.reply(f"❌ I couldn't find a Java account named **{handle}**.")
                     return
 
             # Fetch textures
             try:
-                tex = await mojang_profile_textures(self.session, uuid_nodash)
+                tex = await mojang.profile_textures(self.bot.db_pool, uuid_nodash)
             except aiohttp.ClientResponseError as e:
+                metrics.UPSTREAM_ERRORS.inc(upstream="mojang", op="profile", status=e.status)
                 await ctx.reply(f"⚠️ Mojang API error ({e.status}). Try again later.")
                 return
-            except Exception:
+            except Exception as e:
+                metrics.UPSTREAM_ERRORS.inc(upstream="mojang", op="profile", status=type(e).__name__)
                 await ctx.reply("⚠️ Something went wrong talking to Mojang.")
                 return
 
@@ -113,8 +95,10 @@ class MCProfile(commands.Cog):
             raw_cape_png = f"https://crafatar.com/capes/{uuid_nodash}"
 
             # Try to fetch avatar + head; fall back gracefully
-            avatar_bytes = await fetch_image(self.session, avatar_url)
-            head_bytes   = await fetch_image(self.session, head3d_url)
+            avatar_bytes, head_bytes = await asyncio.gather(
+                fetch_image(self.session, avatar_url),
+                fetch_image(self.session, head3d_url),
+            )
 
         # Build embed (outside typing to avoid long holds)
         model_label = "Alex (slim)" if tex["slim"] else "Steve (classic)"
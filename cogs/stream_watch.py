@@ -9,6 +9,8 @@ from discord.ext import commands, tasks
 import aiohttp
 from urllib.parse import urlparse, parse_qs
 
+from db.pool import get_bg_pool
+
 # ---------- Config ----------
 TWITCH_CLIENT_ID     = os.getenv("TWITCH_CLIENT_ID")
 TWITCH_CLIENT_SECRET = os.getenv("TWITCH_CLIENT_SECRET")
@@ -450,12 +452,16 @@ class StreamWatch(commands.Cog):
     @tasks.loop(minutes=2.0)
     async def loop(self):
         # Grab all guilds with configs
-        async with self.bot.db_pool.acquire() as conn:
+        async with get_bg_pool().acquire() as conn:
             yt_rows = await conn.fetch("SELECT guild_id FROM guild_youtube_watch")
             tw_rows = await conn.fetch("SELECT guild_id FROM guild_twitch_watch")
 
-        # Interleave checks a bit
-        gids = list({*(int(r["guild_id"]) for r in yt_rows), *(int(r["guild_id"]) for r in tw_rows)})
+        # Interleave checks a bit. Clustered: every process runs this loop for
+        # the guilds on its own shards (like the spawn loops).
+        gids = [
+            gid for gid in {*(int(r["guild_id"]) for r in yt_rows), *(int(r["guild_id"]) for r in tw_rows)}
+            if self.bot.get_guild(gid) is not None
+        ]
         for gid in gids:
             await self._check_youtube_for_guild(gid)
             await asyncio.sleep(0.4)
@@ -468,7 +474,7 @@ class StreamWatch(commands.Cog):
 
     # ----- Checkers -----
     async def _check_youtube_for_guild(self, guild_id: int, force: bool = False):
-        async with self.bot.db_pool.acquire() as conn:
+        async with get_bg_pool().acquire() as conn:
             row = await conn.fetchrow(
                 "SELECT yt_channel_id, announce_mode, announce_ch_id, ping_role_id, last_video_id, last_live_id FROM guild_youtube_watch WHERE guild_id=$1",
                 guild_id
@@ -495,7 +501,7 @@ class StreamWatch(commands.Cog):
                     vid, title, link = latest
                     if not last_video_id and not force:
                         # First run, just record current ID, no announcement
-                        async with self.bot.db_pool.acquire() as conn:
+                        async with get_bg_pool().acquire() as conn:
                             await conn.execute(
                                 "UPDATE guild_youtube_watch SET last_video_id=$2 WHERE guild_id=$1",
                                 guild_id, vid
@@ -513,7 +519,7 @@ class StreamWatch(commands.Cog):
                         )
                         try:
                             await channel.send(f"{mention}{link}", embed=emb)
-                            async with self.bot.db_pool.acquire() as conn:
+                            async with get_bg_pool().acquire() as conn:
                                 await conn.execute("UPDATE guild_youtube_watch SET last_video_id=$2 WHERE guild_id=$1", guild_id, vid)
                         except Exception:
                             pass
@@ -522,7 +528,7 @@ class StreamWatch(commands.Cog):
                 live_vid, live_url = await yt_live_now(s, yt_channel_id)
                 if not last_live_id and not force:
                     # First run, just record without announcing
-                    async with self.bot.db_pool.acquire() as conn:
+                    async with get_bg_pool().acquire() as conn:
                         await conn.execute(
                             "UPDATE guild_youtube_watch SET last_live_id=$2 WHERE guild_id=$1",
                             guild_id, live_vid
@@ -541,13 +547,13 @@ class StreamWatch(commands.Cog):
                         )
                         try:
                             await channel.send(f"{mention}{live_url}", embed=emb)
-                            async with self.bot.db_pool.acquire() as conn:
+                            async with get_bg_pool().acquire() as conn:
                                 await conn.execute("UPDATE guild_youtube_watch SET last_live_id=$2 WHERE guild_id=$1", guild_id, live_vid)
                         except Exception:
                             pass
 
     async def _check_twitch_for_guild(self, guild_id: int, force: bool = False):
-        async with self.bot.db_pool.acquire() as conn:
+        async with get_bg_pool().acquire() as conn:
             row = await conn.fetchrow(
                 "SELECT twitch_login, twitch_user_id, announce_ch_id, ping_role_id, last_stream_id FROM guild_twitch_watch WHERE guild_id=$1",
                 guild_id
@@ -572,7 +578,7 @@ class StreamWatch(commands.Cog):
                 if not user:
                     return
                 user_id = user.get("id")
-                async with self.bot.db_pool.acquire() as conn:
+                async with get_bg_pool().acquire() as conn:
                     await conn.execute("UPDATE guild_twitch_watch SET twitch_user_id=$2 WHERE guild_id=$1", guild_id, user_id)
 
             stream = await twitch_live_now(s, self._twitch_auth, user_id)
@@ -603,7 +609,7 @@ class StreamWatch(commands.Cog):
             )
             try:
                 await channel.send(f"{mention}{url}", embed=emb)
-                async with self.bot.db_pool.acquire() as conn:
+                async with get_bg_pool().acquire() as conn:
                     await conn.execute("UPDATE guild_twitch_watch SET last_stream_id=$2 WHERE guild_id=$1", guild_id, stream_id)
             except Exception:
                 pass
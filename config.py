@@ -44,6 +44,24 @@ class Settings:
 
     YT_API_KEY: str
     YT_VERIFY_VIDEO_ID: str          # 11-char YouTube video ID (your one verification video)
+
+    # Gameplay
+    FISH_FOOD_PAYOUTS: bool          # periodic fish food for aquarium owners (off unless enabled)
+
+    # Clustering (CLUSTER_COUNT > 1: bot.py supervises one process per cluster)
+    CLUSTER_COUNT: int
+    CLUSTER_ID: int | None           # set by the supervisor on each child
+    SHARD_COUNT: int                 # total shards across all clusters
+
+    @property
+    def CLUSTERED(self) -> bool:
+        return self.CLUSTER_COUNT > 1
+
+    def cluster_shard_ids(self) -> list[int]:
+        """Shards owned by this process (round-robin so guild load spreads evenly)."""
+        cid = self.CLUSTER_ID or 0
+        return [s for s in range(self.SHARD_COUNT) if s % self.CLUSTER_COUNT == cid]
+
     def require_prod(self) -> None:
         """In production, ensure critical settings exist."""
         if not self.IS_DEV:
@@ -55,6 +73,7 @@ class Settings:
 def _build() -> Settings:
     env = os.getenv("ENV", "prod").lower()
     is_dev = env == "dev"
+    cluster_count = max(1, int(os.getenv("CLUSTER_COUNT", "1")))
 
     return Settings(
         ENV=env,
@@ -74,6 +93,12 @@ def _build() -> Settings:
 
         YT_API_KEY = os.getenv("YT_API_KEY"),
         YT_VERIFY_VIDEO_ID = os.getenv("YT_VERIFY_VIDEO_ID"),
+
+        FISH_FOOD_PAYOUTS=os.getenv("FISH_FOOD_PAYOUTS", "").lower() in ("1", "true", "yes"),
+
+        CLUSTER_COUNT=cluster_count,
+        CLUSTER_ID=int(os.environ["CLUSTER_ID"]) if os.getenv("CLUSTER_ID", "").isdigit() else None,
+        SHARD_COUNT=max(int(os.getenv("SHARD_COUNT", str(cluster_count))), cluster_count),
     )
 
 settings = _build()
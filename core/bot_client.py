@@ -1,14 +1,15 @@
 # core/bot_client.py
-import logging, asyncpg, discord
+import logging, time, asyncpg, discord
 from discord.ext import commands
-from db.pool import init_pool
+from db.pool import init_pool, rewarm
 from utils import prefixes
 from cogs.link_comments_api import setup_comment_link_listener_api
 from config import settings
 from core.outbox import MessageOutbox
+from core import metrics, profiler
 log = logging.getLogger("beenbag.bot")
 
-class BeenBag(commands.Bot):
+class BeenBag(commands.AutoShardedBot):
     def __init__(self, db_pool=None, **kwargs):
         intents = kwargs.get("intents", discord.Intents.default())
         intents.members = True
@@ -28,6 +29,7 @@ class BeenBag(commands.Bot):
         self.db_pool = db_pool
         self.state = {}
         self._bg_tasks = set()
+        metrics.bind_bot(self)  # /metrics + /healthz read the live bot
 
         log.info("Intents set: members=%s, message_content=%s",
                  self.intents.members, self.intents.message_content)
@@ -73,6 +75,28 @@ class BeenBag(commands.Bot):
                 await self.load_extension(ext)
             except Exception:
                 log.exception("Failed to load extension %s", ext)
+        await rewarm()  # cogs have registered their hot queries by now
+
+    async def invoke(self, ctx: commands.Context):
+        # per-command timing (includes checks, cooldowns and the handler itself)
+        if ctx.command is None:
+            return await super().invoke(ctx)
+        with profiler.timed(f"command:{ctx.command.qualified_name}"):
+            await super().invoke(ctx)
+        if ctx.command_failed:
+            metrics.COMMAND_FAILURES.inc(command=ctx.command.qualified_name)
+
+    async def _run_event(self, coro, event_name, *args, **kwargs):
+        # every client event and cog listener goes through here
+        start = time.perf_counter()
+        try:
+            await super()._run_event(coro, event_name, *args, **kwargs)
+        finally:
+            elapsed = time.perf_counter() - start
+            name = f"listener:{getattr(coro, '__qualname__', event_name)}"
+            profiler.observe(name, elapsed)
+            if elapsed >= profiler.SLOW_HANDLER_SECONDS:
+                log.info("Slow listener %s took %.3fs", name, elapsed)
 
     async def close(self):
         # cancel any spawn/background tasks stored by your spawner
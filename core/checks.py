@@ -1,9 +1,34 @@
 # core/checks.py
+import time
+from typing import Dict, Optional, Tuple
+
 from discord.ext import commands
 from utils.permissions import is_guild_admin
 from utils.permissions import bot_can_send, bot_can_react
 import asyncpg
 
+# guild_id -> (game_channel_ids, expires_at). Checks run for every command (and
+# for every command listed by !help), so don't hit guild_settings each time.
+# Admin commands that change the list call forget_game_channels().
+GAME_CHANNELS_TTL = 60.0
+_game_channels: Dict[int, Tuple[Optional[frozenset], float]] = {}
+
+async def _get_game_channels(pool: asyncpg.Pool, guild_id: int) -> Optional[frozenset]:
+    hit = _game_channels.get(guild_id)
+    if hit and hit[1] > time.monotonic():
+        return hit[0]
+    async with pool.acquire() as conn:
+        ids = await conn.fetchval(
+            "SELECT game_channel_ids FROM guild_settings WHERE guild_id=$1",
+            guild_id
+        )
+    ids = frozenset(ids) if ids else None
+    _game_channels[guild_id] = (ids, time.monotonic() + GAME_CHANNELS_TTL)
+    return ids
+
+def forget_game_channels(guild_id: int) -> None:
+    _game_channels.pop(guild_id, None)
+
 def is_admin():
     """User must be a guild admin (Manage Guild or Administrator)."""
     async def predicate(ctx: commands.Context):
@@ -20,12 +45,7 @@ def only_in_game_channels():
             return True
         if is_guild_admin(ctx.author):
             return True
-        pool: asyncpg.Pool = ctx.bot.db_pool
-        async with pool.acquire() as conn:
-            ids = await conn.fetchval(
-                "SELECT game_channel_ids FROM guild_settings WHERE guild_id=$1",
-                ctx.guild.id
-            )
+        ids = await _get_game_channels(ctx.bot.db_pool, ctx.guild.id)
         return not ids or (ctx.channel.id in ids)
     return commands.check(predicate)
 
@@ -0,0 +1,108 @@
+# core/leader.py
+"""
+Leader election for singleton background jobs (fish food, entitlement sync,
+the comment poller, stream watch).
+
+In clustered mode every process races for one Postgres advisory lock, held on
+a dedicated connection: pool connections run pg_advisory_unlock_all() on
+release, so they can't hold it. If the leader dies its session ends, Postgres
+drops the lock and another process takes it within LEADER_RETRY_SECONDS.
+
+Jobs check is_leader() each iteration rather than being started/stopped, so a
+failover is just "the next tick happens somewhere else". A single process
+(no elector started) is always the leader.
+"""
+import asyncio
+import logging
+import os
+from typing import Optional
+
+from core import metrics
+
+log = logging.getLogger("beenbag.leader")
+
+LOCK_KEY = int(os.getenv("LEADER_LOCK_KEY", "7741001"))
+RETRY_SECONDS = float(os.getenv("LEADER_RETRY_SECONDS", "10"))
+
+
+class LeaderElector:
+    def __init__(self, dsn: str, key: int = LOCK_KEY, retry: float = RETRY_SECONDS):
+        self.dsn = dsn
+        self.key = key
+        self.retry = retry
+        self.leader = False
+        self._conn = None
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run(), name="leader-election")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except (asyncio.CancelledError, Exception):
+                pass
+        await self._drop_conn()  # closing the session releases the lock for the next process
+
+    def _set(self, leader: bool) -> None:
+        if leader != self.leader:
+            log.warning("Leadership %s (lock %s)", "acquired" if leader else "lost", self.key)
+        self.leader = leader
+
+    async def _drop_conn(self) -> None:
+        conn, self._conn = self._conn, None
+        if conn is not None and not conn.is_closed():
+            try:
+                await asyncio.wait_for(conn.close(), timeout=5)
+            except Exception:
+                conn.terminate()
+
+    async def _run(self) -> None:
+        from db.pool import connect
+        while True:
+            try:
+                if self._conn is None or self._conn.is_closed():
+                    self._set(False)
+                    self._conn = await connect(self.dsn)
+                if self.leader:
+                    # the lock lives exactly as long as this session; make sure it still does
+                    await self._conn.fetchval("SELECT 1", timeout=5)
+                elif await self._conn.fetchval("SELECT pg_try_advisory_lock($1)", self.key, timeout=5):
+                    self._set(True)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                log.warning("Leader election check failed: %s", e)
+                self._set(False)
+                await self._drop_conn()
+            await asyncio.sleep(self.retry)
+
+
+_elector: Optional[LeaderElector] = None
+
+
+def start(dsn: str) -> LeaderElector:
+    """Call once per process from inside the running loop (clustered mode only)."""
+    global _elector
+    if _elector is None:
+        _elector = LeaderElector(dsn)
+    _elector.start()
+    return _elector
+
+
+async def stop() -> None:
+    if _elector is not None:
+        await _elector.stop()
+
+
+def is_leader() -> bool:
+    return _elector is None or _elector.leader
+
+
+def _leader_metrics():
+    yield ("cluster_leader", "gauge", "1 on the process that runs the singleton jobs", [({}, int(is_leader()))])
+
+metrics.register_collector(_leader_metrics)
@@ -0,0 +1,178 @@
+# core/metrics.py
+"""
+Prometheus text exposition for /metrics.
+
+Counters live here; timing histograms come from core.profiler; point-in-time
+values (pool size, queue depth, cache stats...) come from collectors that the
+owning modules register, so this module imports nothing from the bot itself.
+"""
+import math
+import time
+from typing import Callable, Dict, Iterable, List, Tuple
+
+from core import profiler
+
+PREFIX = "beenbag_"
+
+Labels = Tuple[Tuple[str, str], ...]
+Sample = Tuple[Dict[str, object], float]
+# (name, type, help, samples); name without PREFIX
+Family = Tuple[str, str, str, List[Sample]]
+
+
+class Counter:
+    """Monotonic counter with optional labels."""
+    def __init__(self, name: str, help: str):
+        self.name = name
+        self.help = help
+        self._values: Dict[Labels, float] = {}
+
+    def inc(self, n: float = 1, **labels) -> None:
+        key = tuple(sorted((k, str(v)) for k, v in labels.items()))
+        self._values[key] = self._values.get(key, 0) + n
+
+    def family(self) -> Family:
+        return (self.name, "counter", self.help, [(dict(k), v) for k, v in self._values.items()])
+
+
+_counters: Dict[str, Counter] = {}
+_collectors: List[Callable[[], Iterable[Family]]] = []
+
+
+def counter(name: str, help: str) -> Counter:
+    c = _counters.get(name)
+    if c is None:
+        c = _counters[name] = Counter(name, help)
+    return c
+
+
+def register_collector(fn: Callable[[], Iterable[Family]]) -> None:
+    """fn() -> [(name, 'gauge'|'counter', help, [(labels, value), ...]), ...], called per scrape."""
+    if fn not in _collectors:
+        _collectors.append(fn)
+
+
+# Shared counters other modules bump
+UPSTREAM_ERRORS = counter("http_upstream_errors_total", "Failed/retried calls to upstream HTTP APIs")
+COMMAND_FAILURES = counter("command_failures_total", "Command invocations that raised")
+
+
+# ---------------- bot binding ---------------- #
+# bot.py builds a new bot per login attempt; the HTTP server outlives them.
+
+_bot = None
+_started = time.time()
+_last_gateway_ready = 0.0
+
+
+def bind_bot(bot) -> None:
+    global _bot
+    _bot = bot
+
+
+def gateway_status() -> dict:
+    """Websocket state of the current bot, plus how long it has been down."""
+    global _last_gateway_ready
+    now = time.time()
+    bot = _bot
+    ready = bool(bot is not None and bot.is_ready() and not bot.is_closed())
+    latency = getattr(bot, "latency", float("inf")) if bot is not None else float("inf")
+    if ready:
+        _last_gateway_ready = now
+    return {
+        "ready": ready,
+        "latency": None if not math.isfinite(latency) else round(latency, 4),
+        "down_for": 0.0 if ready else round(now - max(_last_gateway_ready, _started), 1),
+    }
+
+
+def _core_families() -> Iterable[Family]:
+    bot = _bot
+    gw = gateway_status()
+    yield ("gateway_ready", "gauge", "1 when the Discord websocket is connected and ready", [({}, int(gw["ready"]))])
+    if gw["latency"] is not None:
+        yield ("gateway_latency_seconds", "gauge", "Discord heartbeat latency", [({}, gw["latency"])])
+    if bot is not None:
+        tasks = getattr(bot, "state", {}).get("spawn_tasks", {})
+        yield ("spawn_tasks_alive", "gauge", "Per-guild spawn loops still running",
+               [({}, sum(1 for t in tasks.values() if not t.done()))])
+        yield ("guilds", "gauge", "Guilds this process serves", [({}, len(bot.guilds))])
+        outbox = getattr(bot, "outbox", None)
+        if outbox is not None:
+            yield ("outbox_queue_depth", "gauge", "DMs waiting in the outbox", [({"queue": "dm"}, outbox.queue.qsize())])
+
+    stalls = profiler.loop_monitor.stalls
+    yield ("loop_stalls_recorded", "gauge", "Loop stalls currently kept for !perf", [({}, len(stalls))])
+
+
+# ---------------- rendering ---------------- #
+
+def _esc(v: object) -> str:
+    return str(v).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _fmt_labels(labels: Dict[str, object]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_esc(v)}"' for k, v in labels.items()) + "}"
+
+
+def _fmt_value(v: float) -> str:
+    if isinstance(v, float) and not math.isfinite(v):
+        return "+Inf" if v > 0 else ("-Inf" if v < 0 else "NaN")
+    return repr(float(v)) if isinstance(v, float) else str(v)
+
+
+def _histogram_families() -> Dict[str, List[Tuple[Dict[str, object], profiler.Histogram]]]:
+    """'command:buy' -> beenbag_command_seconds{name="buy"}; 'loop.lag' -> beenbag_loop_lag_seconds."""
+    fams: Dict[str, List[Tuple[Dict[str, object], profiler.Histogram]]] = {}
+    for key, h in profiler.histograms().items():
+        family, sep, label = key.partition(":")
+        name = family.replace(".", "_").replace("-", "_") + "_seconds"
+        fams.setdefault(name, []).append(({"name": label} if sep else {}, h))
+    return fams
+
+
+def render() -> str:
+    out: List[str] = []
+    # several collectors may report the same family (e.g. cache_requests_total); merge them
+    merged: Dict[str, Tuple[str, str, List[Sample]]] = {}
+
+    def add(fam: Family) -> None:
+        name, typ, help, samples = fam
+        merged.setdefault(name, (typ, help, []))[2].extend(samples)
+
+    for fam in _core_families():
+        add(fam)
+    for c in _counters.values():
+        add(c.family())
+    for fn in list(_collectors):
+        try:
+            fams = list(fn())
+        except Exception as e:  # one broken collector shouldn't blank the scrape
+            out.append(f"# collector {getattr(fn, '__qualname__', fn)} failed: {_esc(e)}")
+            continue
+        for fam in fams:
+            add(fam)
+
+    for name, (typ, help, samples) in merged.items():
+        full = PREFIX + name
+        out.append(f"# HELP {full} {help}")
+        out.append(f"# TYPE {full} {typ}")
+        for labels, value in samples:
+            out.append(f"{full}{_fmt_labels(labels)} {_fmt_value(value)}")
+
+    for name, series in sorted(_histogram_families().items()):
+        full = PREFIX + name
+        out.append(f"# HELP {full} Wall-clock duration")
+        out.append(f"# TYPE {full} histogram")
+        for labels, h in series:
+            cum = 0
+            for bound, n in zip(profiler.BUCKETS + (float("inf"),), h.buckets):
+                cum += n
+                le = "+Inf" if math.isinf(bound) else repr(bound)
+                out.append(f"{full}_bucket{_fmt_labels({**labels, 'le': le})} {cum}")
+            out.append(f"{full}_sum{_fmt_labels(labels)} {h.sum!r}")
+            out.append(f"{full}_count{_fmt_labels(labels)} {h.count}")
+
+    return "\n".join(out) + "\n"
@@ -0,0 +1,199 @@
+# core/profiler.py
+"""
+In-process profiling: event-loop lag, stacks of whatever is blocking the loop,
+and timing histograms for commands / listeners.
+
+Everything lives in module globals so the HTTP server (started before the bot)
+and every bot instance share one registry.
+"""
+import asyncio
+import logging
+import os
+import sys
+import threading
+import time
+from bisect import bisect_left
+from collections import deque
+from contextlib import contextmanager
+from typing import Dict, Iterable, List, Optional, Tuple
+
+log = logging.getLogger("beenbag.profiler")
+
+# Tunables (env so prod can tighten them without a deploy)
+LAG_INTERVAL = float(os.getenv("PROFILER_LAG_INTERVAL", "0.5"))           # lag probe period (s)
+STALL_SECONDS = float(os.getenv("PROFILER_STALL_SECONDS", "0.25"))        # loop blocked this long -> grab a stack
+SLOW_HANDLER_SECONDS = float(os.getenv("PROFILER_SLOW_HANDLER_SECONDS", "5.0"))
+SAMPLE_WINDOW = 1024   # recent samples kept per histogram for percentiles
+MAX_STALLS = 20        # recent stalls kept for !perf / /debug/perf
+
+# Upper bounds (seconds); the last bucket is +Inf
+BUCKETS: Tuple[float, ...] = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+class Histogram:
+    """Cumulative bucket counts (for export) + a window of recent samples (for p50/p95/p99)."""
+    __slots__ = ("count", "sum", "max", "buckets", "_recent")
+
+    def __init__(self):
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+        self.buckets = [0] * (len(BUCKETS) + 1)
+        self._recent: deque = deque(maxlen=SAMPLE_WINDOW)
+
+    def observe(self, seconds: float) -> None:
+        self.count += 1
+        self.sum += seconds
+        if seconds > self.max:
+            self.max = seconds
+        self.buckets[bisect_left(BUCKETS, seconds)] += 1
+        self._recent.append(seconds)
+
+    def quantiles(self, qs: Iterable[float] = (0.5, 0.95, 0.99)) -> Tuple[float, ...]:
+        data = sorted(self._recent)
+        if not data:
+            return tuple(0.0 for _ in qs)
+        n = len(data)
+        return tuple(data[min(n - 1, int(q * n))] for q in qs)
+
+    def snapshot(self) -> dict:
+        p50, p95, p99 = self.quantiles()
+        return {
+            "count": self.count, "sum": round(self.sum, 6), "max": round(self.max, 6),
+            "p50": round(p50, 6), "p95": round(p95, 6), "p99": round(p99, 6),
+        }
+
+
+_hists: Dict[str, Histogram] = {}
+
+
+def histogram(name: str) -> Histogram:
+    h = _hists.get(name)
+    if h is None:
+        h = _hists[name] = Histogram()
+    return h
+
+
+def observe(name: str, seconds: float) -> None:
+    histogram(name).observe(seconds)
+
+
+@contextmanager
+def timed(name: str, slow: Optional[float] = SLOW_HANDLER_SECONDS):
+    """Time a block (sync or around awaits) into histogram `name`; log it if slower than `slow`."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        observe(name, elapsed)
+        if slow is not None and elapsed >= slow:
+            log.info("Slow handler %s took %.3fs", name, elapsed)
+
+
+def histograms(prefix: str = "") -> Dict[str, Histogram]:
+    return {k: v for k, v in _hists.items() if k.startswith(prefix)}
+
+
+# ---------------- event-loop lag + stall capture ---------------- #
+
+class LoopMonitor:
+    """
+    A probe task sleeps LAG_INTERVAL and records how late it woke up (loop lag).
+    A watchdog thread notices when the probe hasn't run for STALL_SECONDS past its
+    deadline and captures the loop thread's stack + current task, i.e. the code
+    that is blocking every guild right now.
+    """
+    def __init__(self, interval: float = LAG_INTERVAL, stall: float = STALL_SECONDS):
+        self.interval = interval
+        self.stall = stall
+        self.stalls: deque = deque(maxlen=MAX_STALLS)
+        self._deadline = 0.0
+        self._captured_for = 0.0
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread_id: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+        self._stop = threading.Event()
+
+    def start(self) -> None:
+        if self._task is not None and not self._task.done():
+            return
+        self._loop = asyncio.get_running_loop()
+        self._thread_id = threading.get_ident()
+        self._deadline = time.perf_counter() + self.interval
+        self._stop.clear()
+        self._task = self._loop.create_task(self._probe(), name="profiler-loop-lag")
+        threading.Thread(target=self._watch, name="profiler-watchdog", daemon=True).start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._task is not None:
+            self._task.cancel()
+
+    async def _probe(self) -> None:
+        lag_hist = histogram("loop.lag")
+        while True:
+            self._deadline = time.perf_counter() + self.interval
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, time.perf_counter() - self._deadline)
+            lag_hist.observe(lag)
+            if self._captured_for == self._deadline:
+                # the stall we grabbed a stack for has ended; record how long it really was
+                self.stalls[-1]["blocked_for"] = round(lag, 3)
+                log.warning("Event loop was blocked for %.3fs (%s)", lag, self.stalls[-1]["task"])
+
+    def _watch(self) -> None:
+        tick = max(0.01, self.stall / 4)
+        while not self._stop.wait(tick):
+            deadline = self._deadline
+            late = time.perf_counter() - deadline
+            if late < self.stall or self._captured_for == deadline:
+                continue
+            self._captured_for = deadline
+            self._capture(late)
+
+    def _capture(self, late: float) -> None:
+        frame = sys._current_frames().get(self._thread_id)
+        stack: List[str] = []
+        while frame is not None and len(stack) < 25:
+            code = frame.f_code
+            stack.append(f"{os.path.basename(code.co_filename)}:{frame.f_lineno} in {code.co_name}")
+            frame = frame.f_back
+        try:
+            task = asyncio.current_task(self._loop)
+            task_name = task.get_name() if task else None
+            coro = getattr(task.get_coro(), "__qualname__", None) if task else None
+        except Exception:
+            task_name = coro = None
+        self.stalls.append({
+            "at": time.time(),
+            "blocked_for": round(late, 3),   # updated once the loop wakes up
+            "task": f"{task_name} ({coro})" if task_name else "callback",
+            "stack": stack,
+        })
+        log.warning("Event loop blocked >%.3fs in %s:\n  %s",
+                    late, self.stalls[-1]["task"], "\n  ".join(stack[:12]))
+
+
+loop_monitor = LoopMonitor()
+
+
+def start_loop_monitor() -> None:
+    """Call once from inside the running loop (idempotent)."""
+    loop_monitor.start()
+
+
+# ---------------- reporting ---------------- #
+
+def snapshot(prefix: str = "") -> dict:
+    """JSON-friendly view of every histogram + recent stalls."""
+    return {
+        "histograms": {k: h.snapshot() for k, h in sorted(histograms(prefix).items())},
+        "stalls": list(loop_monitor.stalls),
+    }
+
+
+def top(prefix: str = "", n: int = 10, key: str = "p95") -> List[Tuple[str, dict]]:
+    rows = [(k, h.snapshot()) for k, h in histograms(prefix).items()]
+    rows.sort(key=lambda kv: kv[1][key], reverse=True)
+    return rows[:n]
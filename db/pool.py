@@ -1,8 +1,44 @@
 # db/pool.py
-import ssl, asyncpg
+import os, ssl, time, asyncio, logging, asyncpg
+from contextlib import asynccontextmanager
 from urllib.parse import urlparse, parse_qs
 
+from core import metrics
+from db import queries
+
+# Tunables (env so prod can size the pools without a deploy)
+# Interactive pool: commands / on_message. Short default timeout so one slow
+# query can't sit on a connection for a minute while chat waits.
+POOL_MIN = int(os.getenv("DB_POOL_MIN", "2"))
+POOL_MAX = int(os.getenv("DB_POOL_MAX", "10"))
+COMMAND_TIMEOUT = float(os.getenv("DB_COMMAND_TIMEOUT", "10"))
+# Background pool: fish food, entitlement sync, stream watch, schema backfills.
+BG_POOL_MIN = int(os.getenv("DB_BG_POOL_MIN", "1"))
+BG_POOL_MAX = int(os.getenv("DB_BG_POOL_MAX", "3"))
+BG_COMMAND_TIMEOUT = float(os.getenv("DB_BG_COMMAND_TIMEOUT", "300"))
+MAX_INACTIVE_LIFETIME = float(os.getenv("DB_MAX_INACTIVE_LIFETIME", "300"))
+STATEMENT_CACHE_SIZE = int(os.getenv("DB_STATEMENT_CACHE_SIZE", "256"))  # 0 behind pgbouncer (transaction mode)
+# Optional read replica for read-only commands (see reader()).
+REPLICA_DSN = os.getenv("DATABASE_REPLICA_URL", "")
+REPLICA_POOL_MAX = int(os.getenv("DB_REPLICA_POOL_MAX", "5"))
+REPLICA_CHECK_SECONDS = float(os.getenv("DB_REPLICA_CHECK_SECONDS", "5"))
+REPLICA_ACQUIRE_TIMEOUT = float(os.getenv("DB_REPLICA_ACQUIRE_TIMEOUT", "1"))
+
+log = logging.getLogger("beenbag.db")
+
 _pool: asyncpg.Pool | None = None
+_bg_pool: asyncpg.Pool | None = None
+_replica_pool: asyncpg.Pool | None = None
+_replica_task: asyncio.Task | None = None
+# refreshed by _watch_replica; lag is None until the first successful check
+replica_state = {"ok": False, "lag": None, "checked_at": 0.0, "error": None}
+READS = metrics.counter("db_reads_total", "Read-only checkouts by where they were served")
+
+class Connection(asyncpg.Connection):
+    """Connection that carries the hot named queries prepared at connect time."""
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.warm = {}  # query name -> PreparedStatement
 
 def _is_local_host(host: str | None) -> bool:
     return bool(host) and (host.lower() in ("localhost", "127.0.0.1") or host.lower().endswith(".local"))
@@ -13,20 +49,198 @@ def _make_require_ctx() -> ssl.SSLContext:
     ctx.verify_mode = ssl.CERT_NONE
     return ctx
 
+async def connect(dsn: str) -> asyncpg.Connection:
+    """A single connection outside the pools (same SSL rules), e.g. to hold a session lock."""
+    host = urlparse(dsn).hostname
+    ssl_ctx = None if _is_local_host(host) else _make_require_ctx()
+    return await asyncpg.connect(dsn, ssl=ssl_ctx, timeout=10,
+                                 server_settings={"application_name": "beenbag-leader"})
+
+async def _init_connection(conn) -> None:
+    if STATEMENT_CACHE_SIZE > 0:
+        await queries.warm_connection(conn)
+
+async def _create(dsn: str, ssl_ctx, *, name: str, min_size: int, max_size: int, timeout: float,
+                  warm: bool = False) -> asyncpg.Pool:
+    return await asyncpg.create_pool(
+        dsn,
+        ssl=ssl_ctx,
+        min_size=min(min_size, max_size),
+        max_size=max_size,
+        command_timeout=timeout,
+        max_inactive_connection_lifetime=MAX_INACTIVE_LIFETIME,
+        statement_cache_size=STATEMENT_CACHE_SIZE,
+        connection_class=Connection,
+        init=_init_connection if warm else None,
+        server_settings={"application_name": f"beenbag-{name}"},  # tells them apart in pg_stat_activity
+    )
+
 async def init_pool(dsn: str) -> asyncpg.Pool:
-    global _pool
+    """Create the interactive and background pools; returns the interactive one."""
+    global _pool, _bg_pool
     host = urlparse(dsn).hostname
     ssl_ctx = None if _is_local_host(host) else _make_require_ctx()
-    _pool = await asyncpg.create_pool(dsn, ssl=ssl_ctx, command_timeout=60)
+    _pool = await _create(dsn, ssl_ctx, name="interactive",
+                          min_size=POOL_MIN, max_size=POOL_MAX, timeout=COMMAND_TIMEOUT, warm=True)
+    if _bg_pool is not None and not _bg_pool.is_closing():
+        await _bg_pool.close()
+    _bg_pool = await _create(dsn, ssl_ctx, name="background",
+                             min_size=BG_POOL_MIN, max_size=BG_POOL_MAX, timeout=BG_COMMAND_TIMEOUT)
+    if REPLICA_DSN:
+        await _init_replica(REPLICA_DSN)
     return _pool
 
+async def rewarm() -> None:
+    """
+    Cogs register their queries after the pool already opened its first
+    connections; recycle those so they come back with the full warm set.
+    """
+    if _pool is not None and STATEMENT_CACHE_SIZE > 0:
+        await _pool.expire_connections()
+
 def get_pool() -> asyncpg.Pool:
     if _pool is None:
         raise RuntimeError("DB pool not initialized yet")
     return _pool
 
+def get_bg_pool() -> asyncpg.Pool:
+    """Pool for background jobs, so they never queue ahead of commands."""
+    return _bg_pool if _bg_pool is not None else get_pool()
+
 async def close_pool():
-    global _pool
+    global _pool, _bg_pool, _replica_pool, _replica_task
+    if _replica_task:
+        _replica_task.cancel()
+        _replica_task = None
+    if _replica_pool:
+        await _replica_pool.close()
+        _replica_pool = None
+    if _bg_pool:
+        await _bg_pool.close()
+        _bg_pool = None
     if _pool:
         await _pool.close()
-        _pool = None
\ No newline at end of file
+        _pool = None
+
+# ---------------- read replica ---------------- #
+# Pointing DATABASE_REPLICA_URL at a second local Postgres (or even the same
+# DSN) exercises the routing; a server that isn't a standby reports lag 0.
+
+REPLICA_LAG_SQL = """
+SELECT CASE
+         WHEN NOT pg_is_in_recovery() THEN 0
+         WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0  -- caught up, just idle
+         ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+       END::float8
+"""
+
+async def _init_replica(dsn: str) -> None:
+    global _replica_pool, _replica_task
+    if _replica_task:
+        _replica_task.cancel()
+    if _replica_pool is not None and not _replica_pool.is_closing():
+        await _replica_pool.close()
+    host = urlparse(dsn).hostname
+    ssl_ctx = None if _is_local_host(host) else _make_require_ctx()
+    try:
+        _replica_pool = await _create(dsn, ssl_ctx, name="replica", min_size=1,
+                                      max_size=REPLICA_POOL_MAX, timeout=COMMAND_TIMEOUT, warm=True)
+    except Exception as e:
+        # reads just stay on the primary; the watcher keeps trying to connect
+        log.warning("Read replica unavailable at startup: %s", e)
+        _replica_pool = None
+    _replica_task = asyncio.get_running_loop().create_task(_watch_replica(dsn, ssl_ctx), name="db-replica-watch")
+
+async def _watch_replica(dsn: str, ssl_ctx) -> None:
+    global _replica_pool
+    while True:
+        try:
+            if _replica_pool is None:
+                _replica_pool = await _create(dsn, ssl_ctx, name="replica", min_size=1,
+                                              max_size=REPLICA_POOL_MAX, timeout=COMMAND_TIMEOUT, warm=True)
+            async with _replica_pool.acquire(timeout=REPLICA_ACQUIRE_TIMEOUT) as con:
+                lag = await con.fetchval(REPLICA_LAG_SQL, timeout=REPLICA_CHECK_SECONDS)
+            if not replica_state["ok"]:
+                log.info("Read replica up (lag %.1fs)", lag)
+            replica_state.update(ok=True, lag=float(lag), error=None)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            if replica_state["ok"]:
+                log.warning("Read replica down, reads go to the primary: %s", e)
+            replica_state.update(ok=False, error=str(e))
+        replica_state["checked_at"] = time.time()
+        await asyncio.sleep(REPLICA_CHECK_SECONDS)
+
+def _replica_failed(e: Exception) -> None:
+    # don't wait for the next check to stop routing here
+    log.warning("Read replica checkout failed, using the primary: %s", e)
+    replica_state.update(ok=False, error=str(e))
+
+class ReadPool:
+    """
+    Pool-shaped router for read-only call sites: the replica while it is up and
+    at most `max_lag` seconds behind, otherwise the primary. Anything that takes
+    a pool (acquire / fetch / fetchrow / fetchval) can be handed one.
+    """
+    def __init__(self, max_lag: float, path: str):
+        self.max_lag = max_lag
+        self.path = path
+
+    def _use_replica(self) -> bool:
+        lag = replica_state["lag"]
+        return (_replica_pool is not None and replica_state["ok"]
+                and lag is not None and lag <= self.max_lag)
+
+    @asynccontextmanager
+    async def acquire(self):
+        pool = _replica_pool
+        if self._use_replica():
+            try:
+                conn = await pool.acquire(timeout=REPLICA_ACQUIRE_TIMEOUT)
+            except (OSError, asyncio.TimeoutError, asyncpg.PostgresConnectionError, asyncpg.InterfaceError) as e:
+                _replica_failed(e)
+            else:
+                READS.inc(target="replica", path=self.path)
+                try:
+                    yield conn
+                finally:
+                    await pool.release(conn)
+                return
+        READS.inc(target="primary", path=self.path)
+        async with get_pool().acquire() as conn:
+            yield conn
+
+    async def fetch(self, query, *args, **kwargs):
+        async with self.acquire() as con:
+            return await con.fetch(query, *args, **kwargs)
+
+    async def fetchrow(self, query, *args, **kwargs):
+        async with self.acquire() as con:
+            return await con.fetchrow(query, *args, **kwargs)
+
+    async def fetchval(self, query, *args, **kwargs):
+        async with self.acquire() as con:
+            return await con.fetchval(query, *args, **kwargs)
+
+def reader(max_lag: float, path: str = "default") -> ReadPool:
+    """Read-only pool for a call site that tolerates `max_lag` seconds of staleness."""
+    return ReadPool(max_lag, path)
+
+def _pool_metrics():
+    conns, maxes = [], []
+    for name, pool in (("interactive", _pool), ("background", _bg_pool), ("replica", _replica_pool)):
+        if pool is None:
+            continue
+        size, idle = pool.get_size(), pool.get_idle_size()
+        conns += [({"pool": name, "state": "in_use"}, size - idle), ({"pool": name, "state": "idle"}, idle)]
+        maxes.append(({"pool": name}, pool.get_max_size()))
+    yield ("db_pool_connections", "gauge", "asyncpg pool connections by state", conns)
+    yield ("db_pool_max_connections", "gauge", "asyncpg pool max size", maxes)
+    if REPLICA_DSN:
+        yield ("db_replica_up", "gauge", "1 while the read replica answers health checks", [({}, int(replica_state["ok"]))])
+        if replica_state["lag"] is not None:
+            yield ("db_replica_lag_seconds", "gauge", "Replay lag of the read replica at the last check",
+                   [({}, replica_state["lag"])])
+
+metrics.register_collector(_pool_metrics)
@@ -0,0 +1,173 @@
+# db/queries.py
+"""
+Named, instrumented queries.
+
+Modules register the SQL they care about once at import time:
+
+    LB_PAGE = queries.register("lb.counters.page", "SELECT ...")
+
+and run it through fetch/fetchrow/fetchval/execute, which record per-query
+latency (profiler histogram "db.query:<name>"), rows returned and errors.
+Statements slower than DB_SLOW_QUERY_SECONDS are logged, and a sample of them
+get their EXPLAIN plan logged too (run on a background-pool connection, never
+ANALYZE, so nothing executes twice).
+
+`acquire(pool, path)` is a drop-in for pool.acquire() that also records how
+long we waited for a connection ("db.acquire:<path>").
+
+register(..., timeout=) sets that query's default statement timeout (instead
+of the pool's command_timeout); warm=True has db.pool prepare it on every new
+connection so the first call on a fresh connection skips the parse/plan.
+"""
+import asyncio
+import logging
+import os
+import random
+import time
+from contextlib import asynccontextmanager
+from typing import Dict, Optional, Set
+
+import asyncpg
+
+from core import metrics, profiler
+
+log = logging.getLogger("beenbag.db")
+
+SLOW_QUERY_SECONDS = float(os.getenv("DB_SLOW_QUERY_SECONDS", "0.25"))
+EXPLAIN_SAMPLE_RATE = float(os.getenv("DB_EXPLAIN_SAMPLE_RATE", "0.1"))
+EXPLAIN_MIN_INTERVAL = float(os.getenv("DB_EXPLAIN_MIN_INTERVAL", "300"))  # per query name (s)
+
+QUERIES: Dict[str, str] = {}
+TIMEOUTS: Dict[str, float] = {}
+WARM: Set[str] = set()
+
+ROWS = metrics.counter("db_rows_total", "Rows returned by named queries")
+ERRORS = metrics.counter("db_query_errors_total", "Named queries that raised")
+SLOW = metrics.counter("db_slow_queries_total", "Named queries slower than DB_SLOW_QUERY_SECONDS")
+
+_last_explain: Dict[str, float] = {}
+_explain_tasks: Set[asyncio.Task] = set()
+
+
+def register(name: str, sql: str, *, timeout: Optional[float] = None, warm: bool = False) -> str:
+    """Register `sql` under `name` and return the name (use it as the handle)."""
+    old = QUERIES.get(name)
+    if old is not None and old != sql:
+        raise ValueError(f"query {name!r} already registered with different SQL")
+    QUERIES[name] = sql
+    if timeout is not None:
+        TIMEOUTS[name] = timeout
+    if warm:
+        WARM.add(name)
+    return name
+
+
+async def warm_connection(conn) -> None:
+    """Pool init hook: prepare the warm set on a fresh connection (db.pool.Connection)."""
+    stmts = getattr(conn, "warm", None)
+    if stmts is None:
+        return
+    for name in sorted(WARM):
+        try:
+            stmts[name] = await conn.prepare(QUERIES[name])
+        except Exception as e:  # e.g. table not created yet on a first deploy
+            log.info("Could not prepare %s: %s", name, e)
+
+
+@asynccontextmanager
+async def acquire(pool, path: str = "default"):
+    """pool.acquire() that records the checkout wait."""
+    start = time.perf_counter()
+    async with pool.acquire() as conn:
+        profiler.observe(f"db.acquire:{path}", time.perf_counter() - start)
+        yield conn
+
+
+# ---------------- slow-query EXPLAIN ---------------- #
+
+def _want_explain(name: str) -> bool:
+    if EXPLAIN_SAMPLE_RATE <= 0 or random.random() >= EXPLAIN_SAMPLE_RATE:
+        return False
+    now = time.monotonic()
+    if now - _last_explain.get(name, -EXPLAIN_MIN_INTERVAL) < EXPLAIN_MIN_INTERVAL:
+        return False
+    _last_explain[name] = now
+    return True
+
+
+async def _explain(name: str, sql: str, args: tuple) -> None:
+    from db.pool import get_bg_pool
+    try:
+        async with get_bg_pool().acquire() as conn:
+            rows = await conn.fetch("EXPLAIN " + sql, *args)
+        log.warning("EXPLAIN %s:\n  %s", name, "\n  ".join(r[0] for r in rows))
+    except Exception as e:
+        log.info("EXPLAIN %s failed: %s", name, e)
+
+
+def _slow(name: str, elapsed: float, args: tuple) -> None:
+    SLOW.inc(query=name)
+    log.warning("Slow query %s took %.3fs", name, elapsed)
+    if _want_explain(name):
+        try:
+            task = asyncio.get_running_loop().create_task(_explain(name, QUERIES[name], args))
+        except RuntimeError:
+            return
+        _explain_tasks.add(task)
+        task.add_done_callback(_explain_tasks.discard)
+
+
+# ---------------- execution ---------------- #
+
+async def _run(method: str, target, name: str, args: tuple, timeout):
+    sql = QUERIES[name]
+    if hasattr(target, "acquire"):  # a pool (or db.pool.ReadPool), not a connection
+        async with acquire(target) as conn:
+            return await _run(method, conn, name, args, timeout)
+    if timeout is None:
+        timeout = TIMEOUTS.get(name)
+    stmts = getattr(target, "warm", None)
+    stmt = stmts.get(name) if stmts and method != "execute" else None
+    start = time.perf_counter()
+    try:
+        if stmt is not None:
+            try:
+                result = await getattr(stmt, method)(*args, timeout=timeout)
+            except asyncpg.exceptions.InvalidCachedStatementError:
+                # the table changed under the prepared plan; fall back to the statement cache
+                stmts.pop(name, None)
+                if target.is_in_transaction():
+                    raise
+                result = await getattr(target, method)(sql, *args, timeout=timeout)
+        else:
+            result = await getattr(target, method)(sql, *args, timeout=timeout)
+    except Exception:
+        ERRORS.inc(query=name)
+        raise
+    finally:
+        elapsed = time.perf_counter() - start
+        profiler.observe(f"db.query:{name}", elapsed)
+        if elapsed >= SLOW_QUERY_SECONDS:
+            _slow(name, elapsed, args)
+    if method == "fetch":
+        ROWS.inc(len(result), query=name)
+    elif method == "fetchrow" and result is not None:
+        ROWS.inc(query=name)
+    return result
+
+
+async def fetch(target, name: str, *args, timeout=None):
+    """target is a pool, a db.pool.reader(), or a connection."""
+    return await _run("fetch", target, name, args, timeout)
+
+
+async def fetchrow(target, name: str, *args, timeout=None):
+    return await _run("fetchrow", target, name, args, timeout)
+
+
+async def fetchval(target, name: str, *args, timeout=None):
+    return await _run("fetchval", target, name, args, timeout)
+
+
+async def execute(target, name: str, *args, timeout=None):
+    return await _run("execute", target, name, args, timeout)
@@ -1,31 +1,96 @@
 # http/server.py
 from aiohttp import web
+import hmac
+import os
 import uuid
 
+import asyncio
+
+from core import metrics, profiler
+from db.pool import get_bg_pool, reader, replica_state
+
+# Gateway may be down this long (login backoff, reconnects) before /healthz reports not-ready
+HEALTHZ_GATEWAY_GRACE = float(os.getenv("HEALTHZ_GATEWAY_GRACE", "600"))
+
+MEDIA_SQL = "SELECT mime, bytes FROM media WHERE id = $1"
+MEDIA_MAX_LAG = 3600.0
+
 async def handle_ping(_):
     return web.Response(text="pong")
 
+def _authorized(request) -> bool:
+    """
+    Debug endpoints need `Authorization: Bearer <ADMIN_TOKEN>`. This server is
+    public (it serves /i/), so with no ADMIN_TOKEN set they are closed.
+    """
+    token = os.getenv("ADMIN_TOKEN")
+    if not token:
+        return False
+    given = request.headers.get("Authorization", "").removeprefix("Bearer ").strip()
+    return hmac.compare_digest(given.encode(), token.encode())
+
+async def handle_perf(request):
+    if not _authorized(request):
+        return web.Response(status=401, text="unauthorized")
+    return web.json_response(profiler.snapshot(request.query.get("prefix", "")))
+
+async def handle_metrics(request):
+    if not _authorized(request):
+        return web.Response(status=401, text="unauthorized")
+    return web.Response(text=metrics.render(), content_type="text/plain", charset="utf-8",
+                        headers={"X-Content-Type-Options": "nosniff"})
+
 def make_app(db_pool):
     app = web.Application()
     app["db_pool"] = db_pool
 
+    async def handle_healthz(_):
+        """Readiness: DB answers and the gateway is up (or only briefly down)."""
+        db = {"ok": False}
+        try:
+            # probe on the background pool: a busy interactive pool is load,
+            # not a reason to pull the bot out of rotation
+            async def _probe():
+                async with get_bg_pool().acquire() as con:
+                    await con.fetchval("SELECT 1")
+            await asyncio.wait_for(_probe(), timeout=3)
+            db["ok"] = True
+        except Exception as e:
+            db["error"] = type(e).__name__
+        pool = app["db_pool"]  # interactive pool saturation, reported as data only
+        db["size"], db["idle"] = pool.get_size(), pool.get_idle_size()
+        db["max"] = pool.get_max_size()
+        db["saturated"] = db["idle"] == 0 and db["size"] >= db["max"]
+
+        gw = metrics.gateway_status()
+        gw["ok"] = gw["ready"] or gw["down_for"] < HEALTHZ_GATEWAY_GRACE
+
+        ok = db["ok"] and gw["ok"]
+        return web.json_response({"ok": ok, "db": db, "gateway": gw}, status=200 if ok else 503)
+
     async def handle_get_image(request):
-        media_id = request.match_info.get("id","").split(".",1)[0]
+        media_id, _, ext = request.match_info.get("id","").partition(".")
         try: uuid.UUID(media_id)
         except Exception: return web.Response(status=404, text="not found")
 
-        row = await app["db_pool"].fetchrow("SELECT mime, bytes FROM media WHERE id = $1", uuid.UUID(media_id))
+        # media rows never change, so any replica will do; a miss may just be a
+        # render the replica hasn't replayed yet (Discord fetches right away)
+        row = await reader(MEDIA_MAX_LAG, "media").fetchrow(MEDIA_SQL, uuid.UUID(media_id))
+        if row is None and replica_state["ok"]:
+            row = await app["db_pool"].fetchrow(MEDIA_SQL, uuid.UUID(media_id))
         if not row:
             return web.Response(status=404, text="not found")
         return web.Response(body=bytes(row["bytes"]), content_type=row["mime"], headers={
             "Cache-Control": "public, max-age=31536000, immutable",
             "ETag": media_id,
-            "Content-Disposition": 'inline; filename="image.png"',
+            "Content-Disposition": f'inline; filename="image.{ext if ext.isalnum() else "png"}"',
         })
 
     app.router.add_get("/", handle_ping)
-    app.router.add_get("/healthz", handle_ping)
+    app.router.add_get("/healthz", handle_healthz)
+    app.router.add_get("/metrics", handle_metrics)
     app.router.add_get("/i/{id}", handle_get_image)
+    app.router.add_get("/debug/perf", handle_perf)
     return app
 
 async def start_http_server(port: int, db_pool):
@@ -0,0 +1,78 @@
+# scripts/bench_rank_card.py
+"""
+Rank card renders per second on one core.
+
+  python scripts/bench_rank_card.py [iterations] [background]
+
+"cold"  clears the font/template caches before each render (what a fresh process pays).
+"warm"  cached templates; only text, pills, bar and avatar are drawn.
+Render runs in one thread, so cards/s here is per core; PNG encode is timed separately.
+"""
+import io
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from PIL import Image, ImageDraw  # noqa: E402
+
+from services import exp_display  # noqa: E402
+
+NAMES = ["Steve", "Alex_the_Great", "xX_Creeper_Xx", "Notch"]
+
+
+def _avatar(transparent: bool = False) -> bytes:
+    im = Image.new("RGBA", (256, 256), (200, 50, 90, 255))
+    if transparent:  # disc on a clear background, like many PNG avatars
+        im = Image.new("RGBA", (256, 256), (0, 0, 0, 0))
+        ImageDraw.Draw(im).ellipse((64, 64, 192, 192), fill=(200, 50, 90, 255))
+    out = io.BytesIO()
+    im.save(out, "PNG")
+    return out.getvalue()
+
+
+def _check_transparent_avatar(bg: str) -> None:
+    """A clear avatar pixel must show the template (background + glow), not black."""
+    png = exp_display._render_rank_card("check", 1, 1, 1, 0, 100, _avatar(transparent=True), bg)
+    card = Image.open(io.BytesIO(png)).convert("RGB")
+    expected = exp_display._template(bg).convert("RGB").getpixel((80, 175))
+    got = card.getpixel((80, 175))  # inside the avatar circle, outside the disc
+    assert got == expected, f"transparent avatar pixel {got} != background {expected}"
+    print("transparent avatar: ok")
+
+
+def _bench(label: str, n: int, bg: str, cold: bool) -> float:
+    avatar = _avatar()
+    exp_display._render_rank_card("warmup", 1, 1, 1, 0, 100, avatar, bg)
+    t0 = time.perf_counter()
+    for i in range(n):
+        if cold:
+            exp_display.clear_template_caches()
+        exp_display._render_rank_card(NAMES[i % len(NAMES)], 123_456 + i, 42, i + 1, 3_000 + i, 5_000, avatar, bg)
+    per = (time.perf_counter() - t0) / n
+    print(f"{label:>5}: {per * 1000:7.2f} ms/card  {1 / per:7.1f} cards/s/core")
+    return per
+
+
+def _encode_share(bg: str) -> None:
+    card = exp_display._template(bg).copy()
+    n = 20
+    t0 = time.perf_counter()
+    for _ in range(n):
+        card.convert("RGB").save(io.BytesIO(), "PNG", compress_level=exp_display.PNG_COMPRESS_LEVEL)
+    print(f"  (of which PNG encode ~{(time.perf_counter() - t0) / n * 1000:.2f} ms)")
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    bg = sys.argv[2] if len(sys.argv) > 2 else "ocean.png"
+    _check_transparent_avatar(bg)
+    cold = _bench("cold", n, bg, cold=True)
+    warm = _bench("warm", n, bg, cold=False)
+    _encode_share(bg)
+    print(f"speedup (warm vs cold): {cold / warm:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+# scripts/bench_room_render.py
+"""
+Per-render timing for room_gen2 on large_room.
+
+  python scripts/bench_room_render.py [iterations]
+
+"cold"  clears every layer cache before each render (what a fresh process pays).
+"warm"  swaps one poster per render, so only sprites/outline are recomposed.
+Compose and PNG encode are timed separately; encode cost doesn't change with caching.
+"""
+import io
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from services import room_gen2  # noqa: E402
+
+ROOM = "large_room"
+WALLS = {"inside": "red_wool", "outline": "quartz"}
+FLOOR = "pink_wool"
+POSTERS = ["trench", "puppet", "clancy", "galaxy", "cat1"]
+
+
+def _compose(poster: str):
+    return room_gen2.compose_base(
+        room_type=ROOM,
+        flooring=FLOOR,
+        walls=WALLS,
+        decorations={"poster1": poster, "furniture2": "red_poppy", "pets": "dog1"},
+    )
+
+
+def _bench(label: str, n: int, cold: bool) -> float:
+    _compose(POSTERS[0])  # warm imports / file handles
+    compose = encode = 0.0
+    for i in range(n):
+        if cold:
+            room_gen2.clear_layer_caches()
+        t0 = time.perf_counter()
+        canvas = _compose(POSTERS[i % len(POSTERS)])
+        t1 = time.perf_counter()
+        canvas.save(io.BytesIO(), format="PNG")
+        t2 = time.perf_counter()
+        compose += t1 - t0
+        encode += t2 - t1
+    compose, encode = compose / n * 1000, encode / n * 1000
+    print(f"{label:>5}: compose {compose:7.2f} ms  encode {encode:7.2f} ms  total {compose + encode:7.2f} ms/render")
+    return compose
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 30
+    cold = _bench("cold", n, cold=True)
+    warm = _bench("warm", n, cold=False)
+    print(f"compose speedup (warm vs cold): {cold / warm:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+# scripts/check_room_golden.py
+"""
+Byte-for-byte golden check for room_gen2 renders.
+
+  python scripts/check_room_golden.py            # compare renders to scripts/golden/rooms/*.png
+  python scripts/check_room_golden.py --update   # rewrite goldens (only after an intended visual change)
+
+Two kinds of reference image:
+  golden/rooms/*.png            regression goldens, captured from the original per-tile
+                                Pillow renderer; the layered engine must reproduce them.
+  golden/rooms/snapshots/*.png  lit rooms. The old renderer never applied lights, so there
+                                is no old output to compare against: these were rendered by
+                                the NumPy lighting code itself and only catch later changes
+                                to it. What checks the lighting maths is the plain-Python
+                                recompute of the tint layer, which must match exactly.
+"""
+import io
+import math
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from PIL import Image  # noqa: E402
+
+from services import room_gen2  # noqa: E402
+
+GOLDEN_DIR = Path(__file__).resolve().parent / "golden" / "rooms"
+SNAPSHOT_DIR = GOLDEN_DIR / "snapshots"
+
+CASES = {
+    "basic_plain": dict(room_type="basic_room", flooring="wood",
+                        walls={"inside": "bricks", "outline": "dark_wood"}, decorations={}),
+    "basic_deco": dict(room_type="basic_room", flooring="quartz",
+                       walls={"inside": "light_wood", "outline": "bricks"},
+                       decorations={"beds": "blue_bed", "poster1": "clancy", "poster2": "galaxy",
+                                    "furniture1": "chest", "pets": "blue_cat", "pet_house": "brown"}),
+    "large_plain": dict(room_type="large_room", flooring="dirt",
+                        walls={"inside": "dirt", "outline": "dirt"}, decorations={}),
+    "large_deco": dict(room_type="large_room", flooring="pink_wool",
+                       walls={"inside": "red_wool", "outline": "quartz"},
+                       decorations={"poster1": "trench", "poster3": "puppet",
+                                    "furniture2": "red_poppy", "pets": "dog1"}),
+    "basic_doors": dict(room_type="basic_room", flooring="wood",
+                        walls={"inside": "wood", "outline": "wood"}, decorations={},
+                        left_door=True, right_door=True),
+}
+
+# New behaviour (lights), rendered by the current code: not regression goldens
+SNAPSHOT_CASES = {
+    "basic_lit": dict(room_type="basic_room", flooring="wood",
+                      walls={"inside": "bricks", "outline": "dark_wood"}, decorations={"poster1": "cat1"},
+                      lights={"bg_torch": ("yellow", 3, None), "window": ("sunset", 1, "#ffc080")}),
+    "large_lit": dict(room_type="large_room", flooring="dark_wood",
+                      walls={"inside": "quartz", "outline": "bricks"}, decorations={},
+                      lights={"bg_torch": ("yellow", 2, "#ff8040"), "window": ("sunset", 2, None)}),
+}
+
+
+def _render(kw) -> bytes:
+    return room_gen2.generate_base(**kw).getvalue()
+
+
+def _lights_key(kw):
+    """Same light list compose_base builds, in the same order."""
+    cfg = room_gen2.ROOM_TYPES[kw["room_type"]]
+    w_tiles, h_tiles = cfg.size_tiles
+    out = []
+    for light_type, raw in cfg.light_spots.items():
+        spec = (kw.get("lights") or {}).get(light_type)
+        if not spec:
+            continue
+        _, level, color_raw = spec
+        for tx, ty in room_gen2._normalize_spots(raw):
+            if 0 <= tx < w_tiles and 0 <= ty < h_tiles:
+                out.append((tx * room_gen2.TILE + room_gen2.TILE // 2,
+                            ty * room_gen2.TILE + room_gen2.TILE // 2,
+                            level, room_gen2._parse_color(color_raw)))
+    return tuple(out)
+
+
+def _reference_tint(room_type: str, lights_key) -> bytes:
+    """Plain-Python version of _lit_tint_layer, one pixel at a time."""
+    cfg = room_gen2.ROOM_TYPES[room_type]
+    w_tiles, h_tiles = cfg.size_tiles
+    tile = room_gen2.TILE
+    W, H = w_tiles * tile, h_tiles * tile + tile // 2
+    th = h_tiles * tile
+    out = bytearray(W * H * 4)
+    for y in range(th):
+        for x in range(W):
+            fields = {}
+            num = [0.0, 0.0, 0.0]
+            den = 0.0
+            for cx, cy, level, color in lights_key:
+                radius_tiles, strength = room_gen2.LIGHT_LEVELS[level]
+                r = int(radius_tiles * tile)
+                dx, dy = x - cx, y - cy
+                if abs(dx) > r or abs(dy) > r:
+                    continue
+                k = min(max(1.0 - math.sqrt(float(dx * dx) + float(dy * dy)) / r, 0.0), 1.0) * strength
+                fields[level] = max(fields.get(level, 0.0), k)
+                den += k
+                if color is not None:
+                    for c in range(3):
+                        num[c] += k * float(color[c])
+            keep = 1.0
+            for level in sorted(fields):
+                keep *= 1.0 - fields[level]
+            i = (y * W + x) * 4
+            for c in range(3):
+                out[i + c] = round(num[c] / den) if den > 0 else 0
+            out[i + 3] = round(room_gen2.INSIDE_TINT_A * keep)
+    return bytes(out)
+
+
+def main():
+    update = "--update" in sys.argv
+    SNAPSHOT_DIR.mkdir(parents=True, exist_ok=True)
+    failed = 0
+    cases = [(n, kw, GOLDEN_DIR, "") for n, kw in CASES.items()]
+    cases += [(n, kw, SNAPSHOT_DIR, " (snapshot)") for n, kw in SNAPSHOT_CASES.items()]
+    for name, kw, folder, label in cases:
+        data = _render(kw)
+        path = folder / f"{name}.png"
+        if update:
+            path.write_bytes(data)
+            print(f"updated  {name}{label}")
+            continue
+        if not path.exists():
+            print(f"MISSING  {name}{label} (run with --update)")
+            failed += 1
+            continue
+        ok = data == path.read_bytes()
+        if not ok:
+            # same pixels with a different encoder build is still a pass
+            ok = Image.open(io.BytesIO(data)).tobytes() == Image.open(path).tobytes()
+        key = _lights_key(kw)
+        if ok and key:
+            lit = room_gen2._lit_tint_layer(kw["room_type"], key).tobytes()
+            ok = lit == _reference_tint(kw["room_type"], key)
+        print(f"{'ok      ' if ok else 'MISMATCH'} {name}{label}")
+        failed += not ok
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
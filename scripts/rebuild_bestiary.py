@@ -0,0 +1,35 @@
+# scripts/rebuild_bestiary.py
+"""
+Recount sacrifice_counts (the bestiary tally) from sacrifice_history.
+
+  DATABASE_URL=... python scripts/rebuild_bestiary.py
+
+barn.ensure_schema backfills automatically the first time the table is created;
+run this if the tally is ever suspected to have drifted. Sacrifices are blocked
+for the duration (one transaction, history locked against writes).
+"""
+import asyncio
+import os
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from db.pool import init_pool, close_pool, get_bg_pool  # noqa: E402
+from services import barn  # noqa: E402
+
+
+async def main() -> None:
+    await init_pool(os.environ["DATABASE_URL"])
+    pool = get_bg_pool()  # long timeout; the rebuild scans all of sacrifice_history
+    try:
+        await barn.ensure_schema(pool)
+        async with pool.acquire() as con, con.transaction():
+            rows = await barn.rebuild_sacrifice_counts(con)
+        print(f"sacrifice_counts rebuilt: {rows} rows")
+    finally:
+        await close_pool()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
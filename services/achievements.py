@@ -4,6 +4,7 @@ import asyncpg
 from discord import Embed, Color, ui, ButtonStyle, Interaction
 from utils import game_helpers
 import discord
+from db import queries
 
 # ---- 2a) Define your achievements here (source of truth) ----
 # key must be stable; you can safely change name/description/exp later.
@@ -344,6 +345,24 @@ async def sync_master(pool: asyncpg.Pool):
                     v.get("hidden", False), v.get("repeatable", False),
                     v.get("category", "General"),
                 )
+        await _load_catalog(con)
+
+# ---- cached achievement catalog (for the menu) ----
+# ACHIEVEMENTS is the source of truth and sync_master writes it at boot, so
+# the table only changes on deploy; reload right after the sync.
+_by_category: Dict[str, List[Dict[str, Any]]] = {}   # category -> rows sorted by name
+_categories: List[str] = []
+
+async def _load_catalog(con) -> None:
+    global _by_category, _categories
+    rows = await con.fetch(
+        "SELECT id, key, name, description, exp, hidden, repeatable, category FROM achievement ORDER BY name"
+    )
+    by_cat: Dict[str, List[Dict[str, Any]]] = {}
+    for r in rows:
+        by_cat.setdefault(r["category"], []).append(dict(r))
+    _by_category = by_cat
+    _categories = _ordered_categories(list(by_cat)) or ["General"]
 
 # --- tiny embed helpers & send utils ---
 def _safe_avatar(user):
@@ -545,25 +564,19 @@ async def try_grant_many(pool: asyncpg.Pool, ctx, user_id: int, keys: Iterable[s
     return total
 
 # ---- listing & UI (per-guild) ---------------------------------------------
-async def _fetch_categories(conn) -> List[str]:
-    rows = await conn.fetch("SELECT DISTINCT category FROM achievement ORDER BY 1")
-    return [r["category"] for r in rows] or ["General"]
-
-async def _fetch_category_rows(con: asyncpg.Connection, category: str, user_id: int, guild_id: int):
-    return await con.fetch(
-        """
-        SELECT a.key, a.name, a.description, a.exp, a.hidden, a.repeatable, a.category,
-               ua.times_awarded, ua.unlocked_at
-          FROM achievement a
-          LEFT JOIN user_achievement ua
-            ON ua.achievement_id = a.id
-           AND ua.user_id = $2
-           AND ua.guild_id = $3
-         WHERE a.category = $1
-         ORDER BY a.name
-        """,
-        category, user_id, guild_id
-    )
+# one PK-prefix lookup per menu; everything else is joined in memory
+USER_UNLOCKS = queries.register("ach.unlocks", """
+    SELECT achievement_id, times_awarded
+      FROM user_achievement
+     WHERE user_id = $1 AND guild_id = $2
+""", timeout=5.0)
+
+def _menu_rows(unlocks: Dict[int, int]) -> Dict[str, List[Dict[str, Any]]]:
+    """The cached catalog with this user's times_awarded (None = locked) filled in."""
+    return {
+        cat: [{**a, "times_awarded": unlocks.get(a["id"])} for a in rows]
+        for cat, rows in _by_category.items()
+    }
 
 def _row_to_line(r) -> str:
     unlocked = r["times_awarded"] is not None
@@ -576,7 +589,7 @@ def _row_to_line(r) -> str:
         return f"• **{r['name']}** — {r['description']} *(+{r['exp']} EXP)*"
 
 def _build_achievements_embed(ctx_or_msg, *, category: str, mode_locked: bool,
-                              rows: List[asyncpg.Record], start: int) -> Embed:
+                              rows: List[Dict[str, Any]], start: int) -> Embed:
     if mode_locked:
         filt = [r for r in rows if r["times_awarded"] is None and not r["hidden"]]
         title = f"🏆 Achievements — {category} — Locked"
@@ -608,17 +621,17 @@ def _build_achievements_embed(ctx_or_msg, *, category: str, mode_locked: bool,
     return e
 
 class AchievementsView(discord.ui.View):
-    def __init__(self, ctx, pool, user_id: int, guild_id: int, initial_category: str, categories: List[str]):
+    def __init__(self, ctx, user_id: int, guild_id: int, initial_category: str, categories: List[str],
+                 rows: Dict[str, List[Dict[str, Any]]]):
         super().__init__(timeout=120)
         self.ctx = ctx
-        self.pool = pool
         self.user_id = user_id
         self.guild_id = guild_id
         self.category = initial_category
         self.categories = categories[:]  # keep our own copy
         self.mode_locked = False
         self.start = 0
-        self.cache: Dict[str, List[asyncpg.Record]] = {}
+        self.rows = rows  # category -> rows; switching/toggling/paging never hits the DB
         self._refresh_select_options()
 
     def _refresh_select_options(self):
@@ -627,17 +640,9 @@ class AchievementsView(discord.ui.View):
             for c in self.categories
         ]
 
-    async def _load(self):
-        async with self.pool.acquire() as con:
-            if self.category not in self.cache:
-                self.cache[self.category] = await _fetch_category_rows(
-                    con, self.category, self.user_id, self.guild_id
-                )
-
     async def _render(self, interaction: Interaction | None = None):
-        await self._load()
         self._refresh_select_options()
-        rows = self.cache.get(self.category, [])
+        rows = self.rows.get(self.category, [])
 
         if self.mode_locked:
             total = len([r for r in rows if r["times_awarded"] is None and not r["hidden"]])
@@ -685,16 +690,18 @@ class AchievementsView(discord.ui.View):
         await self._render(interaction)
 
 # Public opener (per-guild)
-async def open_achievements_menu(pool: asyncpg.Pool, ctx, user_id: int):
-    await ensure_schema(pool)
-    async with pool.acquire() as con:
-        cats = await _fetch_categories(con)
-    cats = _ordered_categories(cats)
-    initial = cats[0] if cats else "General"
-
+async def open_achievements_menu(pool, ctx, user_id: int):
+    # read-only: `pool` may be a replica reader. The schema is ensured in on_ready.
     guild_id = game_helpers.gid_from_ctx(ctx)
     if guild_id is None:
         return await ctx.send("Achievements are only available in servers.")
 
-    view = AchievementsView(ctx, pool, user_id, guild_id, initial, cats)
+    if not _by_category:  # menu opened before on_ready's sync finished
+        async with pool.acquire() as con:
+            await _load_catalog(con)
+    rows = await queries.fetch(pool, USER_UNLOCKS, user_id, guild_id)
+    unlocks = {r["achievement_id"]: r["times_awarded"] for r in rows}
+
+    cats = _categories
+    view = AchievementsView(ctx, user_id, guild_id, cats[0], cats, _menu_rows(unlocks))
     await view._render()
\ No newline at end of file
@@ -1,7 +1,8 @@
 from utils.game_helpers import gid_from_ctx,ensure_player,give_items,get_items,lb_inc
 import discord
-from constants import TIER_ORDER, DROP_TABLES, WHEAT_DROP, AXEWOOD
-from services import achievements
+from constants import DROP_TABLES, WHEAT_DROP, AXEWOOD
+from services import achievements, asset_cdn
+from services.tools import use_best_tool
 import asyncio
 import random
 async def farm(pool, ctx):
@@ -11,42 +12,10 @@ async def farm(pool, ctx):
     async with pool.acquire() as conn:
         await ensure_player(conn,ctx.author.id,guild_id)
 
-        # 1) Fetch all usable pickaxes
-        pickaxes = await conn.fetch(
-            """
-            SELECT tier, uses_left
-              FROM tools
-             WHERE user_id = $1
-               AND guild_id = $2
-               AND tool_name = 'hoe'
-               AND uses_left > 0
-            """,
-            user_id, guild_id
-        )
-        # 2) Determine your highest tier hoe
-        owned_tiers = {r["tier"] for r in pickaxes}
-        best_tier = None
-        for tier in reversed(TIER_ORDER):
-            if tier in owned_tiers:
-                best_tier = tier
-                break
-
-        # 3) Consume 1 use on that hoe
-        if best_tier:
-            await conn.execute(
-                """
-                UPDATE tools
-                SET uses_left = uses_left - 1
-                WHERE user_id = $1
-                AND guild_id = $2
-                AND tool_name = 'hoe'
-                AND tier = $3
-                AND uses_left > 0
-                """,
-                user_id, guild_id, best_tier
-            )
+        # 1) Spend one use on your highest tier hoe (if any)
+        best_tier, _ = await use_best_tool(conn, user_id, guild_id, "hoe")
 
-        # 4) Pick a drop according to your tier’s table
+        # 2) Pick a drop according to your tier’s table
         avg = WHEAT_DROP[best_tier]
         drop = random.randint(avg-1,avg+1)
 
@@ -91,40 +60,12 @@ async def chop(pool, ctx):
     guild_id = gid_from_ctx(ctx)
     async with pool.acquire() as conn:
         await ensure_player(conn,ctx.author.id,guild_id)
-        # 1) Fetch all usable pickaxes
-        axes = await conn.fetch(
-            """
-            SELECT tier, uses_left
-              FROM tools
-             WHERE user_id = $1
-             AND guild_id = $2
-               AND tool_name = 'axe'
-               AND uses_left > 0
-            """,
-            user_id, guild_id
-        )
-        owned_tiers = {r["tier"] for r in axes}
-        best_tier = None
-        for tier in reversed(TIER_ORDER):
-            if tier in owned_tiers:
-                best_tier = tier
-                break
-        
+        # 1) Spend one use on your highest tier axe (if any)
+        best_tier, _ = await use_best_tool(conn, user_id, guild_id, "axe")
+
         num = AXEWOOD[best_tier]
         # grant 1 wood
         await give_items(user_id,"wood",num,"resource",False,conn,guild_id)
-        await conn.execute(
-            """
-            UPDATE tools
-               SET uses_left = uses_left - 1
-             WHERE user_id = $1
-             AND guild_id = $2
-               AND tool_name = 'axe'
-               AND tier = $3
-               AND uses_left > 0
-            """,
-            user_id, guild_id, best_tier
-        )
         # fetch the updated wood count
         wood = await get_items(conn,user_id,"wood",guild_id)
         await lb_inc(conn,"wood_collected",user_id,guild_id,num)
@@ -150,59 +91,18 @@ async def mine(pool, ctx):
     async with pool.acquire() as conn:
         await ensure_player(conn, ctx.author.id, guild_id)
 
-        # 1) Fetch all usable pickaxes
-        pickaxes = await conn.fetch(
-            """
-            SELECT tier, uses_left
-              FROM tools
-             WHERE user_id = $1
-               AND guild_id = $2
-               AND tool_name = 'pickaxe'
-               AND uses_left > 0
-            """,
-            user_id, guild_id
-        )
-
-        if not pickaxes:
+        # 1) Spend one use on your highest tier pickaxe
+        best_tier, uses_after = await use_best_tool(conn, user_id, guild_id, "pickaxe")
+        if best_tier is None:
             ctx.command.reset_cooldown(ctx)
             return await ctx.send(
                 f"❌ You need a pickaxe with at least 1 use to mine! Craft one with `{ctx.clean_prefix}craft pickaxe wood`."
             )
 
-        # 2) Determine your highest tier pickaxe
-        owned_tiers = {r["tier"] for r in pickaxes}
-        best_tier = None
-        for tier in reversed(TIER_ORDER):
-            if tier in owned_tiers:
-                best_tier = tier
-                break
-
-        if best_tier is None:
-            ctx.command.reset_cooldown(ctx)
-            return await ctx.send("❌ You have no usable pickaxe.")
-
-        # Uses before (to handle rare cases where RETURNING isn't available)
-        uses_before = next((r["uses_left"] for r in pickaxes if r["tier"] == best_tier), 0)
-
-        # 3) Consume 1 use on that pickaxe and get remaining uses
-        uses_after = await conn.fetchval(
-            """
-            UPDATE tools
-               SET uses_left = uses_left - 1
-             WHERE user_id = $1
-               AND guild_id = $2
-               AND tool_name = 'pickaxe'
-               AND tier = $3
-               AND uses_left > 0
-         RETURNING uses_left
-            """,
-            user_id, guild_id, best_tier
-        )
-
         # Did it break on this swing?
-        broke = (uses_after == 0) if uses_after is not None else (uses_before == 1)
+        broke = uses_after == 0
 
-        # 4) Pick a drop according to your tier’s table
+        # 2) Pick a drop according to your tier’s table
         table = DROP_TABLES[best_tier]
         ores = list(table.keys())
         weights = [table[ore]["chance"] for ore in ores]
@@ -211,7 +111,7 @@ async def mine(pool, ctx):
         drop_info = table[chosen_ore]
         amount = random.randint(drop_info["min"], drop_info["max"])
 
-        # 5) Grant the drop
+        # 3) Grant the drop
         await give_items(user_id, chosen_ore, amount, "resource", False, conn, guild_id)
 
         # fetch new total
@@ -235,7 +135,7 @@ async def mine(pool, ctx):
     await achievements.try_grant(pool, ctx, user_id, "first_mine")
 
     # Builders ---------------------------------------------------------------
-    def build_result_embed(include_gif: bool = False) -> discord.Embed:
+    def build_result_embed(image_url: str | None = None) -> discord.Embed:
         e = discord.Embed(
             title="⛏️ Mining Result",
             description=f"{ctx.author.mention} mined with a **{best_tier.title()} Pickaxe**!",
@@ -246,9 +146,9 @@ async def mine(pool, ctx):
         e.add_field(name="Total Owned", value=f"**{total} {chosen_ore}**", inline=True)
         if broke:
             e.set_footer(text="Your pickaxe broke!")
-        if include_gif:
-            # keep GIF INSIDE the embed by referring to the attachment
-            e.set_image(url="attachment://mine.gif")
+        if image_url:
+            # keep GIF INSIDE the embed
+            e.set_image(url=image_url)
         return e
 
     # --- Play the GIF animation from assets/mining/<best_pick>/<drop>.gif ---
@@ -265,38 +165,43 @@ async def mine(pool, ctx):
             path = Path("assets/gifs/mining/default/default.gif")
 
     msg = None
+    gif = None
     try:
         if path.exists():
-            # Attach once; reference it in BOTH embeds via attachment://
-            file = discord.File(path, filename="mine.gif")
+            # Hosted once per GIF on /i/ (then just linked); otherwise attached each time
+            gif = await asset_cdn.prepare(pool, asset_cdn.static_key("mine", path), asset_cdn.read_file(path),
+                                          filename="mine.gif", mime="image/gif")
 
             broke_text = " and it broke" if broke else ""
             pre = discord.Embed(
                 description=f"{ctx.author.mention} swings their **{best_tier.title()} Pickaxe**...{broke_text}",
                 color=color
             )
-            pre.set_image(url="attachment://mine.gif")
+            pre.set_image(url=gif.url)
 
-            # Send the initial swing embed WITH the attached GIF
-            msg = await ctx.send(embed=pre, file=file)
+            # Send the initial swing embed (WITH the attached GIF unless it is hosted)
+            if gif.file:
+                msg = await ctx.send(embed=pre, file=gif.file)
+            else:
+                msg = await ctx.send(embed=pre)
 
             # Brief animation pause
             await asyncio.sleep(3.0)
 
-            # Edit to the final RESULT EMBED and KEEP the same attachment
-            # (attachments=msg.attachments preserves the file so the embed can still display it)
-            await msg.edit(embed=build_result_embed(include_gif=True), attachments=msg.attachments)
+            # Edit to the final RESULT EMBED; attachments=msg.attachments keeps
+            # an uploaded GIF so attachment://mine.gif still resolves
+            await msg.edit(embed=build_result_embed(gif.url), attachments=msg.attachments)
         else:
             # No GIF available → just show the result embed without image
-            await ctx.send(embed=build_result_embed(include_gif=False))
+            await ctx.send(embed=build_result_embed())
 
     except Exception:
         # Fallback: still try to show the result embed (with/without GIF if we have it)
         try:
             if msg:
-                await msg.edit(embed=build_result_embed(include_gif=True), attachments=msg.attachments)
+                await msg.edit(embed=build_result_embed(gif.url), attachments=msg.attachments)
             else:
-                await ctx.send(embed=build_result_embed(include_gif=False))
+                await ctx.send(embed=build_result_embed())
         except Exception:
             # Absolute last resort: plain text
             await ctx.send(
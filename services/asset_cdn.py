@@ -0,0 +1,143 @@
+# services/asset_cdn.py
+"""
+Upload-once hosting for static images (mining GIFs, base shop previews, ...).
+
+When PUBLIC_BASE_URL is public (same rule as image_utils.send_embed_with_image)
+the first use stores the asset in `media` and records its /i/ URL; later
+embeds just point at it, so no multipart upload. Otherwise it is attached to
+every message as before: a Discord attachment URL dies with its message, and
+any user can delete the message it was sent on.
+
+Keys carry the file's mtime/size (static_key), so replacing an asset on disk
+gives it a new key and it is uploaded again. /i/ URLs never expire.
+"""
+from __future__ import annotations
+import asyncio
+import io
+import logging
+import os
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, List, Optional
+
+import discord
+
+from core import metrics
+from services.image_utils import is_public_base_url
+from utils.game_helpers import media_url, save_image_bytes
+
+log = logging.getLogger("beenbag.asset_cdn")
+
+SCHEMA_SQL = """
+CREATE TABLE IF NOT EXISTS asset_cdn (
+    key        TEXT PRIMARY KEY,
+    url        TEXT NOT NULL,
+    expires_at TIMESTAMPTZ,          -- unused: only never-expiring /i/ URLs are kept
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+-- attachment URLs recorded by earlier versions can point at deleted messages
+DELETE FROM asset_cdn WHERE expires_at IS NOT NULL;
+"""
+
+UPLOADS = metrics.counter("static_asset_uploads_total", "Static images uploaded by where they went (media or attachment)")
+
+Loader = Callable[[], Awaitable[bytes]]
+
+_urls: Dict[str, str] = {}   # key -> /i/ URL
+_hits = 0
+_misses = 0
+
+
+@dataclass(frozen=True)
+class Hosted:
+    """What to put in the embed: a reusable URL, or an attachment plus its attachment:// URL."""
+    key: str
+    url: str
+    file: Optional[discord.File] = None
+
+    @property
+    def attachments(self) -> List[discord.File]:
+        """For Message.edit(attachments=...): drops the previous image when the URL is hosted."""
+        return [self.file] if self.file else []
+
+
+async def ensure_schema(pool) -> None:
+    async with pool.acquire() as con:
+        await con.execute(SCHEMA_SQL)
+
+
+def static_key(kind: str, path: Path | str, *variant) -> str:
+    """Cache key for a file on disk (plus any variant, e.g. a tint); changes when the file does."""
+    st = os.stat(path)
+    extra = "".join(f":{v}" for v in variant)
+    return f"{kind}:{path}{extra}@{st.st_mtime_ns:x}-{st.st_size:x}"
+
+
+def read_file(path: Path | str) -> Loader:
+    return lambda: asyncio.to_thread(Path(path).read_bytes)
+
+
+async def _store(pool, key: str, url: str) -> None:
+    _urls[key] = url
+    try:
+        await pool.execute("""
+            INSERT INTO asset_cdn (key, url, expires_at, updated_at)
+            VALUES ($1, $2, NULL, NOW())
+            ON CONFLICT (key) DO UPDATE SET url = EXCLUDED.url, expires_at = NULL,
+                                            updated_at = EXCLUDED.updated_at
+        """, key, url)
+    except Exception as e:
+        log.warning("asset_cdn write failed for %s: %s", key, e)
+
+
+async def _lookup(pool, key: str) -> Optional[str]:
+    hit = _urls.get(key)
+    if hit is not None:
+        return hit
+    try:
+        url = await pool.fetchval(
+            "SELECT url FROM asset_cdn WHERE key = $1 AND expires_at IS NULL", key
+        )
+    except Exception as e:
+        log.warning("asset_cdn read failed for %s: %s", key, e)
+        return None
+    if url is not None:
+        _urls[key] = url
+    return url
+
+
+async def prepare(pool, key: str, load: Loader, *, filename: str, mime: str = "image/png") -> Hosted:
+    """
+    Hosted URL for `key` if there is one; otherwise host it now (/i/ mode) or
+    return it as an attachment for this message only.
+    """
+    global _hits, _misses
+    url = await _lookup(pool, key) if is_public_base_url() else None
+    if url is not None:
+        _hits += 1
+        return Hosted(key, url)
+    _misses += 1
+
+    data = await load()
+    if is_public_base_url():
+        try:
+            async with pool.acquire() as conn:
+                media_id = await save_image_bytes(conn, data, mime)
+            url = media_url(media_id, ext=Path(filename).suffix.lstrip(".") or "png")
+            await _store(pool, key, url)
+            UPLOADS.inc(target="media")
+            return Hosted(key, url)
+        except Exception as e:
+            log.warning("asset_cdn media save failed for %s, attaching instead: %s", key, e)
+    UPLOADS.inc(target="attachment")
+    return Hosted(key, f"attachment://{filename}", discord.File(io.BytesIO(data), filename=filename))
+
+
+def _cdn_metrics():
+    yield ("cache_requests_total", "counter", "Cache lookups by result", [
+        ({"cache": "asset_cdn", "result": "hit"}, _hits),
+        ({"cache": "asset_cdn", "result": "miss"}, _misses),
+    ])
+    yield ("cache_entries", "gauge", "Entries held per cache", [({"cache": "asset_cdn"}, len(_urls))])
+
+metrics.register_collector(_cdn_metrics)
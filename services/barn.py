@@ -1,6 +1,6 @@
 import discord
 from constants import MOBS, RARITIES
-from utils.game_helpers import take_items,gid_from_ctx,get_items,resolve_member,sucsac,ensure_player,give_mob
+from utils.game_helpers import take_items,gid_from_ctx,get_items,resolve_member,sucsac,ensure_player
 from services import achievements
 
 
@@ -83,10 +83,9 @@ async def bestiary(pool, ctx, who: str = None):
     async with pool.acquire() as conn:
         rows = await conn.fetch(
             """
-            SELECT mob_name, is_golden, rarity, COUNT(*) AS cnt
-              FROM sacrifice_history
-             WHERE discord_id = $1 AND guild_id = $2
-             GROUP BY is_golden, rarity, mob_name
+            SELECT mob_name, is_golden, rarity, cnt
+              FROM sacrifice_counts
+             WHERE user_id = $1 AND guild_id = $2
              ORDER BY is_golden DESC, rarity ASC, mob_name
             """,
             user_id,guild_id
@@ -137,8 +136,6 @@ async def breed(pool, ctx, mob: str):
     wheat = RARITIES[MOBS[key]["rarity"]]["wheat"]
     guild_id = gid_from_ctx(ctx)
     async with pool.acquire() as conn:
-        await ensure_player_and_barn(conn, user_id,guild_id)
-
         # 2) Check wheat balance
         wheat_have = await get_items(conn, user_id, "wheat",guild_id)
         if wheat_have < wheat:
@@ -160,24 +157,16 @@ async def breed(pool, ctx, mob: str):
                 f"❌ You need at least **2** **{key}** in your barn to breed, but only have **{have}**."
             )
 
-        # 4) Check barn space
-        occupancy = await conn.fetchval(
-            "SELECT COALESCE(SUM(count), 0) FROM barn WHERE user_id = $1 AND guild_id = $2",
-            user_id,guild_id
-        )
-        barn_size = await conn.fetchval(
-            "SELECT barn_size FROM new_players_guild WHERE user_id = $1 AND guild_id = $2",
-            user_id, guild_id
-        )
-        if occupancy >= barn_size:
-            return await ctx.send(
-                f"❌ Your barn is full (**{occupancy}/{barn_size}**). Upgrade it before breeding more mobs!"
-            )
+        # 4) Put the baby in the barn if there's space, then pay the wheat
+        async with conn.transaction():
+            placed, occupancy, barn_size, new_count = await try_add_mobs(conn, user_id, guild_id, key)
+            if not placed:
+                return await ctx.send(
+                    f"❌ Your barn is full (**{occupancy}/{barn_size}**). Upgrade it before breeding more mobs!"
+                )
+            await take_items(user_id, "wheat", wheat, conn,guild_id)
 
         await achievements.try_grant(pool, ctx, user_id, "first_breed")
-        # 5) Deduct wheat and breed
-        await take_items(user_id, "wheat", wheat, conn,guild_id)
-        new_count = await give_mob(conn, user_id, key,guild_id)
 
     # 6) Success
     await ctx.send(
@@ -202,20 +191,6 @@ async def give(pool, ctx, who: str, mob: str):
     g          = ctx.guild.id
 
     async with pool.acquire() as conn:
-        await ensure_player_and_barn(conn, giver_id, g, default_size=5)
-        await ensure_player_and_barn(conn, target_id, g, default_size=5)
-        # Target barn capacity + current fill (per guild)
-        row = await conn.fetchrow(
-            "SELECT barn_size FROM new_players_guild WHERE guild_id=$1 AND user_id=$2",
-            g, target_id
-        )
-        target_size = row["barn_size"] if row else 5
-
-        total_in_barn = await conn.fetchval(
-            "SELECT COALESCE(SUM(count), 0) FROM barn WHERE guild_id=$1 AND user_id=$2",
-            g, target_id
-        )
-
         # Take one mob from giver (prefer non-golden)
         rec = await conn.fetchrow(
             """
@@ -251,22 +226,13 @@ async def give(pool, ctx, who: str, mob: str):
             )
 
         # If recipient has room, transfer it
-        if total_in_barn < target_size:
-            await conn.execute(
-                """
-                INSERT INTO barn (guild_id, user_id, mob_name, is_golden, count)
-                VALUES ($1, $2, $3, $4, 1)
-                ON CONFLICT (guild_id, user_id, mob_name, is_golden)
-                DO UPDATE SET count = barn.count + 1
-                """,
-                g, target_id, mob_name, is_golden
-            )
+        placed, _, _, _ = await try_add_mobs(conn, target_id, g, mob_name, is_golden)
+        if placed:
             if MOBS[mob_name]["rarity"] == 5:
                 await achievements.try_grant(pool, ctx, giver_id, "gift_leg")
             return await ctx.send(
                 f"✅ You gave {'✨ ' if is_golden else ''}**{mob_name}** to {member.mention}!"
             )
-        
 
         # Else, sacrifice it for emeralds to the **giver**
         rarity = MOBS[mob_name]["rarity"]
@@ -293,8 +259,8 @@ async def barn(pool, ctx, who: str = None):
     user_id = member.id
     guild_id = gid_from_ctx(ctx)
 
+    # read-only (pool may be a replica reader); a player with no row yet has the default size
     async with pool.acquire() as conn:
-        await ensure_player_and_barn(conn,user_id,guild_id,5)
         # Fetch barn size FIRST so it's available even if the barn is empty.
         size_row = await conn.fetchrow(
             "SELECT barn_size FROM new_players_guild WHERE user_id = $1 AND guild_id = $2",
@@ -358,6 +324,175 @@ async def barn(pool, ctx, who: str = None):
     add_section(False, "Mobs")
 
     await ctx.send(embed=embed)
+
+# ---------------- barn occupancy ---------------- #
+# new_players_guild.barn_occupancy = SUM(barn.count) for that player, kept in
+# step by a trigger on barn so every writer (catch, breed, sac, give, ...) is covered.
+
+BARN_OCCUPANCY_SQL = """
+CREATE OR REPLACE FUNCTION barn_occupancy_sync() RETURNS trigger AS $$
+BEGIN
+  IF TG_OP = 'UPDATE' AND OLD.user_id = NEW.user_id AND OLD.guild_id = NEW.guild_id THEN
+    IF NEW.count <> OLD.count THEN
+      UPDATE new_players_guild
+         SET barn_occupancy = barn_occupancy + (NEW.count - OLD.count)
+       WHERE user_id = NEW.user_id AND guild_id = NEW.guild_id;
+    END IF;
+    RETURN NULL;
+  END IF;
+  IF TG_OP IN ('UPDATE', 'DELETE') THEN
+    UPDATE new_players_guild
+       SET barn_occupancy = barn_occupancy - OLD.count
+     WHERE user_id = OLD.user_id AND guild_id = OLD.guild_id;
+  END IF;
+  IF TG_OP IN ('INSERT', 'UPDATE') THEN
+    INSERT INTO new_players_guild (user_id, guild_id, barn_size, barn_occupancy)
+    VALUES (NEW.user_id, NEW.guild_id, 5, NEW.count)
+    ON CONFLICT (user_id, guild_id)
+    DO UPDATE SET barn_occupancy = new_players_guild.barn_occupancy + EXCLUDED.barn_occupancy;
+  END IF;
+  RETURN NULL;
+END $$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS barn_occupancy_trg ON barn;
+CREATE TRIGGER barn_occupancy_trg
+  AFTER INSERT OR UPDATE OR DELETE ON barn
+  FOR EACH ROW EXECUTE FUNCTION barn_occupancy_sync();
+"""
+
+# ---------------- bestiary counters ---------------- #
+# sacrifice_counts is a per-(guild, user, mob, golden) tally of sacrifice_history,
+# bumped by a trigger on every history insert so bestiary reads O(#mob types) rows.
+# Deleting/archiving history rows does not touch the tally.
+
+SACRIFICE_COUNTS_SQL = """
+CREATE TABLE IF NOT EXISTS sacrifice_counts (
+  guild_id  BIGINT  NOT NULL,
+  user_id   BIGINT  NOT NULL,
+  mob_name  TEXT    NOT NULL,
+  is_golden BOOLEAN NOT NULL,
+  rarity    INT     NOT NULL,
+  cnt       BIGINT  NOT NULL DEFAULT 0,
+  PRIMARY KEY (guild_id, user_id, mob_name, is_golden)
+);
+
+CREATE OR REPLACE FUNCTION sacrifice_counts_bump() RETURNS trigger AS $$
+BEGIN
+  IF NEW.guild_id IS NOT NULL THEN
+    INSERT INTO sacrifice_counts (guild_id, user_id, mob_name, is_golden, rarity, cnt)
+    VALUES (NEW.guild_id, NEW.discord_id, NEW.mob_name, NEW.is_golden, NEW.rarity, 1)
+    ON CONFLICT (guild_id, user_id, mob_name, is_golden)
+    DO UPDATE SET cnt = sacrifice_counts.cnt + 1, rarity = EXCLUDED.rarity;
+  END IF;
+  RETURN NULL;
+END $$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS sacrifice_counts_trg ON sacrifice_history;
+CREATE TRIGGER sacrifice_counts_trg
+  AFTER INSERT ON sacrifice_history
+  FOR EACH ROW EXECUTE FUNCTION sacrifice_counts_bump();
+"""
+
+async def rebuild_sacrifice_counts(con) -> int:
+    """Recount sacrifice_counts from the raw history. Caller holds a transaction."""
+    await con.execute("LOCK TABLE sacrifice_history IN SHARE ROW EXCLUSIVE MODE")
+    await con.execute("DELETE FROM sacrifice_counts")
+    status = await con.execute("""
+        INSERT INTO sacrifice_counts (guild_id, user_id, mob_name, is_golden, rarity, cnt)
+        SELECT guild_id, discord_id, mob_name, is_golden, MAX(rarity), COUNT(*)
+          FROM sacrifice_history
+         WHERE guild_id IS NOT NULL
+         GROUP BY guild_id, discord_id, mob_name, is_golden
+    """)
+    return int(status.split()[-1])
+
+_schema_ready = False  # per process: on_ready fires again after every full reconnect
+
+async def _schema_installed(pool) -> bool:
+    """Column, tally table and both triggers already there (no locks taken)."""
+    return await pool.fetchval("""
+        SELECT EXISTS (
+                 SELECT 1 FROM information_schema.columns
+                  WHERE table_name = 'new_players_guild' AND column_name = 'barn_occupancy')
+           AND to_regclass('sacrifice_counts') IS NOT NULL
+           AND (SELECT COUNT(*) FROM pg_trigger
+                 WHERE NOT tgisinternal
+                   AND tgname IN ('barn_occupancy_trg', 'sacrifice_counts_trg')) = 2
+    """)
+
+async def ensure_schema(pool):
+    """
+    Add + backfill barn_occupancy and sacrifice_counts and install their triggers.
+    Only locks barn/sacrifice_history when something is missing, so the usual
+    restart or reconnect doesn't stall catches and sacrifices on every cluster.
+    """
+    global _schema_ready
+    if _schema_ready:
+        return
+    if await _schema_installed(pool):
+        _schema_ready = True
+        return
+
+    async with pool.acquire() as con, con.transaction():
+        # hold writers off so the backfill and the trigger see the same barn
+        await con.execute("LOCK TABLE barn IN SHARE ROW EXCLUSIVE MODE")
+        has_col = await con.fetchval("""
+            SELECT EXISTS (
+              SELECT 1 FROM information_schema.columns
+               WHERE table_name = 'new_players_guild' AND column_name = 'barn_occupancy'
+            )
+        """)
+        if not has_col:
+            await con.execute(
+                "ALTER TABLE new_players_guild ADD COLUMN barn_occupancy INT NOT NULL DEFAULT 0"
+            )
+            await con.execute("""
+                INSERT INTO new_players_guild (user_id, guild_id, barn_size, barn_occupancy)
+                SELECT user_id, guild_id, 5, SUM(count)::int
+                  FROM barn
+                 GROUP BY user_id, guild_id
+                ON CONFLICT (user_id, guild_id)
+                DO UPDATE SET barn_occupancy = EXCLUDED.barn_occupancy
+            """)
+        await con.execute(BARN_OCCUPANCY_SQL)
+
+    # bestiary tally: first run backfills from history before the trigger takes over
+    async with pool.acquire() as con, con.transaction():
+        existed = await con.fetchval("SELECT to_regclass('sacrifice_counts') IS NOT NULL")
+        await con.execute("LOCK TABLE sacrifice_history IN SHARE ROW EXCLUSIVE MODE")
+        await con.execute(SACRIFICE_COUNTS_SQL)
+        if not existed:
+            await rebuild_sacrifice_counts(con)
+    _schema_ready = True
+
+async def try_add_mobs(conn, user_id: int, guild_id: int, mob: str, is_golden: bool = False,
+                       n: int = 1, default_size: int = 5):
+    """
+    Put n mobs in the barn if they fit, in one statement.
+    Creates the player's barn row if missing and locks it, so concurrent catches can't overfill.
+    Returns (placed, occupancy_before, barn_size, mob_count_after_or_None).
+    """
+    row = await conn.fetchrow("""
+        WITH p AS (
+            INSERT INTO new_players_guild (user_id, guild_id, barn_size)
+            VALUES ($1, $2, $6)
+            ON CONFLICT (user_id, guild_id)
+            DO UPDATE SET barn_size = new_players_guild.barn_size
+            RETURNING barn_size, barn_occupancy
+        ), ins AS (
+            INSERT INTO barn (user_id, guild_id, mob_name, is_golden, count)
+            SELECT $1, $2, $3, $4, $5 FROM p
+             WHERE p.barn_occupancy + $5 <= p.barn_size
+            ON CONFLICT (guild_id, user_id, mob_name, is_golden)
+            DO UPDATE SET count = barn.count + EXCLUDED.count
+            RETURNING count
+        )
+        SELECT p.barn_size, p.barn_occupancy, (SELECT count FROM ins) AS mob_count
+          FROM p
+    """, user_id, guild_id, mob, is_golden, n, default_size)
+    placed = row["mob_count"] is not None
+    return placed, row["barn_occupancy"], row["barn_size"], row["mob_count"]
+
 async def ensure_player_and_barn(conn, user_id: int, guild_id: int, default_size: int = 5):
     await conn.execute("""
         INSERT INTO new_players_guild (user_id, guild_id, barn_size)
@@ -2,25 +2,9 @@ import discord, io, asyncio, asyncpg
 from discord.ext import commands
 from typing import List, Dict, Any, Tuple
 
-# ===== Helpers to fetch data =====
+from services import catalog
 
-async def _base_fetch_categories(conn) -> List[str]:
-    rows = await conn.fetch("""
-        SELECT DISTINCT category
-          FROM base_shop_items
-         WHERE NOT disabled
-         ORDER BY category
-    """)
-    return [r["category"] for r in rows] or ["General"]
-
-async def _base_fetch_items_for_category(conn, category: str) -> List[asyncpg.Record]:
-    rows = await conn.fetch("""
-        SELECT item_id, name, description, purchase_limit, sort_order
-          FROM base_shop_items
-         WHERE category = $1 AND NOT disabled
-         ORDER BY sort_order, item_id
-    """, category)
-    return rows
+# ===== Helpers to fetch data =====
 
 async def _base_fetch_owned_counts(conn, guild_id: int, user_id: int, item_ids: List[int]) -> Dict[int, int]:
     if not item_ids:
@@ -33,20 +17,6 @@ async def _base_fetch_owned_counts(conn, guild_id: int, user_id: int, item_ids:
     """, guild_id, user_id, item_ids)
     return {r["item_id"]: r["owned"] for r in rows}
 
-async def _base_fetch_costs_bulk(conn, item_ids: List[int]) -> Dict[int, List[Tuple[str,int]]]:
-    if not item_ids:
-        return {}
-    rows = await conn.fetch("""
-        SELECT item_id, currency_item, amount
-          FROM base_shop_item_costs
-         WHERE item_id = ANY($1::bigint[])
-         ORDER BY item_id, currency_item
-    """, item_ids)
-    costs: Dict[int, List[Tuple[str,int]]] = {}
-    for r in rows:
-        costs.setdefault(r["item_id"], []).append((r["currency_item"], r["amount"]))
-    return costs
-
 def _format_cost_list(costs_for_item: List[Tuple[str,int]]) -> str:
     if not costs_for_item:
         return "free"
@@ -57,7 +27,6 @@ def _format_cost_list(costs_for_item: List[Tuple[str,int]]) -> str:
 def _build_category_embed(ctx: commands.Context, category: str,
                           items: List[asyncpg.Record],
                           owned_map: Dict[int,int],
-                          costs_map: Dict[int, List[Tuple[str,int]]],
                           start: int) -> discord.Embed:
     e = discord.Embed(title=f"🏠 Base Shop — {category}", color=discord.Color.blurple())
     if not items:
@@ -72,7 +41,7 @@ def _build_category_embed(ctx: commands.Context, category: str,
         limit   = r["purchase_limit"]
         owned   = owned_map.get(item_id, 0)
         limit_text = "unlimited" if limit is None else f"{limit} / 24h"
-        price_text = _format_cost_list(costs_map.get(item_id, []))
+        price_text = _format_cost_list(r["costs"])
         body = []
         if desc:
             body.append(desc)
@@ -89,18 +58,19 @@ def _build_category_embed(ctx: commands.Context, category: str,
     return e
 
 class BaseShopView(discord.ui.View):
-    def __init__(self, ctx, pool, guild_id, user_id, categories, initial_cat):
+    def __init__(self, ctx, pool, guild_id, user_id, snap: catalog.Catalog, initial_cat):
         super().__init__(timeout=120)
         self.ctx = ctx
         self.pool = pool
         self.guild_id = guild_id
         self.user_id = user_id
+        self.snap = snap  # pinned for the life of the view so pages stay consistent
+        categories = snap.base.pages
         self.categories = categories
         self.category = initial_cat
         self.start = 0
         self.items_cache = {}
         self.owned_cache = {}
-        self.costs_cache = {}
         self.message: discord.Message | None = None
         self._lock = asyncio.Lock()
 
@@ -121,15 +91,14 @@ class BaseShopView(discord.ui.View):
 
 
     async def _load(self):
-        async with self.pool.acquire() as con:
-            if self.category not in self.items_cache:
-                rows = await _base_fetch_items_for_category(con, self.category)
-                self.items_cache[self.category] = rows
-                ids = [r["item_id"] for r in rows]
-                owned = await _base_fetch_owned_counts(con, self.guild_id, self.user_id, ids)
-                costs = await _base_fetch_costs_bulk(con, ids)
-                self.owned_cache[self.category] = owned
-                self.costs_cache[self.category] = costs
+        if self.category not in self.items_cache:
+            items = self.snap.base.page(self.category)
+            self.items_cache[self.category] = items
+            # items and costs come from the catalog; only the owned counts are per-user
+            async with self.pool.acquire() as con:
+                owned = await _base_fetch_owned_counts(con, self.guild_id, self.user_id,
+                                                       [it.item_id for it in items])
+            self.owned_cache[self.category] = owned
 
     async def _render_first(self):
         """Send the initial message and remember it so we can edit later."""
@@ -139,7 +108,6 @@ class BaseShopView(discord.ui.View):
             self.ctx, self.category,
             items,
             self.owned_cache.get(self.category, {}),
-            self.costs_cache.get(self.category, {}),
             self.start
         )
         # send once, store the message
@@ -162,7 +130,6 @@ class BaseShopView(discord.ui.View):
         embed = _build_category_embed(
             self.ctx, self.category, items,
             self.owned_cache.get(self.category, {}),
-            self.costs_cache.get(self.category, {}),
             self.start
         )
 
@@ -198,7 +165,6 @@ class BaseShopView(discord.ui.View):
 async def base_shop_run(pool, ctx: commands.Context):
     guild_id = ctx.guild.id
     user_id = ctx.author.id
-    async with pool.acquire() as con:
-        categories = await _base_fetch_categories(con)
-    view = BaseShopView(ctx, pool, guild_id, user_id, categories, categories[0])
+    snap = await catalog.get(pool)
+    view = BaseShopView(ctx, pool, guild_id, user_id, snap, snap.base.pages[0])
     await view._render_first()
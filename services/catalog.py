@@ -0,0 +1,220 @@
+# services/catalog.py
+"""
+Immutable, versioned snapshot of every shop catalog (main shop, base shop,
+room upgrades): items, costs, pages/categories and a name index.
+
+Loaded once (a handful of queries), then every shop view and purchase reads
+it, so browsing costs no queries. cogs/base reloads it right after
+sync_shops_from_code; the main shop table is edited by hand, so a snapshot
+older than CATALOG_MAX_AGE is reloaded on the next get(). A reload builds a
+whole new Catalog and swaps the module reference, so a reader never sees a
+half-updated one.
+"""
+from __future__ import annotations
+import asyncio
+import logging
+import os
+import time
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Dict, Mapping, Optional, Tuple
+
+from constants import DISABLED_SHOP_ITEMS
+from core import metrics
+
+log = logging.getLogger("beenbag.catalog")
+
+CATALOG_MAX_AGE = float(os.getenv("CATALOG_MAX_AGE", "600"))
+
+DISABLED_SET = frozenset(s.lower() for s in DISABLED_SHOP_ITEMS)
+
+Costs = Tuple[Tuple[str, int], ...]  # ((currency_item, amount), ...) sorted by currency
+
+
+@dataclass(frozen=True)
+class CatalogItem:
+    item_id: int
+    name: str
+    description: str
+    category: str                # page_name for the main shop
+    purchase_limit: Optional[int]
+    sort_order: int
+    disabled: bool
+    costs: Costs
+    room_type: Optional[str] = None  # upgrades only
+
+    def __getitem__(self, key: str):
+        # Record-style access, so the embed builders take these as they took rows
+        return getattr(self, key)
+
+    @property
+    def cost_map(self) -> Dict[str, int]:
+        return dict(self.costs)
+
+
+@dataclass(frozen=True)
+class Section:
+    """One catalog: items by id (incl. disabled), enabled items grouped by page, name index."""
+    by_id: Mapping[int, CatalogItem]
+    pages: Tuple[str, ...]
+    by_page: Mapping[str, Tuple[CatalogItem, ...]]  # lower(page) -> enabled items in display order
+    by_name: Mapping[str, CatalogItem]
+
+    def page(self, name: str) -> Tuple[CatalogItem, ...]:
+        return self.by_page.get(name.lower(), ())
+
+    def lookup(self, raw: str) -> Optional[CatalogItem]:
+        """Item by numeric id or (case/underscore-insensitive) name."""
+        raw = raw.strip()
+        if raw.isdigit():
+            return self.by_id.get(int(raw))
+        return self.by_name.get(_norm(raw))
+
+    def names(self, ids) -> Dict[int, str]:
+        return {i: self.by_id[i].name for i in ids if i in self.by_id}
+
+
+@dataclass(frozen=True)
+class Catalog:
+    version: int
+    loaded_at: float
+    shop: Section
+    base: Section
+    upgrades: Section
+
+
+def _norm(name: str) -> str:
+    return " ".join(name.lower().replace("_", " ").split())
+
+
+def _section(items, *, order, empty_page: Optional[str] = None) -> Section:
+    by_id = {it.item_id: it for it in items}
+    groups: Dict[str, list] = {}
+    display: Dict[str, str] = {}
+    by_name: Dict[str, CatalogItem] = {}
+    for it in sorted(items, key=order):
+        if it.disabled:
+            continue
+        key = it.category.lower()
+        display.setdefault(key, it.category)
+        groups.setdefault(key, []).append(it)
+        by_name.setdefault(it.name.lower(), it)
+        by_name.setdefault(_norm(it.name), it)
+    # disabled items still resolve by name (so buy can say "not available")
+    for it in items:
+        by_name.setdefault(it.name.lower(), it)
+        by_name.setdefault(_norm(it.name), it)
+    pages = tuple(sorted(display.values(), key=str.lower)) or ((empty_page,) if empty_page else ())
+    return Section(
+        by_id=MappingProxyType(by_id),
+        pages=pages,
+        by_page=MappingProxyType({k: tuple(v) for k, v in groups.items()}),
+        by_name=MappingProxyType(by_name),
+    )
+
+
+def _costs_by_id(rows, key: str) -> Dict[int, Costs]:
+    out: Dict[int, list] = {}
+    for r in rows:
+        if r["amount"] and r["amount"] > 0:
+            out.setdefault(r[key], []).append((r["currency_item"], int(r["amount"])))
+    return {k: tuple(sorted(v)) for k, v in out.items()}
+
+
+async def _build(conn, version: int) -> Catalog:
+    shop_rows = await conn.fetch(
+        "SELECT item_id, name, description, page_name, purchase_limit, price_emeralds FROM shop_items"
+    )
+    shop_costs = _costs_by_id(await conn.fetch(
+        "SELECT item_id, currency_item, amount FROM shop_item_costs"
+    ), "item_id")
+    base_rows = await conn.fetch(
+        "SELECT item_id, name, description, category, purchase_limit, disabled, sort_order FROM base_shop_items"
+    )
+    base_costs = _costs_by_id(await conn.fetch(
+        "SELECT item_id, currency_item, amount FROM base_shop_item_costs"
+    ), "item_id")
+    up_rows = await conn.fetch(
+        "SELECT upgrade_id, name, description, room_type, disabled, sort_order FROM upgrades_shop_items"
+    )
+    up_costs = _costs_by_id(await conn.fetch(
+        "SELECT upgrade_id, currency_item, amount FROM upgrades_shop_costs"
+    ), "upgrade_id")
+
+    shop = []
+    for r in shop_rows:
+        costs = shop_costs.get(r["item_id"])
+        if costs is None:
+            # items without cost lines are priced in emeralds on the row itself
+            emer = r["price_emeralds"] or 0
+            costs = (("emeralds", int(emer)),) if emer > 0 else ()
+        shop.append(CatalogItem(
+            item_id=r["item_id"], name=r["name"], description=r["description"] or "",
+            category=r["page_name"] or "General", purchase_limit=r["purchase_limit"],
+            sort_order=0, disabled=(r["name"] or "").lower() in DISABLED_SET, costs=costs,
+        ))
+    base = [CatalogItem(
+        item_id=r["item_id"], name=r["name"], description=r["description"] or "",
+        category=r["category"] or "General", purchase_limit=r["purchase_limit"],
+        sort_order=r["sort_order"] or 0, disabled=bool(r["disabled"]),
+        costs=base_costs.get(r["item_id"], ()),
+    ) for r in base_rows]
+    upgrades = [CatalogItem(
+        item_id=r["upgrade_id"], name=r["name"], description=r["description"] or "",
+        category="upgrades", purchase_limit=None, sort_order=r["sort_order"] or 0,
+        disabled=bool(r["disabled"]), costs=up_costs.get(r["upgrade_id"], ()), room_type=r["room_type"],
+    ) for r in up_rows]
+
+    return Catalog(
+        version=version,
+        loaded_at=time.time(),
+        shop=_section(shop, order=lambda it: it.item_id, empty_page="General"),
+        base=_section(base, order=lambda it: (it.sort_order, it.item_id), empty_page="General"),
+        upgrades=_section(upgrades, order=lambda it: (it.sort_order, it.item_id)),
+    )
+
+
+_current: Optional[Catalog] = None
+_lock = asyncio.Lock()
+_loads = 0
+
+
+def _stale(snap: Optional[Catalog]) -> bool:
+    return snap is None or time.time() - snap.loaded_at > CATALOG_MAX_AGE
+
+
+async def reload(pool, *, only_if_stale: bool = False) -> Catalog:
+    """Build a fresh snapshot and swap it in. Use the primary right after a sync."""
+    global _current, _loads
+    async with _lock:
+        if only_if_stale and not _stale(_current):
+            return _current  # someone else refreshed while we waited
+        version = (_current.version + 1) if _current else 1
+        async with pool.acquire() as conn:
+            snap = await _build(conn, version)
+        _current = snap
+        _loads += 1
+    log.info("Shop catalog v%s loaded: %s shop, %s base, %s upgrades", snap.version,
+             len(snap.shop.by_id), len(snap.base.by_id), len(snap.upgrades.by_id))
+    return snap
+
+
+async def get(pool) -> Catalog:
+    """The current snapshot; loads it first if missing or older than CATALOG_MAX_AGE."""
+    snap = _current
+    if _stale(snap):
+        try:
+            return await reload(pool, only_if_stale=True)
+        except Exception:
+            if snap is None:
+                raise
+            log.exception("Shop catalog refresh failed; serving v%s", snap.version)
+    return snap
+
+
+def _catalog_metrics():
+    snap = _current
+    yield ("catalog_version", "gauge", "Version of the shop catalog snapshot in use", [({}, snap.version if snap else 0)])
+    yield ("catalog_loads_total", "counter", "Shop catalog snapshot loads", [({}, _loads)])
+
+metrics.register_collector(_catalog_metrics)
@@ -1,18 +1,16 @@
 from datetime import datetime, timedelta
 from constants import CRAFT_RECIPES, TIER_ORDER
-from utils.game_helpers import ensure_player, get_items, take_items, give_items, gid_from_ctx
+from utils.game_helpers import ensure_player, apply_items, NotEnoughItems, gid_from_ctx
 from services import achievements,barn
+from services.tools import note_tool_gained
 
 # services/crafting.py
 
 async def craft(ctx, pool, tool: str, tier: str | None):
     """
     Craft a tool. Costs come from CRAFT_RECIPES.
-    Uses get_items() so missing rows -> 0, avoiding None comparisons.
+    Materials are checked and taken with one apply_items() call (all-or-nothing).
     """
-    from utils.game_helpers import gid_from_ctx, ensure_player, get_items, take_items, give_items
-    from services import achievements
-
     user_id = ctx.author.id
     guild_id = gid_from_ctx(ctx)
 
@@ -27,11 +25,13 @@ async def craft(ctx, pool, tool: str, tier: str | None):
         async with pool.acquire() as conn:
             await ensure_player(conn, user_id, guild_id)
             await barn.ensure_player_and_barn(conn, user_id, guild_id)
-            diamonds = await get_items(conn, user_id, "diamond", guild_id)
-            if diamonds < cost:
+            try:
+                await apply_items(conn, guild_id, [
+                    (user_id, "diamond", -cost),
+                    (user_id, "totem", 1, "items", False),
+                ])
+            except NotEnoughItems:
                 return await ctx.send(f"❌ You need {cost} diamonds to craft that.")
-            await give_items(user_id, "totem", 1, "items", False, conn, guild_id)
-            await take_items(user_id, "diamond", cost, conn, guild_id)
         return await ctx.send("🔨 You crafted a **totem**. One extra life in a stronghold!")
 
     if tier is None:
@@ -47,23 +47,20 @@ async def craft(ctx, pool, tool: str, tier: str | None):
         await ensure_player(conn, user_id, guild_id)
         await barn.ensure_player_and_barn(conn, user_id, guild_id)
 
-        # Robust counts (0 if user has none)
-        wood_have = await get_items(conn, user_id, "wood", guild_id)
-        ore_have  = await get_items(conn, user_id, ore_col, guild_id) if ore_col else 0
-
-        # Check affordability
-        need_bits = []
-        if wood_have < wood_cost:
-            need_bits.append(f"**{wood_cost} wood**")
-        if ore_col and ore_have < ore_cost:
-            need_bits.append(f"**{ore_cost} {ore_col}**")
-        if need_bits:
-            return await ctx.send(f"❌ You need {' and '.join(need_bits)} to craft that.")
-
-        # Deduct materials
-        await take_items(user_id, "wood", wood_cost, conn, guild_id)
+        # Deduct materials (all-or-nothing; nothing is taken if either is short)
+        debits = [(user_id, "wood", -wood_cost)]
         if ore_col:
-            await take_items(user_id, ore_col, ore_cost, conn, guild_id)
+            debits.append((user_id, ore_col, -ore_cost))
+        try:
+            await apply_items(conn, guild_id, debits)
+        except NotEnoughItems as e:
+            short = {item for _, item, _, _ in e.shortfalls}
+            need_bits = []
+            if "wood" in short:
+                need_bits.append(f"**{wood_cost} wood**")
+            if ore_col and ore_col in short:
+                need_bits.append(f"**{ore_cost} {ore_col}**")
+            return await ctx.send(f"❌ You need {' and '.join(need_bits)} to craft that.")
 
         # Give/stack the tool
         await conn.execute(
@@ -75,6 +72,7 @@ async def craft(ctx, pool, tool: str, tier: str | None):
             """,
             user_id, guild_id, t, tier.lower(), uses
         )
+    note_tool_gained(guild_id, user_id, t)
 
     # Achievements
     if t == "pickaxe":
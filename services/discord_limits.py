@@ -8,6 +8,8 @@ API_SEMAPHORE = asyncio.Semaphore(4)   # keep this small (2–5)
 import asyncio, random, logging
 from typing import Callable, Awaitable
 
+from core import metrics
+
 async def call_with_gate(
     op_factory: Callable[[], Awaitable],
     *,
@@ -21,6 +23,7 @@ async def call_with_gate(
             return await op_factory()  # create a *new* coroutine each attempt
         except Exception as e:
             # 429 / Cloudflare or transient network issues — backoff + retry
+            metrics.UPSTREAM_ERRORS.inc(upstream="discord", op=op_name, status=getattr(e, "status", type(e).__name__))
             if attempt >= max_attempts:
                 raise
             delay = base_backoff * (2 ** (attempt - 1)) + random.uniform(0, 0.5)
@@ -1,16 +1,22 @@
 # cogs/levels.py
 import io
-from typing import Optional, Tuple
+import asyncio
+from functools import lru_cache
+from typing import Optional
 import os
 import discord
 from discord.ext import commands
 
 from utils.game_helpers import resolve_member, get_level_from_exp, gid_from_ctx, save_image_bytes
 from constants import LEVEL_EXP
+from core import metrics
+from db import queries
+from db.pool import reader
 from services.image_utils import send_embed_with_image  # NEW
+from services import image_cache
 
 try:
-    from PIL import Image, ImageDraw, ImageFilter, ImageFont
+    from PIL import Image, ImageChops, ImageDraw, ImageFilter, ImageFont
     PIL_OK = True
 except Exception:
     PIL_OK = False
@@ -33,195 +39,182 @@ def _progress_tuple(total_exp: int, current_level: int):
     return (into, span, req_next)
 
 
+RANK_MAX_LAG = 10.0  # replica staleness !rank tolerates (s)
+RANK_AND_EXP = queries.register("exp.rank", """
+    WITH ranked AS (
+        SELECT discord_id,
+               guild_id,
+               experience,
+               RANK() OVER (PARTITION BY guild_id ORDER BY experience DESC) AS rk
+        FROM accountinfo
+    )
+    SELECT experience, rk
+      FROM ranked
+     WHERE discord_id = $1 AND guild_id = $2
+""", timeout=5.0, warm=True)
+
+
 async def _fetch_rank_and_exp(conn, guild_id: int, user_id: int):
     """Single query for exp + rank within guild."""
-    row = await conn.fetchrow(
-        """
-        WITH ranked AS (
-            SELECT discord_id,
-                   guild_id,
-                   experience,
-                   RANK() OVER (PARTITION BY guild_id ORDER BY experience DESC) AS rk
-            FROM accountinfo
-        )
-        SELECT experience, rk
-          FROM ranked
-         WHERE discord_id = $1 AND guild_id = $2
-        """,
-        user_id,
-        guild_id,
-    )
+    row = await queries.fetchrow(conn, RANK_AND_EXP, user_id, guild_id)
     if row:
         return int(row["experience"]), int(row["rk"])
     return 0, None
 
 
-def _circle_crop(im: "Image.Image", size: int) -> "Image.Image":
-    im = im.resize((size, size), Image.LANCZOS)
+# ---------- Card Rendering ----------
+# Everything that doesn't depend on the user (background, panel, avatar glow)
+# is baked into one template per background name; a render copies it and
+# draws only the text, pills, progress bar and avatar.
+W, H = 1200, 400
+FONT_PATH = "assets/fonts/PressStart2P-Regular.ttf"
+EXPBG_DIR = os.path.join("assets", "others", "expbg")
+
+AVATAR_SIZE, AVATAR_POS = 240, (55, 55)
+GLOW_SIZE, GLOW_POS = 270, (40, 40)
+PANEL_ALPHA = 28
+PILL_Y, PILL_H = 155, 76
+BAR_X, BAR_Y, BAR_W, BAR_H = 330, 255, 800, 54
+TRACK_ALPHA, FILL_ALPHA, PILL_ALPHA = 48, 220, 48
+# zlib level for the final PNG. Encoding is most of a render on photo
+# backgrounds; 3 is ~2x faster than the default 6 for ~10% more bytes.
+PNG_COMPRESS_LEVEL = 3
+
+
+def _over(target: int, under: int) -> int:
+    """Alpha for white drawn over a baked white layer of alpha `under` to look like `target` alone."""
+    return round((target - under) * 255 / (255 - under))
+
+
+@lru_cache(maxsize=16)
+def _font(size: int) -> "ImageFont.FreeTypeFont":
+    """Real TTF so sizes actually differ; falls back to PIL's bitmap font."""
+    try:
+        return ImageFont.truetype(FONT_PATH, size)
+    except Exception:
+        return ImageFont.load_default()
+
+
+@lru_cache(maxsize=1)
+def _circle_mask(size: int) -> "Image.Image":
     mask = Image.new("L", (size, size), 0)
     ImageDraw.Draw(mask).ellipse((0, 0, size, size), fill=255)
-    out = Image.new("RGBA", (size, size))
-    out.paste(im, (0, 0), mask)
-    return out
-
-
-def _load_font(size: int) -> "ImageFont.FreeTypeFont":
-    """
-    Load a real TTF so sizes actually differ.
-    Drop a font in assets/fonts/ (e.g., Minecraftia.ttf or PressStart2P-Regular.ttf).
-    """
-    candidates = [
-        "assets/fonts/PressStart2P-Regular.ttf",
-    ]
-    for path in candidates:
-        try:
-            return ImageFont.truetype(path, size)
-        except Exception:
-            continue
-    # Last resort (tiny bitmap)
-    return ImageFont.load_default()
+    return mask
 
 
-# ---------- Card Rendering ----------
-def _make_rank_card(
-    member: discord.Member,
-    total_exp: int,
-    level: int,
-    rank: Optional[int],
-    exp_into: int,
-    exp_span: int,
-    background_name=None
-):
-    """
-    Return (rgba_bytes, (W,H)) for the rank card.
-    All UI elements are drawn onto a transparent overlay and then
-    alpha-composited over the background (true overlay behavior).
-    """
-    W, H = 1200, 400
-
-    # 1) Load chosen background if it exists
+@lru_cache(maxsize=1)
+def _glow() -> "Image.Image":
+    glow = Image.new("RGBA", (GLOW_SIZE, GLOW_SIZE), (0, 0, 0, 0))
+    ImageDraw.Draw(glow).ellipse((0, 0, GLOW_SIZE, GLOW_SIZE), fill=(255, 255, 255, 60))
+    return glow.filter(ImageFilter.GaussianBlur(8))
+
+
+@lru_cache(maxsize=32)
+def _template(background_name: Optional[str]) -> "Image.Image":
+    """Background + panel + avatar glow. Cached: callers must copy before drawing."""
     bg = None
     if background_name:
-        path = os.path.join("assets", "others", "expbg", background_name)
+        path = os.path.join(EXPBG_DIR, background_name)
         if os.path.exists(path):
             bg = Image.open(path).convert("RGBA").resize((W, H))
-
-    # 2) Fallback to black if not found
     if bg is None:
         bg = Image.new("RGBA", (W, H), (0, 0, 0, 255))
 
-    # --- Create a transparent overlay to draw UI on ---
     overlay = Image.new("RGBA", (W, H), (0, 0, 0, 0))
     draw = ImageDraw.Draw(overlay)
+    draw.rounded_rectangle((20, 20, W - 20, H - 20), radius=24, fill=(255, 255, 255, PANEL_ALPHA))
+    tpl = Image.alpha_composite(bg, overlay)
+    tpl.alpha_composite(_glow(), GLOW_POS)
+    return tpl
 
-    # Fonts
-    font_big = _load_font(50)    # username
-    font_med = _load_font(40)    # level/rank pill
-    font_prog = _load_font(30)   # progress numbers
-    font_small = _load_font(30)  # total EXP
 
-    # Panel (overlay, semi‑transparent)
-    # Using rounded rect so it looks nicer on photos
-    panel_bounds = (20, 20, W - 20, H - 20)
-    draw.rounded_rectangle(panel_bounds, radius=24, fill=(255, 255, 255, 28))
+@lru_cache(maxsize=512)
+def _pill(text: str) -> "Image.Image":
+    """One "LVL n" / "Rank #n" pill on a transparent tile. Cached: read-only."""
+    font, pad = _font(40), 22
+    probe = ImageDraw.Draw(Image.new("RGBA", (1, 1)))
+    w = int(probe.textlength(text, font=font) + pad * 2)
+    im = Image.new("RGBA", (w + 1, PILL_H + 1), (0, 0, 0, 0))  # bounds are inclusive
+    draw = ImageDraw.Draw(im)
+    draw.rounded_rectangle((0, 0, w, PILL_H), radius=PILL_H // 2,
+                           fill=(255, 255, 255, _over(PILL_ALPHA, PANEL_ALPHA)))
+    draw.text((pad, (PILL_H - font.size) // 2 - 2), text, font=font, fill=(255, 255, 255, 255))
+    return im
 
-    # Username
-    uname = member.display_name
-    draw.text((330, 50), uname, font=font_big, fill=(255, 255, 255, 255))
 
-    # Pills
-    pill_y = 155
-    pill_h = 76
+def clear_template_caches() -> None:
+    """Drop cached fonts/templates/pills (e.g. after adding or replacing a background on disk)."""
+    for fn in (_font, _circle_mask, _glow, _template, _pill):
+        fn.cache_clear()
 
-    def pill(x1: int, text: str) -> int:
-        pad = 22
-        tw = draw.textlength(text, font=font_med)
-        w = int(tw + pad * 2)
-        r = pill_h // 2
-        # pill background on overlay
-        draw.rounded_rectangle(
-            (x1, pill_y, x1 + w, pill_y + pill_h),
-            radius=r,
-            fill=(255, 255, 255, 48),
-        )
-        # pill text
-        draw.text(
-            (x1 + pad, pill_y + (pill_h - font_med.size) // 2 - 2),
-            text,
-            font=font_med,
-            fill=(255, 255, 255, 255),
-        )
-        return x1 + w + 20
-
-    x = 330
-    x = pill(x, f"LVL {level}")
-    if rank is not None:
-        x = pill(x, f"Rank #{rank}")
-
-    # Progress bar (drawn entirely on overlay)
-    bar_x, bar_y, bar_w, bar_h = 330, 255, 800, 54
-    draw.rounded_rectangle(
-        (bar_x, bar_y, bar_x + bar_w, bar_y + bar_h),
-        radius=27,
-        fill=(255, 255, 255, 48),
-    )
 
-    pct = 0.0 if exp_span <= 0 else max(0.0, min(1.0, exp_into / exp_span))
-    fill_w = int(bar_w * pct)
-    if fill_w > 0:
-        draw.rounded_rectangle(
-            (bar_x, bar_y, bar_x + fill_w, bar_y + bar_h),
-            radius=27,
-            fill=(255, 255, 255, 220),
-        )
+def _template_metrics():
+    info = _template.cache_info()
+    yield ("cache_requests_total", "counter", "Cache lookups by result", [
+        ({"cache": "rank_template", "result": "hit"}, info.hits),
+        ({"cache": "rank_template", "result": "miss"}, info.misses),
+    ])
+    yield ("cache_entries", "gauge", "Entries held per cache", [({"cache": "rank_template"}, info.currsize)])
 
-    prog_text = f"{_fmt_int(exp_into)}/{_fmt_int(exp_span)}"
-    tw = draw.textlength(prog_text, font=font_prog)
-    draw.text(
-        (bar_x + bar_w - tw - 16, bar_y + (bar_h - font_prog.size) // 2 - 2),
-        prog_text,
-        font=font_prog,
-        fill=(0, 0, 0, 255),
-    )
+metrics.register_collector(_template_metrics)
 
-    # Total EXP
-    draw.text(
-        (330, 330),
-        f"Total: {_fmt_int(total_exp)} EXP",
-        font=font_small,
-        fill=(240, 240, 245, 255),
-    )
 
-    # --- Composite overlay over background (true overlay, no overwrites) ---
-    composed = Image.alpha_composite(bg, overlay)
+def _render_rank_card(
+    display_name: str,
+    total_exp: int,
+    level: int,
+    rank: Optional[int],
+    exp_into: int,
+    exp_span: int,
+    avatar_bytes: bytes,
+    background_name: Optional[str] = None,
+) -> bytes:
+    """PNG bytes of the rank card. Pure PIL; run it off the event loop."""
+    card = _template(background_name).copy()
+    draw = ImageDraw.Draw(card)
+    font_big, font_small = _font(50), _font(30)
 
-    # Return raw RGBA bytes for later composition with avatar
-    return composed.tobytes(), (W, H)
+    draw.text((330, 50), display_name, font=font_big, fill=(255, 255, 255, 255))
+    draw.text((330, 330), f"Total: {_fmt_int(total_exp)} EXP", font=font_small, fill=(240, 240, 245, 255))
 
+    # Pills and the bar are translucent, so they go on a small overlay that is
+    # composited over the baked panel (drawing them straight onto the card
+    # would overwrite the panel pixels instead of blending with them).
+    ox, oy = 330, PILL_Y
+    overlay = Image.new("RGBA", (W - 20 - ox, BAR_Y + BAR_H + 1 - oy), (0, 0, 0, 0))  # bounds are inclusive
+    odraw = ImageDraw.Draw(overlay)
 
-def _compose_with_avatar(
-    bg_rgba_bytes: bytes, size_wh: Tuple[int, int], avatar_bytes: bytes
-) -> bytes:
-    W, H = size_wh
-    bg = Image.frombytes("RGBA", (W, H), bg_rgba_bytes)
+    def pill(x1: int, text: str) -> int:
+        im = _pill(text)
+        overlay.paste(im, (x1 - ox, 0))  # pills never overlap, so a plain paste is exact
+        return x1 + im.width - 1 + 20  # tile is one px wider than the pill
 
-    # Load + circle-crop the avatar
-    avi = Image.open(io.BytesIO(avatar_bytes)).convert("RGBA")
-    avi = _circle_crop(avi, 240)
+    x = pill(330, f"LVL {level}")
+    if rank is not None:
+        pill(x, f"Rank #{rank}")
 
-    # Circular glow with no square corners (optional; remove for no glow)
-    glow = Image.new("RGBA", (270, 270), (0, 0, 0, 0))
-    gdraw = ImageDraw.Draw(glow)
-    gdraw.ellipse((0, 0, 270, 270), fill=(255, 255, 255, 60))
-    glow = glow.filter(ImageFilter.GaussianBlur(8))
-    bg.alpha_composite(glow, (40, 40))
+    bx, by = BAR_X - ox, BAR_Y - oy
+    odraw.rounded_rectangle((bx, by, bx + BAR_W, by + BAR_H), radius=27,
+                            fill=(255, 255, 255, _over(TRACK_ALPHA, PANEL_ALPHA)))
+    pct = 0.0 if exp_span <= 0 else max(0.0, min(1.0, exp_into / exp_span))
+    fill_w = int(BAR_W * pct)
+    if fill_w > 0:
+        # replaces the track on the overlay; like it, blends over the panel
+        odraw.rounded_rectangle((bx, by, bx + fill_w, by + BAR_H), radius=27,
+                                fill=(255, 255, 255, _over(FILL_ALPHA, PANEL_ALPHA)))
+    prog_text = f"{_fmt_int(exp_into)}/{_fmt_int(exp_span)}"
+    tw = odraw.textlength(prog_text, font=font_small)
+    odraw.text((bx + BAR_W - tw - 16, by + (BAR_H - font_small.size) // 2 - 2), prog_text,
+               font=font_small, fill=(0, 0, 0, 255))
+    card.alpha_composite(overlay, (ox, oy))
 
-    # Paste the avatar using its alpha as a mask (no square)
-    bg.paste(avi, (55, 55), avi)
+    avi = Image.open(io.BytesIO(avatar_bytes)).convert("RGBA").resize((AVATAR_SIZE, AVATAR_SIZE), Image.LANCZOS)
+    # the avatar's own alpha and the circle both mask it (transparent PNG avatars)
+    card.paste(avi, AVATAR_POS, ImageChops.multiply(avi.getchannel("A"), _circle_mask(AVATAR_SIZE)))
 
     out = io.BytesIO()
-    bg.save(out, "PNG")
-    out.seek(0)
+    # the background is opaque, so the alpha channel is dead weight
+    card.convert("RGB").save(out, "PNG", compress_level=PNG_COMPRESS_LEVEL)
     return out.getvalue()
 
 async def _fetch_selected_background(conn, guild_id, user_id):
@@ -241,7 +234,7 @@ async def rank_cmd(pool, ctx, who):
         if member is None:
             return await ctx.send("❌ Member not found.")
 
-    async with pool.acquire() as conn:
+    async with queries.acquire(reader(RANK_MAX_LAG, "rank"), "exp") as conn:
         total_exp, server_rank = await _fetch_rank_and_exp(conn, guild_id, member.id)
         bg_name = await _fetch_selected_background(conn, guild_id, member.id)
     level = get_level_from_exp(total_exp)
@@ -264,17 +257,14 @@ async def rank_cmd(pool, ctx, who):
             em.set_footer(text=f"Server Rank #{server_rank}")
         return await ctx.send(embed=em)
 
-    # Build background + text
-    bg_bytes, size_wh = _make_rank_card(
-        member, total_exp, level, server_rank, into, span, background_name=bg_name
-    )
-
     # Avatar PNG
-    avatar_asset = member.display_avatar.with_size(256).with_format("png")
-    avatar_bytes = await avatar_asset.read()
+    avatar_bytes = await image_cache.fetch_asset(member.display_avatar.with_size(256).with_format("png"))
 
-    # Compose final PNG
-    png_bytes = _compose_with_avatar(bg_bytes, size_wh, avatar_bytes)
+    # Render off the event loop
+    png_bytes = await asyncio.to_thread(
+        _render_rank_card, member.display_name, total_exp, level, server_rank, into, span,
+        avatar_bytes, bg_name,
+    )
 
     # Save to media store for public URL mode
     async with pool.acquire() as conn:
@@ -1,17 +1,24 @@
 import os
 import io
 import random
+import asyncio
+import hashlib
 import discord
+from collections import OrderedDict
+from functools import lru_cache
 from urllib.parse import urlparse
 from PIL import Image, ImageOps
 from datetime import datetime, timedelta
 
-from constants import MINECRAFT_COLORS, FISHTYPES, FISHINGCHANCE, TIER_ORDER
+from constants import MINECRAFT_COLORS, FISHTYPES, FISHINGCHANCE
+from services.tools import use_best_tool
 from utils.game_helpers import (
     ensure_player, save_image_bytes, resolve_member,
     media_url, gid_from_ctx, lb_inc
 )
 from services import achievements
+from core import metrics, profiler
+from db import queries
 
 # ---------------- helpers for local vs public image sending ---------------- #
 
@@ -48,6 +55,207 @@ def tint_image(image: Image.Image, tint: tuple[int, int, int]) -> Image.Image:
     colorized.putalpha(a)
     return colorized
 
+# ---------------- aquarium engine: sprite cache, placement, composite cache ---------------- #
+
+AQUARIUM_BG_PATH = "assets/fish/aquarium.png"
+AQUARIUM_SCALE = 4
+FISH_SIZE = 12
+EDGE_BUFFER = 6
+FISH_BUFFER = 2
+FISH_SPACING = FISH_SIZE + FISH_BUFFER   # two fish closer than this on BOTH axes overlap
+AQUARIUM_CACHE_MAX = 256                 # composites kept (per user + fish set)
+
+@lru_cache(maxsize=64)
+def _load_sprite(path: str) -> Image.Image:
+    # Cached: treat as read-only.
+    return Image.open(path).convert("RGBA")
+
+@lru_cache(maxsize=1024)
+def _fish_sprite(fish_type: str, color1_name: str, color2_name: str, mirrored: bool) -> Image.Image | None:
+    """Tinted base+overlay for one fish look; 12 types x 13^2 colours x 2 fits easily."""
+    color1 = MINECRAFT_COLORS.get(color1_name)
+    color2 = MINECRAFT_COLORS.get(color2_name)
+    if not color1 or not color2:
+        return None
+    base_path = f"assets/fish/{fish_type}/base.png"
+    overlay_path = f"assets/fish/{fish_type}/overlay.png"
+    if not (os.path.exists(base_path) and os.path.exists(overlay_path)):
+        return None
+    img = Image.alpha_composite(
+        tint_image(_load_sprite(base_path), color1),
+        tint_image(_load_sprite(overlay_path), color2),
+    )
+    return ImageOps.mirror(img) if mirrored else img
+
+def _place_fish(n: int, width: int, height: int, rng: random.Random, tries: int = 30) -> list[tuple[int, int]]:
+    """
+    Up to n non-overlapping top-left positions. Dart throwing against a spatial
+    grid with FISH_SPACING-sized cells: a cell holds at most one fish, so each try
+    checks only the 3x3 neighbourhood. If darts keep missing, fall back to a
+    shuffled list of grid-aligned slots so a crowded tank still fills.
+    """
+    x_lo, x_hi = EDGE_BUFFER, width - FISH_SIZE - EDGE_BUFFER
+    y_lo, y_hi = EDGE_BUFFER, height - FISH_SIZE - EDGE_BUFFER
+    if x_hi < x_lo or y_hi < y_lo:
+        return []
+    grid: dict[tuple[int, int], tuple[int, int]] = {}
+
+    def _cell(x: int, y: int) -> tuple[int, int]:
+        return ((x - x_lo) // FISH_SPACING, (y - y_lo) // FISH_SPACING)
+
+    def _free(x: int, y: int) -> bool:
+        cx, cy = _cell(x, y)
+        for gx in (cx - 1, cx, cx + 1):
+            for gy in (cy - 1, cy, cy + 1):
+                p = grid.get((gx, gy))
+                if p and abs(x - p[0]) < FISH_SPACING and abs(y - p[1]) < FISH_SPACING:
+                    return False
+        return True
+
+    slots = [(x, y) for x in range(x_lo, x_hi + 1, FISH_SPACING)
+                    for y in range(y_lo, y_hi + 1, FISH_SPACING)]
+    rng.shuffle(slots)
+
+    placed: list[tuple[int, int]] = []
+    for _ in range(n):
+        pos = None
+        for _ in range(tries):
+            x, y = rng.randint(x_lo, x_hi), rng.randint(y_lo, y_hi)
+            if _free(x, y):
+                pos = (x, y)
+                break
+        while pos is None and slots:
+            x, y = slots.pop()
+            if _free(x, y):
+                pos = (x, y)
+        if pos is None:
+            break  # tank is full
+        grid[_cell(*pos)] = pos
+        placed.append(pos)
+    return placed
+
+def _fish_set_hash(fish_specs: list[list[str]]) -> str:
+    raw = "|".join(",".join(f) for f in fish_specs)
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+def _render_aquarium(fish_specs: list[list[str]], seed: str) -> bytes:
+    """Compose + upscale + PNG-encode. Pure CPU; run it off the event loop."""
+    rng = random.Random(seed)  # same fish set -> same layout
+    aquarium = _load_sprite(AQUARIUM_BG_PATH).copy()
+    width, height = aquarium.size
+
+    sprites = []
+    for color1_name, color2_name, fish_type in fish_specs:
+        sprite = _fish_sprite(fish_type, color1_name, color2_name, rng.random() < 0.5)
+        if sprite is not None:
+            sprites.append(sprite)
+
+    for sprite, (x, y) in zip(sprites, _place_fish(len(sprites), width, height, rng)):
+        aquarium.alpha_composite(sprite, (x, y))
+
+    result = aquarium.resize((width * AQUARIUM_SCALE, height * AQUARIUM_SCALE), resample=Image.NEAREST)
+    buf = io.BytesIO()
+    result.save(buf, format="PNG")
+    return buf.getvalue()
+
+# (guild_id, user_id, fish set hash) -> (png bytes, media_id or None)
+_aquarium_cache: "OrderedDict[tuple[int, int, str], tuple[bytes, str | None]]" = OrderedDict()
+
+_aquarium_stats = {"hits": 0, "misses": 0}
+
+def _aquarium_cache_get(key):
+    hit = _aquarium_cache.get(key)
+    if hit is not None:
+        _aquarium_cache.move_to_end(key)
+        _aquarium_stats["hits"] += 1
+    else:
+        _aquarium_stats["misses"] += 1
+    return hit
+
+def _aquarium_cache_put(key, value) -> None:
+    _aquarium_cache[key] = value
+    _aquarium_cache.move_to_end(key)
+    while len(_aquarium_cache) > AQUARIUM_CACHE_MAX:
+        _aquarium_cache.popitem(last=False)
+
+def _cache_metrics():
+    yield ("cache_requests_total", "counter", "Cache lookups by result", [
+        ({"cache": "aquarium", "result": "hit"}, _aquarium_stats["hits"]),
+        ({"cache": "aquarium", "result": "miss"}, _aquarium_stats["misses"]),
+    ])
+    yield ("cache_entries", "gauge", "Entries held per cache", [({"cache": "aquarium"}, len(_aquarium_cache))])
+
+metrics.register_collector(_cache_metrics)
+
+# ---------------- fish food: per-user diversity summary ---------------- #
+# aquarium_food holds each player's current diversity score (distinct base colours
+# + pattern colours + types over their 30 newest fish from the last day). It is
+# refreshed for one player when they catch a fish and for the affected players when
+# old fish are pruned, so the 30-minute tick is a plain indexed read + upsert.
+
+FISH_FOOD_SCHEMA_SQL = """
+CREATE TABLE IF NOT EXISTS aquarium_food (
+  guild_id   BIGINT NOT NULL,
+  user_id    BIGINT NOT NULL,
+  food       INT NOT NULL DEFAULT 0,
+  updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+  PRIMARY KEY (guild_id, user_id)
+);
+CREATE INDEX IF NOT EXISTS aquarium_owner_time_idx
+  ON aquarium (guild_id, user_id, time_caught DESC);
+"""
+
+REFRESH_FOOD_SQL = """
+INSERT INTO aquarium_food (guild_id, user_id, food, updated_at)
+SELECT u.guild_id, u.user_id, COALESCE(s.food, 0), NOW()
+  FROM unnest($1::bigint[], $2::bigint[]) AS u(guild_id, user_id)
+  LEFT JOIN LATERAL (
+        SELECT COUNT(DISTINCT color1) + COUNT(DISTINCT color2) + COUNT(DISTINCT type) AS food
+          FROM (SELECT color1, color2, type
+                  FROM aquarium a
+                 WHERE a.guild_id = u.guild_id AND a.user_id = u.user_id
+                   AND a.time_caught >= NOW() - INTERVAL '1 day'
+                 ORDER BY a.time_caught DESC
+                 LIMIT 30) recent
+  ) s ON TRUE
+ON CONFLICT (guild_id, user_id)
+DO UPDATE SET food = EXCLUDED.food, updated_at = EXCLUDED.updated_at
+"""
+
+async def ensure_fish_food_schema(pool) -> None:
+    """Create the summary table and backfill it once from the live aquarium."""
+    async with pool.acquire() as con:
+        await con.execute(FISH_FOOD_SCHEMA_SQL)
+        if await con.fetchval("SELECT EXISTS (SELECT 1 FROM aquarium_food)"):
+            return
+        owners = await con.fetch("SELECT DISTINCT guild_id, user_id FROM aquarium")
+        if owners:
+            await refresh_fish_food(con, [(r["guild_id"], r["user_id"]) for r in owners])
+
+REFRESH_FOOD = queries.register("fish_food.refresh", REFRESH_FOOD_SQL)
+PRUNE_FISH = queries.register("fish_food.prune", """
+    DELETE FROM aquarium
+     WHERE time_caught < NOW() - INTERVAL '1 day'
+ RETURNING guild_id, user_id
+""")
+
+async def refresh_fish_food(conn, owners) -> None:
+    """Recompute the diversity score for [(guild_id, user_id), ...] (<=30 fish each)."""
+    owners = list({(int(g), int(u)) for g, u in owners if g is not None})
+    if not owners:
+        return
+    await queries.execute(
+        conn, REFRESH_FOOD,
+        [g for g, _ in owners], [u for _, u in owners],
+    )
+
+async def prune_old_fish(pool) -> int:
+    """Delete fish older than a day (global) and refresh the owners' scores. Background only."""
+    async with queries.acquire(pool, "fish_food") as conn, conn.transaction():
+        rows = await queries.fetch(conn, PRUNE_FISH)
+        await refresh_fish_food(conn, [(r["guild_id"], r["user_id"]) for r in rows])
+    return len(rows)
+
 # ---------------- fishing: generate fish + send embed ---------------- #
 
 async def make_fish(pool, ctx, fish_path: str):
@@ -63,40 +271,14 @@ async def make_fish(pool, ctx, fish_path: str):
         await ensure_player(conn, user_id, guild_id)
         await lb_inc(conn, "fish_caught", user_id, guild_id, 1)
 
-        # fetch rods
-        rods = await conn.fetch(
-            """
-            SELECT tier, uses_left
-            FROM tools
-            WHERE user_id = $1 AND guild_id = $2
-              AND tool_name = 'fishing_rod' AND uses_left > 0
-            """,
-            user_id, guild_id
-        )
-        if not rods:
+        # consume one use on the highest tier rod
+        best_tier, _ = await use_best_tool(conn, user_id, guild_id, "fishing_rod")
+        if not best_tier:
             ctx.command.reset_cooldown(ctx)
             return await ctx.send(
                 f"❌ You need a fishing rod with at least 1 use to fish! Craft one with `{ctx.clean_prefix}craft fishing rod wood`."
             )
 
-        # highest tier rod
-        owned_tiers = {r["tier"] for r in rods}
-        best_tier = next((t for t in reversed(TIER_ORDER) if t in owned_tiers), None)
-        if not best_tier:
-            ctx.command.reset_cooldown(ctx)
-            return await ctx.send("❌ You have no usable fishing rod.")
-
-        # consume use
-        await conn.execute(
-            """
-            UPDATE tools
-            SET uses_left = uses_left - 1
-            WHERE user_id = $1 AND guild_id = $2
-              AND tool_name = 'fishing_rod' AND tier = $3 AND uses_left > 0
-            """,
-            user_id, guild_id, best_tier
-        )
-
         # success check
         chance = random.randint(0, 100)
         if chance > FISHINGCHANCE[best_tier]:
@@ -107,6 +289,7 @@ async def make_fish(pool, ctx, fish_path: str):
                 """,
                 user_id, guild_id, color_names[0], color_names[1], typef
             )
+            await refresh_fish_food(conn, [(guild_id, user_id)])
             await achievements.try_grant(pool, ctx, user_id, "first_fish")
         else:
             return await ctx.send("You caught a sea pickle, yuck! You throw it back into the ocean.")
@@ -114,8 +297,8 @@ async def make_fish(pool, ctx, fish_path: str):
     # compose sprite
     base_path = f"{fish_path}{typef}/base.png"
     overlay_path = f"{fish_path}{typef}/overlay.png"
-    base = Image.open(base_path).convert("RGBA")
-    overlay = Image.open(overlay_path).convert("RGBA")
+    base = _load_sprite(base_path)
+    overlay = _load_sprite(overlay_path)
 
     tinted_base = tint_image(base, color1)
     tinted_overlay = tint_image(overlay, color2)
@@ -143,7 +326,6 @@ async def make_fish(pool, ctx, fish_path: str):
 # ---------------- aquarium: compose grid + send embed ---------------- #
 
 async def generate_aquarium(pool, ctx, who):
-    background_path = "assets/fish/aquarium.png"
     guild_id = gid_from_ctx(ctx)
 
     # resolve member
@@ -156,13 +338,12 @@ async def generate_aquarium(pool, ctx, who):
     user_id = member.id
 
     async with pool.acquire() as conn:
-        # cleanup old fish
-        await conn.execute("DELETE FROM aquarium WHERE time_caught < NOW() - INTERVAL '1 day'")
+        # old fish are pruned by the background task; just ignore any not yet deleted
         rows = await conn.fetch(
             """
             SELECT color1, color2, type
             FROM aquarium
-            WHERE user_id = $1 AND guild_id = $2
+            WHERE user_id = $1 AND guild_id = $2 AND time_caught >= NOW() - INTERVAL '1 day'
             ORDER BY time_caught DESC
             LIMIT 30
             """,
@@ -183,59 +364,22 @@ async def generate_aquarium(pool, ctx, who):
     if food == 38:
         await achievements.try_grant(pool, ctx, user_id, "full_food")
 
-    # compose aquarium image
-    aquarium = Image.open(background_path).convert("RGBA")
-    width, height = aquarium.size
-    fish_size = 12
-    edge_buffer = 6
-    fish_buffer = 2
-    placed_positions = []
-
-    def is_valid_position(x, y):
-        for px, py in placed_positions:
-            if abs(x - px) < fish_size + fish_buffer and abs(y - py) < fish_size + fish_buffer:
-                return False
-        return True
-
-    for color1_name, color2_name, fish_type in fish_specs:
-        color1 = MINECRAFT_COLORS.get(color1_name)
-        color2 = MINECRAFT_COLORS.get(color2_name)
-        if not color1 or not color2:
-            continue
-
-        base_path = f"assets/fish/{fish_type}/base.png"
-        overlay_path = f"assets/fish/{fish_type}/overlay.png"
-        if not (os.path.exists(base_path) and os.path.exists(overlay_path)):
-            continue
-
-        base = Image.open(base_path).convert("RGBA")
-        overlay = Image.open(overlay_path).convert("RGBA")
-        fish_image = Image.alpha_composite(tint_image(base, color1), tint_image(overlay, color2))
-
-        # random mirror
-        if random.choice([True, False]):
-            fish_image = ImageOps.mirror(fish_image)
-
-        # place
-        for _ in range(1000):
-            x = random.randint(edge_buffer, width - fish_size - edge_buffer)
-            y = random.randint(edge_buffer, height - fish_size - edge_buffer)
-            if is_valid_position(x, y):
-                aquarium.alpha_composite(fish_image, (x, y))
-                placed_positions.append((x, y))
-                break
-
-    # upscale for preview
-    result = aquarium.resize((aquarium.width * 4, aquarium.height * 4), resample=Image.NEAREST)
-
-    buf = io.BytesIO()
-    result.save(buf, format="PNG")
-    buf.seek(0)
-    image_bytes = buf.getvalue()
-
-    # save for URL mode
-    async with pool.acquire() as conn:
-        media_id = await save_image_bytes(conn, image_bytes, "image/png")
+    # compose aquarium image (cached per user + exact fish set)
+    fish_hash = _fish_set_hash(fish_specs)
+    cache_key = (guild_id, user_id, fish_hash)
+    cached = _aquarium_cache_get(cache_key)
+    if cached is not None:
+        image_bytes, media_id = cached
+    else:
+        loop = asyncio.get_running_loop()
+        with profiler.timed("render:aquarium", slow=None):
+            image_bytes = await loop.run_in_executor(None, _render_aquarium, fish_specs, fish_hash)
+        media_id = None
+        if _is_public_base_url():
+            # save for URL mode (once per composite)
+            async with pool.acquire() as conn:
+                media_id = await save_image_bytes(conn, image_bytes, "image/png")
+        _aquarium_cache_put(cache_key, (image_bytes, media_id))
 
     embed = discord.Embed(
         title=f"{member.display_name}'s Aquarium",
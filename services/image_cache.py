@@ -0,0 +1,202 @@
+# services/image_cache.py
+"""
+Fetch cache for avatars and other external images used by card renderers.
+
+Keyed by URL. Discord avatar URLs carry the avatar hash, so a new avatar is a
+new key and those entries never go stale; URLs that can change behind the
+same address (crafatar renders) pass a ttl. Two tiers: an in-memory LRU and an
+optional on-disk directory, each bounded by bytes. Concurrent requests for
+the same URL share one download (single-flight); failed loads (None or an
+exception) are not cached.
+"""
+from __future__ import annotations
+import asyncio
+import hashlib
+import logging
+import os
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+
+import discord
+
+from core import metrics
+
+log = logging.getLogger("beenbag.image_cache")
+
+IMAGE_CACHE_MAX_BYTES = int(os.getenv("IMAGE_CACHE_MAX_BYTES", str(32 * 1024 * 1024)))
+IMAGE_CACHE_DIR = os.getenv("IMAGE_CACHE_DIR", "")  # empty -> memory only
+IMAGE_CACHE_DISK_MAX_BYTES = int(os.getenv("IMAGE_CACHE_DISK_MAX_BYTES", str(256 * 1024 * 1024)))
+
+Loader = Callable[[], Awaitable[Optional[bytes]]]
+
+
+class ImageCache:
+    def __init__(self, max_bytes: int = IMAGE_CACHE_MAX_BYTES, disk_dir: str | None = IMAGE_CACHE_DIR,
+                 disk_max_bytes: int = IMAGE_CACHE_DISK_MAX_BYTES):
+        self.max_bytes = max(0, int(max_bytes))
+        self.disk_max_bytes = max(0, int(disk_max_bytes))
+        self.disk_dir: Optional[Path] = Path(disk_dir) if disk_dir else None
+        self._mem: "OrderedDict[str, Tuple[bytes, float]]" = OrderedDict()  # key -> (data, stored_at)
+        self._size = 0
+        self._disk_size = 0
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+        if self.disk_dir is not None:
+            try:
+                self.disk_dir.mkdir(parents=True, exist_ok=True)
+                self._disk_size = sum(p.stat().st_size for p in self.disk_dir.glob("*.img"))
+            except OSError as e:
+                log.warning("Image cache dir %s unusable, memory only: %s", self.disk_dir, e)
+                self.disk_dir = None
+
+    @staticmethod
+    def _key(url: str) -> str:
+        return hashlib.sha1(url.encode("utf-8")).hexdigest()
+
+    # ---- memory tier ----
+    def _mem_get(self, key: str, ttl: Optional[float]) -> Optional[bytes]:
+        item = self._mem.get(key)
+        if item is None:
+            return None
+        data, stored = item
+        if ttl is not None and time.time() - stored > ttl:
+            self._mem.pop(key)
+            self._size -= len(data)
+            return None
+        self._mem.move_to_end(key)
+        return data
+
+    def _mem_put(self, key: str, data: bytes, stored: float) -> None:
+        if len(data) > self.max_bytes:
+            return
+        old = self._mem.pop(key, None)
+        if old is not None:
+            self._size -= len(old[0])
+        self._mem[key] = (data, stored)
+        self._size += len(data)
+        while self._size > self.max_bytes and self._mem:
+            _, (evicted, _) = self._mem.popitem(last=False)
+            self._size -= len(evicted)
+
+    # ---- disk tier (runs in a thread) ----
+    def _disk_read(self, key: str, ttl: Optional[float]) -> Optional[Tuple[bytes, float]]:
+        p = self.disk_dir / f"{key}.img"
+        try:
+            stored = p.stat().st_mtime
+            if ttl is not None and time.time() - stored > ttl:
+                return None
+            return p.read_bytes(), stored
+        except FileNotFoundError:
+            return None
+        except OSError as e:
+            log.warning("Image cache read failed for %s: %s", key, e)
+            return None
+
+    def _disk_write(self, key: str, data: bytes) -> None:
+        p = self.disk_dir / f"{key}.img"
+        tmp = p.with_suffix(".tmp")
+        try:
+            try:
+                prev = p.stat().st_size
+            except FileNotFoundError:
+                prev = 0
+            tmp.write_bytes(data)
+            os.replace(tmp, p)  # atomic so readers never see half a file
+            self._disk_size += len(data) - prev
+        except OSError as e:
+            log.warning("Image cache write failed for %s: %s", key, e)
+            return
+        if self._disk_size > self.disk_max_bytes:
+            self._disk_trim()
+
+    def _disk_trim(self) -> None:
+        """Delete least recently written files until the directory is under 90% of its budget."""
+        try:
+            files = sorted(((f.stat().st_mtime, f.stat().st_size, f) for f in self.disk_dir.glob("*.img")),
+                           key=lambda t: t[0])
+        except OSError as e:
+            log.warning("Image cache trim failed: %s", e)
+            return
+        size = sum(s for _, s, _ in files)
+        target = int(self.disk_max_bytes * 0.9)
+        for _, s, f in files:
+            if size <= target:
+                break
+            try:
+                f.unlink()
+                size -= s
+            except OSError:
+                pass
+        self._disk_size = size
+
+    # ---- public API ----
+    async def get_or_fetch(self, url: str, loader: Loader, *, ttl: Optional[float] = None) -> Optional[bytes]:
+        """Cached bytes for `url`, or await loader() once (shared by concurrent callers) and cache them."""
+        key = self._key(url)
+        data = self._mem_get(key, ttl)
+        if data is not None:
+            self.hits += 1
+            return data
+        fut = self._inflight.get(key)
+        if fut is not None:
+            self.coalesced += 1
+            return await asyncio.shield(fut)
+
+        fut = asyncio.get_running_loop().create_future()
+        self._inflight[key] = fut
+        try:
+            hit = await asyncio.to_thread(self._disk_read, key, ttl) if self.disk_dir is not None else None
+            if hit is not None:
+                self.hits += 1
+                data, stored = hit
+                self._mem_put(key, data, stored)
+            else:
+                self.misses += 1
+                data = await loader()
+                if data:
+                    self._mem_put(key, data, time.time())
+                    if self.disk_dir is not None:
+                        await asyncio.to_thread(self._disk_write, key, data)
+            fut.set_result(data)
+            return data
+        except BaseException as e:
+            fut.set_exception(e)
+            fut.exception()  # waiters re-raise it; don't log "never retrieved" when there are none
+            raise
+        finally:
+            self._inflight.pop(key, None)
+
+    def stats(self) -> Tuple[int, int, int, int, int]:
+        """(entries, bytes, hits, misses, coalesced)"""
+        return len(self._mem), self._size, self.hits, self.misses, self.coalesced
+
+
+image_cache = ImageCache()
+
+
+async def fetch_asset(asset: discord.Asset) -> bytes:
+    """Bytes of a Discord asset (avatar etc.), cached by its URL. Raises like asset.read()."""
+    return await image_cache.get_or_fetch(asset.url, asset.read)
+
+
+async def fetch_assets(assets: Iterable[discord.Asset]) -> List[bytes]:
+    """Several assets concurrently, in order."""
+    return list(await asyncio.gather(*(fetch_asset(a) for a in assets)))
+
+
+def _cache_metrics():
+    entries, size, hits, misses, coalesced = image_cache.stats()
+    yield ("cache_requests_total", "counter", "Cache lookups by result", [
+        ({"cache": "image", "result": "hit"}, hits),
+        ({"cache": "image", "result": "miss"}, misses),
+        ({"cache": "image", "result": "coalesced"}, coalesced),
+    ])
+    yield ("cache_entries", "gauge", "Entries held per cache", [({"cache": "image"}, entries)])
+    yield ("cache_bytes", "gauge", "Bytes held per cache", [({"cache": "image"}, size)])
+
+metrics.register_collector(_cache_metrics)
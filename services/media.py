@@ -0,0 +1,62 @@
+# services/media.py
+"""
+Short-lived rows in `media` (served by /i/). Rows with expires_at set are
+deleted by purge_expired() once they are past it; everything saved through
+save_image_bytes keeps expires_at NULL and lives forever, as before.
+"""
+import logging
+import uuid
+from datetime import datetime
+from typing import List, Optional, Sequence
+
+from core import metrics
+
+log = logging.getLogger("beenbag.media")
+
+PURGE_CHUNK = 2000
+
+PURGED = metrics.counter("media_purged_total", "Expired media rows deleted")
+
+MEDIA_SCHEMA_SQL = """
+ALTER TABLE media ADD COLUMN IF NOT EXISTS expires_at TIMESTAMPTZ;
+CREATE INDEX IF NOT EXISTS media_expires_at_idx ON media (expires_at) WHERE expires_at IS NOT NULL;
+"""
+
+
+async def ensure_schema(pool) -> None:
+    async with pool.acquire() as con:
+        await con.execute(MEDIA_SCHEMA_SQL)
+
+
+async def save_many(pool, blobs: Sequence[bytes], mime: str,
+                    expires_at: Sequence[Optional[datetime]]) -> List[str]:
+    """Store several images in one round trip (expires_at per image, None = keep); ids in order."""
+    ids = [uuid.uuid4() for _ in blobs]
+    await pool.execute("""
+        INSERT INTO media (id, mime, bytes, expires_at)
+        SELECT id, $3, b, e FROM unnest($1::uuid[], $2::bytea[], $4::timestamptz[]) AS t(id, b, e)
+    """, ids, list(blobs), mime, list(expires_at))
+    return [str(i) for i in ids]
+
+
+async def keep(pool, media_id: str) -> None:
+    """Make a short-lived row permanent (e.g. it ended up as a message's final image)."""
+    await pool.execute("UPDATE media SET expires_at = NULL WHERE id = $1", uuid.UUID(media_id))
+
+
+async def purge_expired(pool, chunk: int = PURGE_CHUNK) -> int:
+    """Delete expired rows, one short statement per chunk."""
+    total = 0
+    while True:
+        status = await pool.execute("""
+            DELETE FROM media WHERE ctid = ANY(ARRAY(
+                SELECT ctid FROM media WHERE expires_at < NOW() LIMIT $1))
+        """, chunk)
+        n = int(status.split()[-1])
+        total += n
+        if n < chunk:
+            break
+    if total:
+        PURGED.inc(total)
+        log.info("Purged %s expired media rows", total)
+    return total
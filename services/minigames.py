@@ -2,7 +2,7 @@ import discord
 from discord.ext import commands
 import random, asyncio
 from constants import *
-from utils.game_helpers import gid_from_ctx,take_items,get_items
+from utils.game_helpers import gid_from_ctx,take_items,get_items_many,apply_items
 DEATH_MESSAGES = [
     "💀 You ran into lava. You lost all your loot!",
     "☠️ You fell down a hole. You lost all your loot!",
@@ -103,9 +103,7 @@ class PathButtons(discord.ui.View):
                 summary = "\n".join(f"{v}× {k}" for k, v in self.collected.items()) or "None"
 
                 # 💾 Give collected items
-                async with self.db_pool.acquire() as conn:
-                    for item, amt in self.collected.items():
-                        await give_items(self.player_id, item, amt, item, True, conn,self.guild_id)
+                await self.give_loot()
 
                 await interaction.response.edit_message(
                     content=f"🎉 You've conquered all 25 levels of the stronghold!\n\n**Final Loot:**\n{summary}",
@@ -131,8 +129,11 @@ class PathButtons(discord.ui.View):
                 child.disabled = True
     async def give_loot(self):
         async with self.db_pool.acquire() as conn:
+            changes = []
             for item, amount in self.collected.items():
-                await give_items(self.player_id, item, amount, ITEMS[item]["category"], ITEMS[item]["useable"], conn,self.guild_id)
+                meta = ITEMS.get(item, {"category": "resource", "useable": False})
+                changes.append((self.player_id, item, amount, meta["category"], meta["useable"]))
+            await apply_items(conn, self.guild_id, changes)
 
     @discord.ui.button(label="Path 1", style=discord.ButtonStyle.primary)
     async def path1(self, interaction: discord.Interaction, button: discord.ui.Button):
@@ -160,20 +161,11 @@ class PathButtons(discord.ui.View):
         )
         await self.give_loot()
 
-# make sure give_items is implemented:
-async def give_items(user_id, item_name, amount, category, useable, conn, guild_id):
-    await conn.execute("""
-        INSERT INTO player_items (player_id, guild_id, item_name, quantity, category, useable)
-        VALUES ($1, $2, $3, $4, $5, $6)
-        ON CONFLICT (player_id, guild_id, item_name)
-        DO UPDATE SET quantity = player_items.quantity + EXCLUDED.quantity
-    """, user_id, guild_id, item_name, amount, category, useable)
-
 async def c_stronghold(pool, ctx):
     guild_id = gid_from_ctx(ctx)
     async with pool.acquire() as conn:
-        cobble = await get_items(conn, ctx.author.id, "cobblestone",guild_id)
-        totems = await get_items(conn, ctx.author.id, "totem",guild_id)
+        have = await get_items_many(conn, ctx.author.id, ["cobblestone", "totem"], guild_id)
+        cobble, totems = have["cobblestone"], have["totem"]
         if cobble < 6:
             return await ctx.send(f"❌ You need 6 cobblestone to enter")
         await take_items(ctx.author.id, "cobblestone", 6, conn,guild_id)
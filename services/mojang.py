@@ -0,0 +1,280 @@
+# services/mojang.py
+"""
+Mojang profile resolution: name -> uuid and uuid -> skin/cape textures.
+
+Both are cached in memory with a TTL and persisted in two small tables so a
+restart doesn't re-ask Mojang for every popular name. Unknown names are
+cached too (for MISSING_TTL) so typos can't burn our rate limit. Concurrent
+lookups of the same key share one request, and names that miss at the same
+time are resolved together with Mojang's bulk endpoint (up to BULK_MAX per
+call).
+
+HTTP errors (429s included) propagate and are never cached.
+"""
+from __future__ import annotations
+import asyncio
+import base64
+import json
+import logging
+import time
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+import aiohttp
+
+from core import metrics
+
+log = logging.getLogger("beenbag.mojang")
+
+MOJANG_USERNAME_URL = "https://api.mojang.com/users/profiles/minecraft/{username}"
+MOJANG_BULK_URL = "https://api.minecraftservices.com/minecraft/profile/lookup/bulk/byname"
+MOJANG_SESSION_URL = "https://sessionserver.mojang.com/session/minecraft/profile/{uuid}"
+
+NAME_TTL = 6 * 3600      # names can be changed (and freed) on Mojang's side
+MISSING_TTL = 600        # unknown names
+TEXTURES_TTL = 1800      # skins/capes
+BULK_MAX = 10            # Mojang's limit per bulk call
+BULK_WINDOW = 0.05       # seconds to gather names before a lookup goes out
+CACHE_MAX = 5000         # entries per in-memory map
+
+SCHEMA_SQL = """
+CREATE TABLE IF NOT EXISTS mojang_names (
+    name_lower TEXT PRIMARY KEY,
+    uuid       TEXT,                 -- NULL = no such account
+    fetched_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+CREATE TABLE IF NOT EXISTS mojang_textures (
+    uuid       TEXT PRIMARY KEY,
+    name       TEXT,
+    skin_url   TEXT,
+    cape_url   TEXT,
+    slim       BOOLEAN NOT NULL DEFAULT FALSE,
+    fetched_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+"""
+
+LOOKUPS = metrics.counter("mojang_lookups_total", "Mojang profile lookups by kind and where they were answered")
+
+_names: Dict[str, Tuple[Optional[str], float]] = {}   # lower(name) -> (uuid or None, expires_at)
+_textures: Dict[str, Tuple[Dict, float]] = {}         # uuid -> (textures, expires_at)
+_inflight: Dict[Tuple[str, str], asyncio.Future] = {}
+_queued: Dict[str, asyncio.Future] = {}                # names waiting for the next (bulk) call
+_flush_handle: Optional[asyncio.TimerHandle] = None
+_session: Optional[aiohttp.ClientSession] = None
+
+
+def _remember(cache: Dict, key: str, value, expires: float) -> None:
+    cache.pop(key, None)
+    cache[key] = (value, expires)
+    if len(cache) > CACHE_MAX:
+        now = time.time()
+        for k in [k for k, (_, exp) in cache.items() if exp <= now]:
+            del cache[k]
+        while len(cache) > CACHE_MAX:
+            del cache[next(iter(cache))]  # oldest insert
+
+
+async def ensure_schema(pool) -> None:
+    async with pool.acquire() as con:
+        await con.execute(SCHEMA_SQL)
+
+
+def _http() -> aiohttp.ClientSession:
+    global _session
+    if _session is None or _session.closed:
+        _session = aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=5))
+    return _session
+
+
+async def close() -> None:
+    if _session is not None and not _session.closed:
+        await _session.close()
+
+
+async def _single_flight(key: Tuple[str, str], load: Callable[[], Awaitable]):
+    fut = _inflight.get(key)
+    if fut is not None:
+        LOOKUPS.inc(kind=key[0], source="coalesced")
+        return await asyncio.shield(fut)
+    fut = asyncio.get_running_loop().create_future()
+    _inflight[key] = fut
+    try:
+        result = await load()
+        fut.set_result(result)
+        return result
+    except BaseException as e:
+        fut.set_exception(e)
+        fut.exception()  # waiters re-raise it
+        raise
+    finally:
+        _inflight.pop(key, None)
+
+
+# ---------------- HTTP ---------------- #
+
+async def _fetch_uuid(name: str) -> Optional[str]:
+    async with _http().get(MOJANG_USERNAME_URL.format(username=name)) as r:
+        if r.status in (204, 404):
+            return None
+        r.raise_for_status()
+        data = await r.json()
+        return data.get("id")
+
+
+async def _fetch_uuids_bulk(names: List[str]) -> Dict[str, str]:
+    async with _http().post(MOJANG_BULK_URL, json=names) as r:
+        r.raise_for_status()
+        data = await r.json()
+    return {p["name"].lower(): p["id"] for p in data if p.get("id") and p.get("name")}
+
+
+async def _fetch_textures(uuid_nodash: str) -> Dict:
+    async with _http().get(MOJANG_SESSION_URL.format(uuid=uuid_nodash)) as r:
+        r.raise_for_status()
+        prof = await r.json()
+
+    props = prof.get("properties", [])
+    textures_b64 = next((p["value"] for p in props if p.get("name") == "textures"), None)
+    out = {"name": prof.get("name"), "skin_url": None, "cape_url": None, "slim": False}
+    if textures_b64:
+        tex = json.loads(base64.b64decode(textures_b64).decode("utf-8")).get("textures", {})
+        skin_obj, cape_obj = tex.get("SKIN"), tex.get("CAPE")
+        if skin_obj:
+            out["skin_url"] = skin_obj.get("url")
+            out["slim"] = skin_obj.get("metadata", {}).get("model") == "slim"
+        if cape_obj:
+            out["cape_url"] = cape_obj.get("url")
+    return out
+
+
+# ---------------- name -> uuid (batched) ---------------- #
+
+def _schedule_flush(delay: float) -> None:
+    global _flush_handle
+    if _flush_handle is None:
+        _flush_handle = asyncio.get_running_loop().call_later(
+            delay, lambda: asyncio.ensure_future(_flush())
+        )
+
+
+async def _flush() -> None:
+    global _flush_handle
+    _flush_handle = None
+    batch = list(_queued)[:BULK_MAX]
+    futs = {n: _queued.pop(n) for n in batch}
+    if _queued:
+        _schedule_flush(0)
+    if not batch:
+        return
+    try:
+        if len(batch) == 1:
+            found = {batch[0]: await _fetch_uuid(batch[0])}
+        else:
+            found = await _fetch_uuids_bulk(batch)
+            LOOKUPS.inc(len(batch), kind="name", source="bulk")
+    except Exception as e:
+        for f in futs.values():
+            if not f.done():
+                f.set_exception(e)
+        return
+    for n, f in futs.items():
+        if not f.done():
+            f.set_result(found.get(n))
+
+
+def _enqueue(name_lower: str) -> asyncio.Future:
+    fut = _queued.get(name_lower)
+    if fut is None:
+        fut = _queued[name_lower] = asyncio.get_running_loop().create_future()
+    _schedule_flush(0 if len(_queued) >= BULK_MAX else BULK_WINDOW)
+    return fut
+
+
+async def _load_uuid(pool, key: str) -> Optional[str]:
+    try:
+        row = await pool.fetchrow("""
+            SELECT uuid, EXTRACT(EPOCH FROM fetched_at)::float8 AS at FROM mojang_names WHERE name_lower = $1
+        """, key)
+    except Exception as e:
+        log.warning("mojang_names read failed: %s", e)
+        row = None
+    if row is not None:
+        expires = row["at"] + (NAME_TTL if row["uuid"] else MISSING_TTL)
+        if expires > time.time():
+            LOOKUPS.inc(kind="name", source="db")
+            _remember(_names, key, row["uuid"], expires)
+            return row["uuid"]
+
+    LOOKUPS.inc(kind="name", source="mojang")
+    uuid = await _enqueue(key)
+    _remember(_names, key, uuid, time.time() + (NAME_TTL if uuid else MISSING_TTL))
+    try:
+        await pool.execute("""
+            INSERT INTO mojang_names (name_lower, uuid, fetched_at) VALUES ($1, $2, NOW())
+            ON CONFLICT (name_lower) DO UPDATE SET uuid = EXCLUDED.uuid, fetched_at = EXCLUDED.fetched_at
+        """, key, uuid)
+    except Exception as e:
+        log.warning("mojang_names write failed: %s", e)
+    return uuid
+
+
+async def resolve_uuid(pool, name: str) -> Optional[str]:
+    """Undashed uuid for a Java username, or None if there is no such account."""
+    key = name.strip().lower()
+    hit = _names.get(key)
+    if hit is not None and hit[1] > time.time():
+        LOOKUPS.inc(kind="name", source="memory")
+        return hit[0]
+    return await _single_flight(("name", key), lambda: _load_uuid(pool, key))
+
+
+# ---------------- uuid -> textures ---------------- #
+
+async def _load_textures(pool, uuid_nodash: str) -> Dict:
+    try:
+        row = await pool.fetchrow("""
+            SELECT name, skin_url, cape_url, slim, EXTRACT(EPOCH FROM fetched_at)::float8 AS at
+              FROM mojang_textures WHERE uuid = $1
+        """, uuid_nodash)
+    except Exception as e:
+        log.warning("mojang_textures read failed: %s", e)
+        row = None
+    if row is not None and row["at"] + TEXTURES_TTL > time.time():
+        LOOKUPS.inc(kind="textures", source="db")
+        tex = {k: row[k] for k in ("name", "skin_url", "cape_url", "slim")}
+        _remember(_textures, uuid_nodash, tex, row["at"] + TEXTURES_TTL)
+        return tex
+
+    LOOKUPS.inc(kind="textures", source="mojang")
+    tex = await _fetch_textures(uuid_nodash)
+    _remember(_textures, uuid_nodash, tex, time.time() + TEXTURES_TTL)
+    if tex.get("name"):
+        # the session server just told us the current name; saves a later lookup
+        _remember(_names, tex["name"].lower(), uuid_nodash, time.time() + NAME_TTL)
+    try:
+        await pool.execute("""
+            INSERT INTO mojang_textures (uuid, name, skin_url, cape_url, slim, fetched_at)
+            VALUES ($1, $2, $3, $4, $5, NOW())
+            ON CONFLICT (uuid) DO UPDATE SET name = EXCLUDED.name, skin_url = EXCLUDED.skin_url,
+                cape_url = EXCLUDED.cape_url, slim = EXCLUDED.slim, fetched_at = EXCLUDED.fetched_at
+        """, uuid_nodash, tex["name"], tex["skin_url"], tex["cape_url"], tex["slim"])
+    except Exception as e:
+        log.warning("mojang_textures write failed: %s", e)
+    return tex
+
+
+async def profile_textures(pool, uuid_nodash: str) -> Dict:
+    """{"name", "skin_url", "cape_url", "slim"} for an undashed uuid."""
+    key = uuid_nodash.lower()
+    hit = _textures.get(key)
+    if hit is not None and hit[1] > time.time():
+        LOOKUPS.inc(kind="textures", source="memory")
+        return hit[0]
+    return await _single_flight(("textures", key), lambda: _load_textures(pool, key))
+
+
+def _cache_metrics():
+    yield ("cache_entries", "gauge", "Entries held per cache", [
+        ({"cache": "mojang_names"}, len(_names)), ({"cache": "mojang_textures"}, len(_textures)),
+    ])
+
+metrics.register_collector(_cache_metrics)
@@ -115,6 +115,7 @@ PREMIUM_SKU_STR = str(PREMIUM_SKU_ID)
 import asyncio
 import random
 from aiohttp import ClientResponseError
+from core import metrics
 
 # Exponential backoff with jitter; respects Retry-After when present.
 async def _get_with_retries(session: aiohttp.ClientSession, url: str, *, headers: dict, params: dict,
@@ -124,6 +125,7 @@ async def _get_with_retries(session: aiohttp.ClientSession, url: str, *, headers
         try:
             async with session.get(url, headers=headers, params=params, timeout=timeout) as resp:
                 if resp.status == 429:
+                    metrics.UPSTREAM_ERRORS.inc(upstream="discord", op=op_name, status=429)
                     ra_hdr = resp.headers.get("Retry-After")
                     if ra_hdr is not None:
                         try:
@@ -147,6 +149,7 @@ async def _get_with_retries(session: aiohttp.ClientSession, url: str, *, headers
 
         except ClientResponseError as e:
             # Retry 5xx; treat other 4xx (besides 429) as fatal
+            metrics.UPSTREAM_ERRORS.inc(upstream="discord", op=op_name, status=e.status)
             if 500 <= e.status < 600 and attempt < max_attempts:
                 delay = min(120, base_backoff * (2 ** (attempt - 1))) + random.uniform(0, 0.4)
                 logging.warning(f"[{op_name}] {e.status} server error; attempt={attempt} backoff={delay:.1f}s")
@@ -156,6 +159,7 @@ async def _get_with_retries(session: aiohttp.ClientSession, url: str, *, headers
             raise
         except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
             # Transient network failure
+            metrics.UPSTREAM_ERRORS.inc(upstream="discord", op=op_name, status=type(e).__name__)
             if attempt < max_attempts:
                 delay = min(60, base_backoff * (2 ** (attempt - 1))) + random.uniform(0, 0.4)
                 logging.warning(f"[{op_name}] transient error {type(e).__name__}; attempt={attempt} backoff={delay:.1f}s")
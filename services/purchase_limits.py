@@ -0,0 +1,181 @@
+# services/purchase_limits.py
+"""
+Rolling purchase limits ("N per 24h") without counting purchase_history.
+
+Each purchase adds its quantity to an hourly bucket row keyed by
+(guild, user, item, hour). The window is the last WINDOW_HOURS buckets,
+including the current one, so a limit frees up between 23 and 24 hours
+after the purchase, on the hour. The check and the increment are a single
+upsert (CONSUME), run inside the caller's purchase transaction, so a
+failed charge rolls the count back too.
+
+purchase_history is now an audit log only: one row per purchase (with a
+quantity), and rows older than HISTORY_KEEP_DAYS are moved into the
+month-partitioned purchase_history_archive by archive_old_history().
+"""
+import logging
+import os
+from datetime import datetime, timedelta, timezone
+
+from core import metrics
+from db import queries
+
+log = logging.getLogger("beenbag.shop")
+
+WINDOW_HOURS = 24
+HISTORY_KEEP_DAYS = int(os.getenv("PURCHASE_HISTORY_KEEP_DAYS", "35"))
+ARCHIVE_CHUNK = 5000
+
+LIMIT_HITS = metrics.counter("shop_limit_rejections_total", "Purchases refused by a rolling purchase limit")
+ARCHIVED = metrics.counter("purchase_history_archived_total", "purchase_history rows moved to the archive")
+
+
+class LimitReached(Exception):
+    def __init__(self, limit: int):
+        super().__init__(f"purchase limit {limit} reached")
+        self.limit = limit
+
+
+PURCHASE_LIMITS_SCHEMA_SQL = """
+CREATE TABLE IF NOT EXISTS purchase_limit_buckets (
+    guild_id BIGINT NOT NULL,
+    user_id  BIGINT NOT NULL,
+    item_id  BIGINT NOT NULL,
+    bucket   TIMESTAMPTZ NOT NULL,   -- date_trunc('hour', purchase time)
+    qty      INT NOT NULL,
+    PRIMARY KEY (guild_id, user_id, item_id, bucket)
+);
+CREATE INDEX IF NOT EXISTS purchase_limit_buckets_bucket_idx ON purchase_limit_buckets (bucket);
+ALTER TABLE purchase_history ADD COLUMN IF NOT EXISTS quantity INT NOT NULL DEFAULT 1;
+CREATE INDEX IF NOT EXISTS purchase_history_purchased_at_idx ON purchase_history (purchased_at);
+"""
+
+# Only the current hour's row is ever written, and ON CONFLICT locks it and
+# re-checks against its latest qty, so concurrent buys can't both squeeze
+# under the limit. Older buckets are read from the statement snapshot; nothing
+# writes them any more. No row comes back when the limit would be exceeded.
+CONSUME = queries.register("shop.limit.consume", """
+    WITH prior AS (
+        SELECT COALESCE(SUM(qty), 0)::int AS n
+          FROM purchase_limit_buckets
+         WHERE guild_id = $1 AND user_id = $2 AND item_id = $3
+           AND bucket >= date_trunc('hour', now()) - make_interval(hours => $6 - 1)
+           AND bucket <  date_trunc('hour', now())
+    )
+    INSERT INTO purchase_limit_buckets AS b (guild_id, user_id, item_id, bucket, qty)
+    SELECT $1, $2, $3, date_trunc('hour', now()), $4
+      FROM prior
+     WHERE prior.n + $4 <= $5
+    ON CONFLICT (guild_id, user_id, item_id, bucket)
+    DO UPDATE SET qty = b.qty + EXCLUDED.qty
+     WHERE (SELECT n FROM prior) + b.qty + EXCLUDED.qty <= $5
+    RETURNING (SELECT n FROM prior) + b.qty AS used
+""")
+
+PRUNE_BUCKETS = queries.register("shop.limit.prune", """
+    DELETE FROM purchase_limit_buckets
+     WHERE bucket < date_trunc('hour', now()) - make_interval(hours => $1)
+""")
+
+
+async def ensure_schema(pool) -> None:
+    """Create the bucket table; the first time, seed it from the last day of purchase_history."""
+    async with pool.acquire() as con, con.transaction():
+        existed = await con.fetchval("SELECT to_regclass('purchase_limit_buckets') IS NOT NULL")
+        await con.execute(PURCHASE_LIMITS_SCHEMA_SQL)
+        if not existed:
+            await con.execute("""
+                INSERT INTO purchase_limit_buckets (guild_id, user_id, item_id, bucket, qty)
+                SELECT guild_id, user_id, item_id, date_trunc('hour', purchased_at), SUM(quantity)::int
+                  FROM purchase_history
+                 WHERE guild_id IS NOT NULL
+                   AND purchased_at >= date_trunc('hour', now()) - make_interval(hours => $1 - 1)
+                 GROUP BY 1, 2, 3, 4
+            """, WINDOW_HOURS)
+        await con.execute("""
+            CREATE TABLE IF NOT EXISTS purchase_history_archive (LIKE purchase_history)
+            PARTITION BY RANGE (purchased_at)
+        """)
+
+
+async def consume(conn, guild_id: int, user_id: int, item_id: int, qty: int, limit: int) -> int:
+    """
+    Count `qty` against the item's rolling limit, or raise LimitReached.
+    Call inside the purchase transaction. Returns the window total including this buy.
+    """
+    used = await queries.fetchval(conn, CONSUME, guild_id, user_id, item_id, qty, limit, WINDOW_HOURS)
+    if used is None:
+        LIMIT_HITS.inc()
+        raise LimitReached(limit)
+    return used
+
+
+async def record(conn, guild_id: int, user_id: int, item_id: int, qty: int) -> None:
+    """Audit row for a purchase (one per purchase, not per unit)."""
+    await conn.execute(
+        "INSERT INTO purchase_history (user_id, item_id, guild_id, quantity) VALUES ($1,$2,$3,$4)",
+        user_id, item_id, guild_id, qty
+    )
+
+
+# ---------------- history archive ---------------- #
+
+def _month_start(d: datetime) -> datetime:
+    return d.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+def _next_month(d: datetime) -> datetime:
+    return (d.replace(day=28) + timedelta(days=4)).replace(day=1)
+
+
+async def _ensure_partition(con, month: datetime) -> None:
+    name = f"purchase_history_archive_{month:%Y%m}"
+    await con.execute(f"""
+        CREATE TABLE IF NOT EXISTS {name} PARTITION OF purchase_history_archive
+        FOR VALUES FROM ('{month.isoformat()}') TO ('{_next_month(month).isoformat()}')
+    """)
+
+
+async def archive_old_history(pool, keep_days: int = HISTORY_KEEP_DAYS, chunk: int = ARCHIVE_CHUNK) -> int:
+    """
+    Move purchase_history rows older than keep_days into the monthly archive
+    partitions (created as needed), one short transaction per chunk, and drop
+    expired limit buckets. Background pool, leader only.
+    """
+    cutoff = datetime.now(timezone.utc) - timedelta(days=keep_days)
+    moved = 0
+    async with queries.acquire(pool, "purchase_archive") as con:
+        await queries.execute(con, PRUNE_BUCKETS, WINDOW_HOURS)
+        oldest = await con.fetchval("SELECT min(purchased_at) FROM purchase_history")
+        if oldest is None:
+            return 0
+        if oldest.tzinfo is None:  # plain timestamp column: stored as UTC
+            oldest = oldest.replace(tzinfo=timezone.utc)
+        if oldest >= cutoff:
+            return 0
+        month = _month_start(oldest.astimezone(timezone.utc))
+        while month < cutoff:
+            await _ensure_partition(con, month)
+            month = _next_month(month)
+        while True:
+            async with con.transaction():
+                n = await con.fetchval("""
+                    WITH moved AS (
+                        DELETE FROM purchase_history
+                         WHERE ctid = ANY(ARRAY(
+                               SELECT ctid FROM purchase_history
+                                WHERE purchased_at < $1
+                                LIMIT $2))
+                     RETURNING *
+                    ), ins AS (
+                        INSERT INTO purchase_history_archive SELECT * FROM moved
+                    )
+                    SELECT COUNT(*)::int FROM moved
+                """, cutoff, chunk)
+            moved += n
+            if n < chunk:
+                break
+    if moved:
+        ARCHIVED.inc(moved)
+        log.info("Archived %s purchase_history rows older than %s", moved, cutoff.date())
+    return moved
@@ -1,52 +1,200 @@
-from discord.ext import commands
-import discord, asyncio, random, re
+# services/quiz.py
+"""
+Trivia quiz.
+
+The question bank is parsed once and re-parsed only when the file changes
+(mtime), with indexes by difficulty and tag for selection. Lines are
+
+    question | A | B | C | D | correct [| difficulty [| tag, tag...]]
+
+Answers come in through one on_raw_reaction_add listener that looks the
+message up in _rounds (message id -> round state), instead of every running
+quiz adding a wait_for check that sees every reaction in every guild.
+"""
+from __future__ import annotations
+import asyncio
+import logging
+import os
+import random
+import re
+import time
+from dataclasses import dataclass, field
 from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+
+import discord
+from discord.ext import commands
+
+from core import metrics
 from services import achievements
 from utils import game_helpers
 
-# Put this inside your Cog class
-async def quiz(db_pool, ctx: commands.Context, rounds: int = 5, file_path: str = "assets/quiz_questions.txt"):
-    import random, asyncio, re, time
-    from pathlib import Path
-    import discord
-
-    def _split_unescaped_pipes(line: str) -> list[str]:
-        return [p.replace(r'\|', '|').strip() for p in re.split(r'(?<!\\)\|', line)]
-
-    def load_questions(path: Path):
-        qs = []
-        with path.open(encoding="utf-8") as f:
-            for raw in f:
-                line = raw.strip()
-                if not line or line.startswith("#"):
-                    continue
-                parts = _split_unescaped_pipes(line)
-                if len(parts) != 6:
-                    continue
-                q, a, b, c, d, correct = parts
-                correct = correct.upper()
-                if correct not in ("A", "B", "C", "D"):
-                    continue
-                qs.append({"q": q, "choices": {"A": a, "B": b, "C": c, "D": d}, "answer": correct})
-        return qs
-
-    # ---- load questions ----
+log = logging.getLogger("beenbag.quiz")
+
+QUESTIONS_PATH = "assets/quiz_questions.txt"
+ANSWER_SECONDS = 15.0
+WINNERS_PER_ROUND = 3
+
+A, B, C, D = "🇦", "🇧", "🇨", "🇩"
+EMOJI_TO_CHOICE = {A: "A", B: "B", C: "C", D: "D"}
+
+
+@dataclass(frozen=True)
+class Question:
+    q: str
+    choices: Dict[str, str]
+    answer: str
+    difficulty: str = "normal"
+    tags: Tuple[str, ...] = ()
+
+
+@dataclass(frozen=True)
+class QuestionBank:
+    path: str
+    mtime: float
+    questions: Tuple[Question, ...]
+    by_difficulty: Dict[str, Tuple[int, ...]]  # difficulty -> indexes into questions
+    by_tag: Dict[str, Tuple[int, ...]]
+
+    def pick(self, n: int, topic: Optional[str] = None) -> List[Question]:
+        """n random questions, optionally only those with this difficulty or tag."""
+        if topic:
+            key = topic.strip().lower()
+            idx = self.by_difficulty.get(key) or self.by_tag.get(key) or ()
+        else:
+            idx = range(len(self.questions))
+        return [self.questions[i] for i in random.sample(idx, min(n, len(idx)))]
+
+
+def _split_unescaped_pipes(line: str) -> List[str]:
+    return [p.replace(r'\|', '|').strip() for p in re.split(r'(?<!\\)\|', line)]
+
+
+def _parse(path: Path) -> List[Question]:
+    qs = []
+    with path.open(encoding="utf-8") as f:
+        for raw in f:
+            line = raw.strip()
+            if not line or line.startswith("#"):
+                continue
+            parts = _split_unescaped_pipes(line)
+            if not 6 <= len(parts) <= 8:
+                continue
+            q, a, b, c, d, correct = parts[:6]
+            correct = correct.upper()
+            if correct not in ("A", "B", "C", "D"):
+                continue
+            difficulty = (parts[6].lower() if len(parts) > 6 and parts[6] else "normal")
+            tags = tuple(t.strip().lower() for t in parts[7].split(",") if t.strip()) if len(parts) > 7 else ()
+            qs.append(Question(q, {"A": a, "B": b, "C": c, "D": d}, correct, difficulty, tags))
+    return qs
+
+
+def _index(path: str, mtime: float, qs: List[Question]) -> QuestionBank:
+    by_diff: Dict[str, List[int]] = {}
+    by_tag: Dict[str, List[int]] = {}
+    for i, q in enumerate(qs):
+        by_diff.setdefault(q.difficulty, []).append(i)
+        for t in q.tags:
+            by_tag.setdefault(t, []).append(i)
+    return QuestionBank(
+        path, mtime, tuple(qs),
+        {k: tuple(v) for k, v in by_diff.items()},
+        {k: tuple(v) for k, v in by_tag.items()},
+    )
+
+
+_banks: Dict[str, QuestionBank] = {}
+
+
+def load_bank(path: str = QUESTIONS_PATH) -> QuestionBank:
+    """The parsed bank for `path`; re-parsed only if the file changed since the last load."""
+    mtime = os.stat(path).st_mtime
+    bank = _banks.get(path)
+    if bank is None or bank.mtime != mtime:
+        bank = _index(path, mtime, _parse(Path(path)))
+        _banks[path] = bank
+        log.info("Loaded %s quiz questions from %s", len(bank.questions), path)
+    return bank
+
+
+# ---------------- reaction router ---------------- #
+
+@dataclass
+class _Round:
+    answer: str
+    started: float
+    correct: List[int] = field(default_factory=list)   # user ids, in answer order
+    answered: Set[int] = field(default_factory=set)    # first answer only, right or wrong
+    fast: List[int] = field(default_factory=list)      # correct in under 0.5s
+    done: asyncio.Event = field(default_factory=asyncio.Event)
+
+
+_rounds: Dict[int, _Round] = {}   # question message id -> round
+_routed: Set[int] = set()         # ids of bots the listener is registered on
+_bot_user_ids: Set[int] = set()   # ignore the bot's own A-D reactions
+
+
+def _active_rounds():
+    yield ("quiz_active_rounds", "gauge", "Quiz questions currently accepting answers", [({}, len(_rounds))])
+
+metrics.register_collector(_active_rounds)
+
+
+async def _on_raw_reaction_add(payload: discord.RawReactionActionEvent):
+    rnd = _rounds.get(payload.message_id)
+    if rnd is None or rnd.done.is_set():
+        return
+    if payload.user_id in _bot_user_ids or (payload.member is not None and payload.member.bot):
+        return
+    choice = EMOJI_TO_CHOICE.get(str(payload.emoji))
+    uid = payload.user_id
+    if not choice or uid in rnd.answered:
+        return
+    rnd.answered.add(uid)
+    if choice != rnd.answer:  # wrong -> out this round
+        return
+    if time.perf_counter() - rnd.started < 0.5:
+        rnd.fast.append(uid)
+    rnd.correct.append(uid)
+    if len(rnd.correct) >= WINNERS_PER_ROUND:
+        rnd.done.set()
+
+
+def _ensure_router(bot: commands.Bot) -> None:
+    if bot.user is not None:
+        _bot_user_ids.add(bot.user.id)
+    if id(bot) not in _routed:
+        bot.add_listener(_on_raw_reaction_add, "on_raw_reaction_add")
+        _routed.add(id(bot))
+
+
+# ---------------- the quiz ---------------- #
+
+def _name_for(ctx: commands.Context, uid: int) -> str:
+    m = ctx.guild.get_member(uid) if ctx.guild else None
+    return m.display_name if m else f"<@{uid}>"
+
+
+async def quiz(db_pool, ctx: commands.Context, rounds: int = 5, file_path: str = QUESTIONS_PATH,
+               topic: Optional[str] = None):
     try:
-        all_qs = load_questions(Path(file_path))
+        bank = load_bank(file_path)
     except Exception as e:
         return await ctx.send(f"⚠️ {e}")
-    if not all_qs:
+    if not bank.questions:
         return await ctx.send("⚠️ No valid questions found.")
+    picked = bank.pick(rounds, topic)
+    if not picked:
+        # a typo'd topic shouldn't cost the daily quiz
+        ctx.command.reset_cooldown(ctx)
+        return await ctx.send(f"⚠️ No questions for **{topic}**.")
+    rounds = len(picked)
+    _ensure_router(ctx.bot)
 
-    rounds = min(rounds, len(all_qs))
-    pool = random.sample(all_qs, rounds)
-
-    A, B, C, D = "🇦", "🇧", "🇨", "🇩"
-    reverse_map = {A: "A", B: "B", C: "C", D: "D"}
-
-    scores: dict[int, int] = {}
-    fast_users: list[int] = []   # users who answered any question <1s
-    firsts_per_q: list[int] = [] # user_id who was first for each question
+    scores: Dict[int, int] = {}
+    fast_users: Set[int] = set()  # users who answered any question <0.5s
+    firsts_per_q: List[int] = []  # user_id who was first for each question
 
     # ---- intro frame (15s) ----
     intro = discord.Embed(
@@ -58,16 +206,16 @@ async def quiz(db_pool, ctx: commands.Context, rounds: int = 5, file_path: str =
     await asyncio.sleep(15)
 
     # ---- quiz rounds ----
-    for i, item in enumerate(pool, 1):
-        ans = item["answer"]
+    for i, item in enumerate(picked, 1):
+        ans = item.answer
         embed = discord.Embed(
             title=f"Question {i}/{rounds}",
             description=(
-                f"{item['q']}\n\n"
-                f"{A} **A)** {item['choices']['A']}\n"
-                f"{B} **B)** {item['choices']['B']}\n"
-                f"{C} **C)** {item['choices']['C']}\n"
-                f"{D} **D)** {item['choices']['D']}\n"
+                f"{item.q}\n\n"
+                f"{A} **A)** {item.choices['A']}\n"
+                f"{B} **B)** {item.choices['B']}\n"
+                f"{C} **C)** {item.choices['C']}\n"
+                f"{D} **D)** {item.choices['D']}\n"
             ),
             color=discord.Color.blurple(),
         )
@@ -76,59 +224,32 @@ async def quiz(db_pool, ctx: commands.Context, rounds: int = 5, file_path: str =
         for em in (A, B, C, D):
             try:
                 await msg.add_reaction(em)
-            except:
+            except discord.HTTPException:
                 pass
-
-        correct_users: list[discord.User] = []  # order matters
-        disqualified: set[int] = set()
-        start_time = time.perf_counter()
-
-        def check(reaction: discord.Reaction, user: discord.User):
-            if reaction.message.id != msg.id or user.bot:
-                return False
-            choice = reverse_map.get(str(reaction.emoji))
-            if not choice:
-                return False
-            if user.id in disqualified or any(u.id == user.id for u in correct_users):
-                return False
-            if choice != ans:  # wrong -> DQ
-                disqualified.add(user.id)
-                return False
-            return True
-
+        # clock starts once the choices are up, as before
+        rnd = _rounds[msg.id] = _Round(answer=ans, started=time.perf_counter())
         try:
-            while len(correct_users) < 3:
-                reaction, user = await ctx.bot.wait_for("reaction_add", timeout=15.0, check=check)
-                elapsed = time.perf_counter() - start_time
-                correct_users.append(user)
-                if elapsed < 0.5:
-                    fast_users.append(user.id)
-                if len(correct_users) == 1:
-                    firsts_per_q.append(user.id)
+            await asyncio.wait_for(rnd.done.wait(), timeout=ANSWER_SECONDS)
         except asyncio.TimeoutError:
             pass
+        finally:
+            _rounds.pop(msg.id, None)
+            rnd.done.set()
 
-        # award emeralds
-        for idx, user in enumerate(correct_users):
-            pts = 3 - idx
-            scores[user.id] = scores.get(user.id, 0) + pts
+        winners = rnd.correct[:WINNERS_PER_ROUND]
+        fast_users.update(u for u in rnd.fast if u in winners)
+        if winners:
+            firsts_per_q.append(winners[0])
+        for idx, uid in enumerate(winners):
+            scores[uid] = scores.get(uid, 0) + (WINNERS_PER_ROUND - idx)
 
         # --- Results screen (10s) ---
-        def name_for(u: discord.User | int) -> str:
-            if isinstance(u, int):
-                m = ctx.guild.get_member(u) if ctx.guild else None
-                return m.display_name if m else f"<@{u}>"
-            else:
-                m = ctx.guild.get_member(u.id) if ctx.guild else None
-                return m.display_name if m else f"<@{u.id}>"
-
-        podium = [name_for(u) for u in correct_users] + ["—"] * (3 - len(correct_users))
-
+        podium = [_name_for(ctx, u) for u in winners] + ["—"] * (WINNERS_PER_ROUND - len(winners))
         result_embed = discord.Embed(
             title=f"📣 Round {i} Results",
             description=(
-                f"**Question:** {item['q']}\n"
-                f"**Correct Answer:** {ans}) {item['choices'][ans]}\n\n"
+                f"**Question:** {item.q}\n"
+                f"**Correct Answer:** {ans}) {item.choices[ans]}\n\n"
                 f"🥇 {podium[0]}  (+3)\n"
                 f"🥈 {podium[1]}  (+2)\n"
                 f"🥉 {podium[2]}  (+1)\n\n"
@@ -139,31 +260,29 @@ async def quiz(db_pool, ctx: commands.Context, rounds: int = 5, file_path: str =
         await ctx.send(embed=result_embed)
         await asyncio.sleep(10)
 
-    # ---- final leaderboard ----
+    # ---- final leaderboard + one batched payout ----
+    if not scores:
+        return await ctx.send("No emeralds were earned this time.")
+
     gid = game_helpers.gid_from_ctx(ctx)
-    if scores:
-        def display_name(uid: int) -> str:
-            m = ctx.guild.get_member(uid) if ctx.guild else None
-            return m.display_name if m else f"<@{uid}>"
-
-        lines = []
-        async with db_pool.acquire() as conn:
-            for uid, pts in sorted(scores.items(), key=lambda kv: (-kv[1], kv[0])):
-                lines.append(f"**{display_name(uid)}** — {pts} emerald{'s' if pts != 1 else ''}")
-                await game_helpers.give_items(uid,"emeralds",pts,"emeralds",False,conn,gid)
-
-        lb = discord.Embed(
-            title="🏆 Final Leaderboard",
-            description="\n".join(lines),
-            color=discord.Color.gold(),
-        )
-        await ctx.send(embed=lb)
-
-        # logs
-        for uid in set(fast_users):
-            await achievements.try_grant(db_pool,ctx,uid,"fast_quiz")
-        for uid in set(firsts_per_q):
-            if firsts_per_q.count(uid) == rounds:
-                await achievements.try_grant(db_pool,ctx,uid,"full_marks")
-    else:
-        await ctx.send("No emeralds were earned this time.")
+    lines = [
+        f"**{_name_for(ctx, uid)}** — {pts} emerald{'s' if pts != 1 else ''}"
+        for uid, pts in sorted(scores.items(), key=lambda kv: (-kv[1], kv[0]))
+    ]
+    async with db_pool.acquire() as conn:
+        await game_helpers.apply_items(conn, gid, [
+            (uid, "emeralds", pts, "emeralds", False) for uid, pts in scores.items()
+        ])
+
+    lb = discord.Embed(
+        title="🏆 Final Leaderboard",
+        description="\n".join(lines),
+        color=discord.Color.gold(),
+    )
+    await ctx.send(embed=lb)
+
+    for uid in fast_users:
+        await achievements.try_grant(db_pool, ctx, uid, "fast_quiz")
+    for uid in set(firsts_per_q):
+        if firsts_per_q.count(uid) == rounds:
+            await achievements.try_grant(db_pool, ctx, uid, "full_marks")
@@ -0,0 +1,180 @@
+# services/room_cache.py
+from __future__ import annotations
+import os
+import json
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+from core import metrics
+
+log = logging.getLogger("beenbag.room_cache")
+
+# Tunables (env-driven so prod can size it without a deploy)
+ROOM_CACHE_MAX_BYTES = int(os.getenv("ROOM_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))  # 64 MiB of PNGs
+ROOM_CACHE_DIR = os.getenv("ROOM_CACHE_DIR", "")  # empty -> memory only
+
+
+def room_key(
+    room_type: str,
+    slots: Dict[str, int],
+    lights: Optional[dict] = None,
+    left_door: bool = False,
+    right_door: bool = False,
+) -> str:
+    """
+    Stable hash of everything that changes a room render:
+    (room_type, slot -> item_id map, lights, doors).
+    """
+    payload = {
+        "room_type": room_type,
+        "slots": {str(k): int(v) for k, v in (slots or {}).items() if v is not None},
+        "lights": {str(k): list(v) for k, v in (lights or {}).items()},
+        "doors": [bool(left_door), bool(right_door)],
+    }
+    raw = json.dumps(payload, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+class RoomRenderCache:
+    """
+    Process-wide LRU of rendered room PNGs, bounded by total bytes.
+    Optionally mirrors entries to disk so a restart doesn't re-render everything.
+    Entries are content-addressed; room_id bindings exist only so slot writes
+    can drop the room's last render right away.
+    """
+    def __init__(self, max_bytes: int = ROOM_CACHE_MAX_BYTES, disk_dir: str | None = ROOM_CACHE_DIR):
+        self.max_bytes = max(0, int(max_bytes))
+        self.disk_dir: Optional[Path] = Path(disk_dir) if disk_dir else None
+        self._mem: "OrderedDict[str, bytes]" = OrderedDict()
+        self._size = 0
+        self._room_keys: Dict[int, str] = {}  # room_id -> key of its last persisted render
+        # renders run in a thread pool, so guard the dict
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+        if self.disk_dir is not None:
+            try:
+                self.disk_dir.mkdir(parents=True, exist_ok=True)
+            except OSError as e:
+                log.warning("Room cache dir %s unusable, memory only: %s", self.disk_dir, e)
+                self.disk_dir = None
+
+    # ---- disk tier ----
+    def _disk_path(self, key: str) -> Optional[Path]:
+        return (self.disk_dir / f"{key}.png") if self.disk_dir is not None else None
+
+    def _disk_read(self, key: str) -> Optional[bytes]:
+        p = self._disk_path(key)
+        if p is None:
+            return None
+        try:
+            return p.read_bytes()
+        except FileNotFoundError:
+            return None
+        except OSError as e:
+            log.warning("Room cache read failed for %s: %s", key, e)
+            return None
+
+    def _disk_write(self, key: str, data: bytes) -> None:
+        p = self._disk_path(key)
+        if p is None:
+            return
+        tmp = p.with_suffix(".tmp")
+        try:
+            tmp.write_bytes(data)
+            os.replace(tmp, p)  # atomic so readers never see half a PNG
+        except OSError as e:
+            log.warning("Room cache write failed for %s: %s", key, e)
+
+    def _disk_delete(self, key: str) -> None:
+        p = self._disk_path(key)
+        if p is None:
+            return
+        try:
+            p.unlink()
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            log.warning("Room cache delete failed for %s: %s", key, e)
+
+    # ---- memory tier ----
+    def _mem_put(self, key: str, data: bytes) -> None:
+        if len(data) > self.max_bytes:
+            return  # never let one giant render flush the whole cache
+        old = self._mem.pop(key, None)
+        if old is not None:
+            self._size -= len(old)
+        self._mem[key] = data
+        self._size += len(data)
+        while self._size > self.max_bytes and self._mem:
+            _, evicted = self._mem.popitem(last=False)
+            self._size -= len(evicted)
+
+    def _mem_drop(self, key: str) -> None:
+        old = self._mem.pop(key, None)
+        if old is not None:
+            self._size -= len(old)
+
+    # ---- public API ----
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            data = self._mem.get(key)
+            if data is not None:
+                self._mem.move_to_end(key)
+                self.hits += 1
+                return data
+        data = self._disk_read(key)
+        with self._lock:
+            if data is not None:
+                self._mem_put(key, data)
+                self.hits += 1
+            else:
+                self.misses += 1
+        return data
+
+    def put(self, key: str, data: bytes) -> None:
+        with self._lock:
+            self._mem_put(key, data)
+        self._disk_write(key, data)
+
+    def bind_room(self, room_id: int, key: str) -> None:
+        """Remember which render is the room's current (persisted) look."""
+        with self._lock:
+            self._room_keys[int(room_id)] = key
+
+    def invalidate_room(self, room_id: int) -> None:
+        """Drop the room's last persisted render (called on every slot write)."""
+        with self._lock:
+            key = self._room_keys.pop(int(room_id), None)
+            if key is None:
+                return
+            # another room with the same layout may still point at this key
+            if key in self._room_keys.values():
+                return
+            self._mem_drop(key)
+        self._disk_delete(key)
+
+    def stats(self) -> Tuple[int, int, int, int]:
+        """(entries, bytes, hits, misses)"""
+        with self._lock:
+            return len(self._mem), self._size, self.hits, self.misses
+
+
+room_cache = RoomRenderCache()
+
+
+def _cache_metrics():
+    entries, size, hits, misses = room_cache.stats()
+    yield ("cache_requests_total", "counter", "Cache lookups by result", [
+        ({"cache": "room_render", "result": "hit"}, hits),
+        ({"cache": "room_render", "result": "miss"}, misses),
+    ])
+    yield ("cache_entries", "gauge", "Entries held per cache", [({"cache": "room_render"}, entries)])
+    yield ("cache_bytes", "gauge", "Bytes held per cache", [({"cache": "room_render"}, size)])
+
+metrics.register_collector(_cache_metrics)
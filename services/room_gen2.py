@@ -4,10 +4,17 @@ from dataclasses import dataclass, field
 from typing import Dict, List, Tuple, Optional, Union, Iterable
 from PIL import Image, ImageChops, ImageDraw
 from pathlib import Path
-import io, os, random, math
+from collections import OrderedDict, namedtuple
+from functools import lru_cache, wraps
+import io, os, random, math, threading
+import numpy as np
+
+from core import metrics
 
 TILE = 64
 ASSETS_BASE = Path("assets/house")
+# Shared budget for cached strips/layers (one large_room layer is ~2.6 MB)
+ROOM_LAYER_CACHE_MAX_BYTES = int(os.getenv("ROOM_LAYER_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
 
 # ---- Lighting / shading tunables ----
 INSIDE_TINT_A = 196  # base alpha for inside shading (0..255)
@@ -113,12 +120,112 @@ def _floor_path(name: str) -> Path:
 def _wall_path(name: str) -> Path:
     return ASSETS_BASE / "walls" / _with_png(name)
 
+# ------------- Layer cache -------------
+CacheInfo = namedtuple("CacheInfo", "hits misses maxsize currsize")
+
+class _LayerCache:
+    """
+    LRU of generated images shared by every function decorated with cached(),
+    bounded by total pixel bytes rather than entry count (sizes differ ~10x
+    between room types). Decorated functions keep cache_clear()/cache_info().
+    """
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max(0, int(max_bytes))
+        self._mem: "OrderedDict[tuple, Tuple[Image.Image, int]]" = OrderedDict()
+        self._size = 0
+        # renders run in a thread pool, so guard the dict
+        self._lock = threading.Lock()
+
+    def _put(self, key: tuple, img: Image.Image) -> None:
+        nbytes = img.width * img.height * len(img.getbands())
+        if nbytes > self.max_bytes:
+            return
+        with self._lock:
+            old = self._mem.pop(key, None)
+            if old is not None:
+                self._size -= old[1]
+            self._mem[key] = (img, nbytes)
+            self._size += nbytes
+            while self._size > self.max_bytes and self._mem:
+                _, (_, evicted) = self._mem.popitem(last=False)
+                self._size -= evicted
+
+    def _usage(self, name: str) -> Tuple[int, int]:
+        with self._lock:
+            sizes = [n for k, (_, n) in self._mem.items() if k[0] == name]
+        return len(sizes), sum(sizes)
+
+    def cached(self, fn):
+        name = fn.__name__
+        stats = {"hits": 0, "misses": 0}
+
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            key = (name, args, tuple(sorted(kwargs.items())))
+            with self._lock:
+                hit = self._mem.get(key)
+                if hit is not None:
+                    self._mem.move_to_end(key)
+                    stats["hits"] += 1
+                    return hit[0]
+                stats["misses"] += 1
+            img = fn(*args, **kwargs)
+            self._put(key, img)
+            return img
+
+        def cache_clear() -> None:
+            with self._lock:
+                for key in [k for k in self._mem if k[0] == name]:
+                    self._size -= self._mem.pop(key)[1]
+                stats["hits"] = stats["misses"] = 0
+
+        def cache_info() -> CacheInfo:
+            return CacheInfo(stats["hits"], stats["misses"], None, self._usage(name)[0])
+
+        wrapper.cache_clear = cache_clear
+        wrapper.cache_info = cache_info
+        wrapper.cache_bytes = lambda: self._usage(name)[1]
+        return wrapper
+
+_layer_cache = _LayerCache(ROOM_LAYER_CACHE_MAX_BYTES)
+
+@lru_cache(maxsize=128)
 def _load_image_square(path: Path) -> Image.Image:
+    # Cached: callers must treat the returned tile as read-only.
     img = Image.open(path).convert("RGBA")
     if img.size != (TILE, TILE):
         raise ValueError(f"Tile at '{path}' must be {TILE}x{TILE}, got {img.size}")
     return img
 
+@lru_cache(maxsize=128)
+def _load_half_tile(path: Path) -> Image.Image:
+    """Top half of a floor tile (TILE x TILE//2)."""
+    return _load_image_square(path).crop((0, 0, TILE, TILE//2))
+
+@_layer_cache.cached
+def _tiled(path: Path, w_tiles: int, h_tiles: int, half: bool = False) -> Image.Image:
+    """
+    Pre-tiled strip/block of a tile, built once. Compositing this in one call is
+    pixel-identical to compositing each tile separately (tiles never overlap).
+    """
+    tile = _load_half_tile(path) if half else _load_image_square(path)
+    tw, th = tile.size
+    block = Image.new("RGBA", (tw*w_tiles, th*h_tiles), (0,0,0,0))
+    for ty in range(h_tiles):
+        for tx in range(w_tiles):
+            block.paste(tile, (tx*tw, ty*th))
+    return block
+
+def _runs(indices: Iterable[int]) -> List[Tuple[int,int]]:
+    """Group sorted ints into (start, length) runs of consecutive values."""
+    out: List[Tuple[int,int]] = []
+    for i in sorted(indices):
+        if out and out[-1][0] + out[-1][1] == i:
+            out[-1] = (out[-1][0], out[-1][1] + 1)
+        else:
+            out.append((i, 1))
+    return out
+
 def _gather_images_in_dir(dir_path: Path) -> List[Path]:
     if not dir_path.exists() or not dir_path.is_dir():
         return []
@@ -141,7 +248,9 @@ def _first_existing_file(base: Path, rel_parts: Iterable[str], exts: Iterable[st
             return p
     return None
 
+@lru_cache(maxsize=256)
 def _pick_random_deco(room_type: str, deco_type: str, variation: str) -> Image.Image:
+    # Cached per (room_type, deco_type, variation); returned sprite is read-only.
     # Try direct files first (deterministic)
     file_roots = [
         (ASSETS_BASE, (room_type, "decorations", deco_type, variation)),
@@ -204,47 +313,44 @@ def _parse_color(c: Optional[Union[str, Tuple[int,int,int]]]) -> Optional[Tuple[
     raise ValueError(f"Bad color: {c!r}. Use '#rrggbb' or (r,g,b) or None.")
 
 # -------- Drawing helpers --------
-def _tile_area(base: Image.Image, tile_img: Image.Image, x0: int, y0: int, w_tiles: int, h_tiles: int):
-    for ty in range(h_tiles):
-        for tx in range(w_tiles):
-            base.alpha_composite(tile_img, ((x0+tx)*TILE, (y0+ty)*TILE))
+def _tile_area(base: Image.Image, tile_path: Path, x0: int, y0: int, w_tiles: int, h_tiles: int):
+    if w_tiles <= 0 or h_tiles <= 0:
+        return
+    base.alpha_composite(_tiled(tile_path, w_tiles, h_tiles), (x0*TILE, y0*TILE))
 
 def _door_gap_rows(h: int) -> List[int]:
     # With half-tile floor (canvas is h_tiles + 0.5 tall), gap is the last two full rows.
     if h < 2: return []
     return [h-2, h-1]
 
-def _draw_outline(base: Image.Image, outline_tile: Image.Image, size: Tuple[int,int], open_edges: set[Edge], *, left_door=False, right_door=False):
+def _draw_outline(base: Image.Image, outline_path: Path, size: Tuple[int,int], open_edges: set[Edge], *, left_door=False, right_door=False):
     w,h = size
     if "N" not in open_edges:
-        for x in range(w):
-            base.alpha_composite(outline_tile, (x*TILE, 0))
+        _tile_area(base, outline_path, 0, 0, w, 1)
     if "S" not in open_edges:
-        for x in range(w):
-            base.alpha_composite(outline_tile, (x*TILE, (h-1)*TILE))
+        _tile_area(base, outline_path, 0, h-1, w, 1)
     door_rows = set(_door_gap_rows(h))
     if "W" not in open_edges:
-        for y in range(h):
-            if left_door and y in door_rows: continue
-            base.alpha_composite(outline_tile, (0, y*TILE))
+        rows = [y for y in range(h) if not (left_door and y in door_rows)]
+        for y0, n in _runs(rows):
+            _tile_area(base, outline_path, 0, y0, 1, n)
     if "E" not in open_edges:
-        for y in range(h):
-            if right_door and y in door_rows: continue
-            base.alpha_composite(outline_tile, ((w-1)*TILE, y*TILE))
+        rows = [y for y in range(h) if not (right_door and y in door_rows)]
+        for y0, n in _runs(rows):
+            _tile_area(base, outline_path, w-1, y0, 1, n)
 
 def _platform_y_top(H: int, h_tiles: int) -> int:
     """Y pixel to paste the TOP of a half-floor at 'h_tiles' above ground."""
     return H - TILE//2 - h_tiles*TILE
 
-def _draw_half_floor_strip(canvas: Image.Image, half_tile: Image.Image, y_top: int, omit_columns: Optional[set[int]] = None):
+def _draw_half_floor_strip(canvas: Image.Image, floor_path: Path, y_top: int, omit_columns: Optional[set[int]] = None):
     """Draw a horizontal strip of half-tiles across full room width, optionally omitting some columns."""
     W, H = canvas.size
     w_tiles = W // TILE
     omit = omit_columns or set()
-    for tx in range(w_tiles):
-        if tx in omit: 
-            continue
-        canvas.alpha_composite(half_tile, (tx*TILE, y_top))
+    cols = [tx for tx in range(w_tiles) if tx not in omit]
+    for x0, n in _runs(cols):
+        canvas.alpha_composite(_tiled(floor_path, n, 1, half=True), (x0*TILE, y_top))
 
 def _stair_run_columns(x_start: int, rise_tiles: int, dir_lr: str, w_tiles: int) -> List[int]:
     """Columns touched if using 1 tile per vertical tile; still useful as an approximation for gap logic."""
@@ -301,60 +407,103 @@ def _draw_stairs_halfsteps(canvas: Image.Image, floor_half: Image.Image, base_he
 
         canvas.alpha_composite(floor_half, (int(x), int(y)))
 
-# ------------- Main generator -------------
-def generate_base(
-    room_type: str,
-    flooring: str,                 # "dirt" -> assets/house/floors/dirt.png
-    walls: Dict[str, str],         # {"inside": "brick", "outline": "brick"} (names under walls/)
-    decorations: Dict[str, str],   # {"bed": "red"}
-    *,
-    lights: Dict[str, Tuple[str, int, Optional[Union[str,Tuple[int,int,int]]]]] = None,
-    left_door: bool = False,
-    right_door: bool = False,
-) -> io.BytesIO:
-    """
-    lights: mapping type -> (variation, level{1..3}, color or None)
-      e.g., {"lamp": ("var1", 2, "#ffc080")}
-            {"torch": ("default", 3, None)}  # removes tint in that area
-    """
-    if room_type not in ROOM_TYPES:
-        raise KeyError(f"Unknown room_type '{room_type}'. Available: {list(ROOM_TYPES)}")
-    cfg = ROOM_TYPES[room_type]
-    if cfg.seed is not None:
-        random.seed(cfg.seed)
+# ------------- Layers -------------
+# Each layer below is cached on its own inputs, so a render only recomposes what
+# changed: swapping a poster reuses the background and just re-stamps sprites.
 
+def _canvas_size(cfg: RoomConfig) -> Tuple[int,int]:
     w_tiles, h_tiles = cfg.size_tiles
-    W = w_tiles * TILE
-    H = h_tiles * TILE + TILE//2  # extra half-tile for the ground
-
-    canvas = Image.new("RGBA", (W, H), (0,0,0,0))
-
-    # --- Inside walls (untinted; we add a separate tint overlay later)
-    if cfg.fill_inside_walls_first:
-        inside_name = walls.get("inside") or walls.get("outline") or next(iter(walls.values()))
-        inside_tile = _load_image_square(_wall_path(inside_name))
-        _tile_area(canvas, inside_tile, 0, 0, w_tiles, h_tiles)
+    return w_tiles * TILE, h_tiles * TILE + TILE//2  # extra half-tile for the ground
 
-    # --- Floor tiles (assets)
-    floor_tile_full = _load_image_square(_floor_path(flooring))
-    floor_tile_half = floor_tile_full.crop((0, 0, TILE, TILE//2))  # top half of tile
+@lru_cache(maxsize=16)
+def _tint_layer(room_type: str) -> Image.Image:
+    """Inside shading (black tint over the full-tile rows, not the ground strip)."""
+    cfg = ROOM_TYPES[room_type]
+    w_tiles, h_tiles = cfg.size_tiles
+    W, H = _canvas_size(cfg)
+    layer = Image.new("RGBA", (W, H), (0,0,0,0))
+    layer.paste((0,0,0,INSIDE_TINT_A), (0, 0, w_tiles*TILE, h_tiles*TILE))
+    return layer
 
-    # --- Ground half-floor at bottom (y from bottom-left origin)
-    ground_y = H - TILE//2
-    for tx in range(w_tiles):
-        canvas.alpha_composite(floor_tile_half, (tx*TILE, ground_y))
+# A light is (cx, cy, level, color_or_None) in canvas pixels.
+LightKey = Tuple[int, int, int, Optional[Tuple[int,int,int]]]
 
-    # --- Build the inside shading layer (black tint to be modified by lights)
-    tint_layer = Image.new("RGBA", (W, H), (0,0,0,0))
-    base_tint = Image.new("RGBA", (TILE, TILE), (0,0,0,INSIDE_TINT_A))
-    for ty in range(h_tiles):
-        for tx in range(w_tiles):
-            tint_layer.alpha_composite(base_tint, (tx*TILE, ty*TILE))
+@lru_cache(maxsize=8)
+def _falloff_kernel(level: int) -> np.ndarray:
+    """
+    Radial falloff for one light level, centred on the kernel:
+    strength at the source, linearly down to 0 at the level's radius.
+    """
+    radius_tiles, strength = LIGHT_LEVELS[level]
+    r = int(radius_tiles * TILE)
+    yy, xx = np.mgrid[-r:r+1, -r:r+1].astype(np.float64)
+    dist = np.sqrt(xx*xx + yy*yy)
+    kernel = np.clip(1.0 - dist / r, 0.0, 1.0) * strength
+    kernel.setflags(write=False)
+    return kernel
+
+def _kernel_window(kernel: np.ndarray, cx: int, cy: int, w: int, h: int):
+    """Slices (field, kernel) for stamping `kernel` centred at (cx, cy), clipped to a w x h field."""
+    r = kernel.shape[0] // 2
+    x0, y0 = max(0, cx - r), max(0, cy - r)
+    x1, y1 = min(w, cx + r + 1), min(h, cy + r + 1)
+    if x0 >= x1 or y0 >= y1:
+        return None
+    field_sl = (slice(y0, y1), slice(x0, x1))
+    kern_sl = (slice(y0 - (cy - r), y1 - (cy - r)), slice(x0 - (cx - r), x1 - (cx - r)))
+    return field_sl, kern_sl
 
-    # (Option to apply _apply_lights_to_tint later)
-    canvas = Image.alpha_composite(canvas, tint_layer)
+@_layer_cache.cached
+def _lit_tint_layer(room_type: str, lights_key: Tuple[LightKey, ...]) -> Image.Image:
+    """
+    Tint layer with lights cut into it, computed as arrays:
+      - per level, stamp that level's falloff kernel at each of its lights (max, so
+        same-level lights don't stack past their strength);
+      - keep = product over levels of (1 - field) is the surviving tint fraction;
+      - alpha = INSIDE_TINT_A * keep in one multiply; RGB is the kernel-weighted
+        mix of light colours (None counts as black, i.e. plain tint removal).
+    With no lights this is exactly _tint_layer().
+    """
+    if not lights_key:
+        return _tint_layer(room_type)
+    cfg = ROOM_TYPES[room_type]
+    w_tiles, h_tiles = cfg.size_tiles
+    W, H = _canvas_size(cfg)
+    th = h_tiles * TILE  # only the full-tile rows are tinted
+
+    fields: Dict[int, np.ndarray] = {}
+    color_num = np.zeros((th, W, 3), dtype=np.float64)
+    color_den = np.zeros((th, W), dtype=np.float64)
+    for cx, cy, level, color in lights_key:
+        kernel = _falloff_kernel(level)
+        win = _kernel_window(kernel, cx, cy, W, th)
+        if win is None:
+            continue
+        fsl, ksl = win
+        k = kernel[ksl]
+        field = fields.setdefault(level, np.zeros((th, W), dtype=np.float64))
+        np.maximum(field[fsl], k, out=field[fsl])
+        color_den[fsl] += k
+        if color is not None:
+            color_num[fsl] += k[..., None] * np.asarray(color, dtype=np.float64)
+
+    keep = np.ones((th, W), dtype=np.float64)
+    for level in sorted(fields):
+        keep *= 1.0 - fields[level]
+
+    rgb = np.zeros_like(color_num)
+    np.divide(color_num, color_den[..., None], out=rgb, where=color_den[..., None] > 0)
+
+    arr = np.zeros((H, W, 4), dtype=np.uint8)
+    arr[:th, :, :3] = np.rint(rgb).astype(np.uint8)
+    arr[:th, :, 3] = np.rint(INSIDE_TINT_A * keep).astype(np.uint8)
+    return Image.fromarray(arr, "RGBA")
+
+def _draw_platforms_and_stairs(canvas: Image.Image, cfg: RoomConfig, floor_path: Path):
+    w_tiles, _ = cfg.size_tiles
+    W, H = canvas.size
+    floor_tile_half = _load_half_tile(floor_path)
 
-    # ---------------- Platforms & Stairs ----------------
     # Compute omit columns per floor if "continue" is False (leave a gap along stair run)
     omit_cols_2 = set()
     omit_cols_3 = set()
@@ -376,12 +525,12 @@ def generate_base(
     # Draw second floor platform (half tiles)
     if cfg.second_floor_height is not None and cfg.second_floor_height > 0:
         y2 = _platform_y_top(H, cfg.second_floor_height)
-        _draw_half_floor_strip(canvas, floor_tile_half, y2, omit_columns=omit_cols_2)
+        _draw_half_floor_strip(canvas, floor_path, y2, omit_columns=omit_cols_2)
 
     # Draw third floor platform (half tiles)
     if cfg.third_floor_height is not None and cfg.third_floor_height > 0:
         y3 = _platform_y_top(H, cfg.third_floor_height)
-        _draw_half_floor_strip(canvas, floor_tile_half, y3, omit_columns=omit_cols_3)
+        _draw_half_floor_strip(canvas, floor_path, y3, omit_columns=omit_cols_3)
 
     # Stairs (half-step) drawn ON TOP of platforms
     if cfg.second_floor_height is not None and cfg.second_floor_height > 0 and cfg.second_floor_stairs:
@@ -393,9 +542,78 @@ def generate_base(
         sx3, sdir3 = cfg.third_floor_stairs
         _draw_stairs_halfsteps(canvas, floor_tile_half, cfg.second_floor_height, cfg.third_floor_height, sx3, sdir3)
 
+@_layer_cache.cached
+def _background_layer(room_type: str, inside_name: Optional[str], flooring: str,
+                      lights_key: Tuple[LightKey, ...] = ()) -> Image.Image:
+    """Inside walls + ground + tint + platforms/stairs. Read-only; copy before drawing on it."""
+    cfg = ROOM_TYPES[room_type]
+    w_tiles, h_tiles = cfg.size_tiles
+    W, H = _canvas_size(cfg)
+
+    canvas = Image.new("RGBA", (W, H), (0,0,0,0))
+
+    # --- Inside walls (untinted; we add a separate tint overlay later)
+    if inside_name is not None:
+        _tile_area(canvas, _wall_path(inside_name), 0, 0, w_tiles, h_tiles)
+
+    # --- Ground half-floor at bottom (y from bottom-left origin)
+    floor_path = _floor_path(flooring)
+    _draw_half_floor_strip(canvas, floor_path, H - TILE//2)
+
+    # --- Inside shading layer, with lights cut into it
+    canvas = Image.alpha_composite(canvas, _lit_tint_layer(room_type, lights_key))
+
+    # ---------------- Platforms & Stairs ----------------
+    _draw_platforms_and_stairs(canvas, cfg, floor_path)
+    return canvas
+
+def clear_layer_caches() -> None:
+    """Drop every cached tile/sprite/layer (e.g. after swapping assets on disk)."""
+    for fn in (_load_image_square, _load_half_tile, _tiled, _pick_random_deco,
+               _tint_layer, _falloff_kernel, _lit_tint_layer, _background_layer):
+        fn.cache_clear()
+
+def _layer_cache_metrics():
+    hits, misses, entries = [], [], []
+    for fn in (_tiled, _background_layer, _lit_tint_layer, _tint_layer):
+        info = fn.cache_info()
+        name = {"cache": f"room_layer{fn.__name__}"}
+        hits.append(({**name, "result": "hit"}, info.hits))
+        misses.append(({**name, "result": "miss"}, info.misses))
+        entries.append((name, info.currsize))
+    yield ("cache_requests_total", "counter", "Cache lookups by result", hits + misses)
+    yield ("cache_entries", "gauge", "Entries held per cache", entries)
+    yield ("cache_bytes", "gauge", "Bytes held per cache", [
+        ({"cache": f"room_layer{fn.__name__}"}, fn.cache_bytes())
+        for fn in (_tiled, _background_layer, _lit_tint_layer)
+    ])
+
+metrics.register_collector(_layer_cache_metrics)
+
+# ------------- Main generator -------------
+def compose_base(
+    room_type: str,
+    flooring: str,
+    walls: Dict[str, str],
+    decorations: Dict[str, str],
+    *,
+    lights: Dict[str, Tuple[str, int, Optional[Union[str,Tuple[int,int,int]]]]] = None,
+    left_door: bool = False,
+    right_door: bool = False,
+) -> Image.Image:
+    """Same as generate_base, but returns the composed canvas instead of PNG bytes."""
+    if room_type not in ROOM_TYPES:
+        raise KeyError(f"Unknown room_type '{room_type}'. Available: {list(ROOM_TYPES)}")
+    cfg = ROOM_TYPES[room_type]
+    if cfg.seed is not None:
+        random.seed(cfg.seed)
+
+    w_tiles, h_tiles = cfg.size_tiles
+
     # ---------------- Lights ----------------
     lights = lights or {}
-    lights_effects: List[Tuple[int,int,int,int,float,Optional[Tuple[int,int,int]]]] = []
+    light_sprites: List[Tuple[Image.Image, int, int]] = []
+    lights_key: List[LightKey] = []
     for light_type, raw_positions in cfg.light_spots.items():
         spec = lights.get(light_type)
         if not spec:
@@ -408,24 +626,24 @@ def generate_base(
         if level not in LIGHT_LEVELS:
             raise ValueError(f"Light level for '{light_type}' must be 1,2,or 3")
         color = _parse_color(color_raw)
-        radius_tiles, strength = LIGHT_LEVELS[level]
 
         positions = _normalize_spots(raw_positions)
         for (tx, ty) in positions:
             if not (0 <= tx < w_tiles and 0 <= ty < h_tiles): continue
-            # 1) draw the light sprite (deterministic loader)
+            # 1) light sprite (deterministic loader), drawn over the shading
             sprite = _pick_random_deco(room_type, light_type, variation)
-            canvas.alpha_composite(sprite, (tx*TILE, ty*TILE))
-            # 2) schedule tint modification
-            cx = tx*TILE + TILE//2
-            cy = ty*TILE + TILE//2
-            lights_effects.append((
-                cx, cy,
-                int(radius_tiles * TILE),
-                INSIDE_TINT_A,
-                strength,
-                color
-            ))
+            light_sprites.append((sprite, tx*TILE, ty*TILE))
+            # 2) tint modification, centred on the tile
+            lights_key.append((tx*TILE + TILE//2, ty*TILE + TILE//2, level, color))
+
+    # --- Background (walls, floors, lit tint) from the layer cache
+    inside_name = None
+    if cfg.fill_inside_walls_first:
+        inside_name = walls.get("inside") or walls.get("outline") or next(iter(walls.values()))
+    canvas = _background_layer(room_type, inside_name, flooring, tuple(lights_key)).copy()
+
+    for sprite, x, y in light_sprites:
+        canvas.alpha_composite(sprite, (x, y))
 
     # --- Decorations (pure sprites)
     for deco_type, raw_positions in cfg.decoration_spots.items():
@@ -441,8 +659,29 @@ def generate_base(
 
     # --- Outline walls
     outline_name = walls.get("outline") or walls.get("inside") or next(iter(walls.values()))
-    outline_tile = _load_image_square(_wall_path(outline_name))
-    _draw_outline(canvas, outline_tile, (w_tiles, h_tiles), cfg.open_edges, left_door=left_door, right_door=right_door)
+    _draw_outline(canvas, _wall_path(outline_name), (w_tiles, h_tiles), cfg.open_edges, left_door=left_door, right_door=right_door)
+
+    return canvas
+
+def generate_base(
+    room_type: str,
+    flooring: str,                 # "dirt" -> assets/house/floors/dirt.png
+    walls: Dict[str, str],         # {"inside": "brick", "outline": "brick"} (names under walls/)
+    decorations: Dict[str, str],   # {"bed": "red"}
+    *,
+    lights: Dict[str, Tuple[str, int, Optional[Union[str,Tuple[int,int,int]]]]] = None,
+    left_door: bool = False,
+    right_door: bool = False,
+) -> io.BytesIO:
+    """
+    lights: mapping type -> (variation, level{1..3}, color or None)
+      e.g., {"lamp": ("var1", 2, "#ffc080")}
+            {"torch": ("default", 3, None)}  # removes tint in that area
+    """
+    canvas = compose_base(
+        room_type, flooring, walls, decorations,
+        lights=lights, left_door=left_door, right_door=right_door,
+    )
 
     # --- Output
     out = io.BytesIO()
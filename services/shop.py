@@ -1,72 +1,21 @@
 import discord
 import random
 import asyncio
-from constants import DISABLED_SHOP_ITEMS,MOBS
-from utils.game_helpers import gid_from_ctx,give_mob,sucsac,gain_exp,give_items,giverole, get_items,take_items
-from datetime import datetime,timedelta,timezone
+from constants import MOBS
+from utils.game_helpers import gid_from_ctx,sucsac,gain_exp,give_items,giverole, get_items,take_items
 import math
 import discord
-from services import achievements
+from services import achievements, barn, catalog, purchase_limits
 from discord.ext import commands
-from typing import List, Dict, Any
-from datetime import datetime, timedelta, timezone
-import asyncpg
+from typing import Any
 from utils.game_helpers import get_items, take_items, give_items, gid_from_ctx  # you already have these
-from constants import DISABLED_SHOP_ITEMS
-
-# ---------- DB helpers ----------
-async def _fetch_pages(conn) -> List[str]:
-    rows = await conn.fetch(
-        """
-        SELECT DISTINCT page_name
-          FROM shop_items
-         WHERE NOT (LOWER(name) = ANY($1::text[]))
-         ORDER BY 1
-        """,
-        list(DISABLED_SET)
-    )
-    return [r["page_name"] for r in rows] or ["General"]
-
-async def _fetch_items_for_page(conn, page_name: str):
-    rows = await conn.fetch(
-        """
-        SELECT i.item_id, i.name, i.description, i.purchase_limit
-          FROM shop_items i
-         WHERE i.page_name = $1
-           AND NOT (LOWER(i.name) = ANY($2::text[]))
-         ORDER BY i.item_id
-        """,
-        page_name, list(DISABLED_SET)
-    )
-    return rows
-
-async def _fetch_costs(conn, item_id: int) -> List[asyncpg.Record]:
-    # zero or more cost lines (currency_item, amount)
-    rows = await conn.fetch(
-        """
-        SELECT currency_item, amount
-          FROM shop_item_costs
-         WHERE item_id = $1
-         ORDER BY currency_item
-        """,
-        item_id
-    )
-    return rows
-
-async def _fallback_emerald_cost(conn, item_id: int):
-    val = await conn.fetchval("SELECT price_emeralds FROM shop_items WHERE item_id = $1", item_id)
-    return val
-
-def _format_costs(cost_rows: List[asyncpg.Record], fallback_emeralds: int | None) -> str:
-    parts = []
-    for r in cost_rows:
-        parts.append(f"{r['amount']} × {r['currency_item']}")
-    if not parts and fallback_emeralds and fallback_emeralds > 0:
-        parts.append(f"{fallback_emeralds} × emeralds")
+
+def _format_costs(costs) -> str:
+    parts = [f"{amt} × {cur}" for cur, amt in costs]
     return " + ".join(parts) if parts else "free"
 
 # ---------- Embed builder ----------
-def _build_shop_embed(ctx, page_name: str, items: List[asyncpg.Record], start: int, costs_map: Dict[int, str]) -> discord.Embed:
+def _build_shop_embed(ctx, page_name: str, items, start: int) -> discord.Embed:
     color = discord.Color.gold()
     e = discord.Embed(title=f"🏪 Shop — {page_name}", color=color)
     if not items:
@@ -80,7 +29,7 @@ def _build_shop_embed(ctx, page_name: str, items: List[asyncpg.Record], start: i
         desc = r["description"] or ""
         limit = r["purchase_limit"]
         limit_text = "unlimited" if limit is None else f"{limit} per 24 h"
-        cost_text = costs_map.get(item_id, "free")
+        cost_text = _format_costs(r.costs)
         e.add_field(
             name=f"#{item_id} — {name}",
             value=f"{desc}\n**Cost:** {cost_text}\n**Limit:** {limit_text}\nUse: `!buy {item_id} [qty]`",
@@ -95,39 +44,24 @@ def _build_shop_embed(ctx, page_name: str, items: List[asyncpg.Record], start: i
 
 # ---------- View (dropdown + arrows) ----------
 class ShopView(discord.ui.View):
-    def __init__(self, ctx: commands.Context, pool, pages: List[str], initial_page: str):
+    def __init__(self, ctx: commands.Context, snap: catalog.Catalog, initial_page: str):
         super().__init__(timeout=90)
         self.ctx = ctx
-        self.pool = pool
-        self.pages = pages
+        self.snap = snap  # pinned for the view's lifetime; pages never mix catalog versions
         self.page = initial_page
         self.start = 0  # index into items list
-        self.items_cache: Dict[str, List[asyncpg.Record]] = {}
-        self.costs_cache: Dict[int, str] = {}
         # build select options
         self.page_select.options = [
-            discord.SelectOption(label=p, value=p, default=(p == initial_page)) for p in pages
+            discord.SelectOption(label=p, value=p, default=(p == initial_page)) for p in snap.shop.pages
         ]
 
-    async def _load(self):
-        async with self.pool.acquire() as con:
-            if self.page not in self.items_cache:
-                rows = await _fetch_items_for_page(con, self.page)
-                self.items_cache[self.page] = rows
-                # pre-compute costs for rows on this page
-                for r in rows:
-                    costs = await _fetch_costs(con, r["item_id"])
-                    fallback = await _fallback_emerald_cost(con, r["item_id"])
-                    self.costs_cache[r["item_id"]] = _format_costs(costs, fallback)
-
     async def _render(self, interaction=None):
-        await self._load()
-        items = self.items_cache.get(self.page, [])
+        items = self.snap.shop.page(self.page)
         self.start = max(0, min(self.start, max(0, len(items) - 1)))
         # enable/disable buttons
         self.prev_button.disabled = (self.start <= 0)
         self.next_button.disabled = (self.start + 5 >= len(items))
-        embed = _build_shop_embed(self.ctx, self.page, items, self.start, self.costs_cache)
+        embed = _build_shop_embed(self.ctx, self.page, items, self.start)
         if interaction:
             await interaction.response.edit_message(embed=embed, view=self)
         else:
@@ -155,32 +89,10 @@ class ShopView(discord.ui.View):
 
 # ---------- Public entry ----------
 async def shop(pool, ctx):
-    async with pool.acquire() as con:
-        pages = await _fetch_pages(con)
-
-    view = ShopView(ctx, pool, pages, pages[0])
+    snap = await catalog.get(pool)
+    view = ShopView(ctx, snap, snap.shop.pages[0])
     await view._render()  # sends the first embed + view
 
-async def _lookup_item(conn, raw: str):
-    # Accept numeric ID or case-insensitive name
-    if raw.isdigit():
-        return await conn.fetchrow(
-            "SELECT item_id, name, purchase_limit FROM shop_items WHERE item_id = $1",
-            int(raw)
-        )
-    return await conn.fetchrow(
-        "SELECT item_id, name, purchase_limit FROM shop_items WHERE LOWER(name) = $1",
-        raw.lower()
-    )
-
-async def _get_all_costs(conn, item_id: int) -> Dict[str, int]:
-    rows = await _fetch_costs(conn, item_id)
-    if rows:
-        return {r["currency_item"]: r["amount"] for r in rows}
-    # fallback to emeralds if costs table empty
-    emer = await _fallback_emerald_cost(conn, item_id)
-    return {"emeralds": emer or 0}
-DISABLED_SET = {s.lower() for s in DISABLED_SHOP_ITEMS}
 async def buy(pool, ctx, args):
     """
     Purchase one or more of an item.
@@ -207,39 +119,20 @@ async def buy(pool, ctx, args):
 
     user_id = ctx.author.id
     guild_id = gid_from_ctx(ctx)
-    now = datetime.now(timezone.utc)
 
-    async with pool.acquire() as conn:
-        # Lookup (ID or name), skip disabled
-        item = await _lookup_item(conn, raw_key)
-        if not item:
-            return await ctx.send(f"❌ No shop item matching **{raw_key}**.")
-        name_lower = (await conn.fetchval("SELECT LOWER(name) FROM shop_items WHERE item_id=$1", item["item_id"])) or ""
-        if name_lower in DISABLED_SET:
-            return await ctx.send("❌ That item is not available right now.")
-
-        item_id = item["item_id"]
-        display_name = await conn.fetchval("SELECT name FROM shop_items WHERE item_id = $1", item_id)
-        limit = item["purchase_limit"]  # None = unlimited
-
-        # Enforce daily limit
-        if limit is not None:
-            since = now - timedelta(hours=24)
-            bought = await conn.fetchval(
-                """
-                SELECT COUNT(*) FROM purchase_history
-                 WHERE user_id = $1 AND guild_id=$2 AND item_id = $3 AND purchased_at > $4
-                """,
-                user_id, guild_id, item_id, since
-            )
-            if bought + qty > limit:
-                return await ctx.send(f"❌ You can only buy {limit}/{limit} **{display_name}** per 24 h.")
+    snap = await catalog.get(pool)
+    item = snap.shop.lookup(raw_key)
+    if not item:
+        return await ctx.send(f"❌ No shop item matching **{raw_key}**.")
+    if item.disabled:
+        return await ctx.send("❌ That item is not available right now.")
 
-        # Fetch costs (multi-currency)
-        costs = await _get_all_costs(conn, item_id)  # dict: item_name -> unit_amount
-        if not costs:
-            costs = {"emeralds": 0}
+    item_id = item.item_id
+    display_name = item.name
+    limit = item.purchase_limit  # None = unlimited
+    costs = item.cost_map  # item_name -> unit_amount; empty = free
 
+    async with pool.acquire() as conn:
         # Check balances
         deficits = []
         for currency_item, unit_amt in costs.items():
@@ -256,29 +149,29 @@ async def buy(pool, ctx, args):
                 msg_lines.append(f"• {it}: need **{need}**, have **{have}**")
             return await ctx.send("\n".join(msg_lines))
 
-        # Deduct costs (all or nothing) & log purchases
-        async with conn.transaction():
-            for currency_item, unit_amt in costs.items():
-                need = unit_amt * qty
-                if need > 0:
-                    await take_items(user_id, currency_item, need, conn, guild_id)
-
-            # history rows
-            for _ in range(qty):
+        # Count against the rolling limit, deduct costs & log, all or nothing
+        try:
+            async with conn.transaction():
+                if limit is not None:
+                    await purchase_limits.consume(conn, guild_id, user_id, item_id, qty, limit)
+                for currency_item, unit_amt in costs.items():
+                    need = unit_amt * qty
+                    if need > 0:
+                        await take_items(user_id, currency_item, need, conn, guild_id)
+
+                await purchase_limits.record(conn, guild_id, user_id, item_id, qty)
+                # cumulative
                 await conn.execute(
-                    "INSERT INTO purchase_history (user_id, item_id, guild_id) VALUES ($1,$2,$3)",
-                    user_id, item_id, guild_id
+                    """
+                    INSERT INTO shop_purchases (user_id,item_id,quantity,guild_id)
+                    VALUES ($1,$2,$3,$4)
+                    ON CONFLICT (user_id,item_id,guild_id)
+                    DO UPDATE SET quantity = shop_purchases.quantity + EXCLUDED.quantity
+                    """,
+                    user_id, item_id, qty, guild_id
                 )
-            # cumulative
-            await conn.execute(
-                """
-                INSERT INTO shop_purchases (user_id,item_id,quantity,guild_id)
-                VALUES ($1,$2,$3,$4)
-                ON CONFLICT (user_id,item_id,guild_id)
-                DO UPDATE SET quantity = shop_purchases.quantity + EXCLUDED.quantity
-                """,
-                user_id, item_id, qty, guild_id
-            )
+        except purchase_limits.LimitReached:
+            return await ctx.send(f"❌ You can only buy {limit}/{limit} **{display_name}** per 24 h.")
 
         # Deliver effect/content
         # You can keep your special-cases here. Example:
@@ -373,31 +266,16 @@ async def use(ctx, pool, bot, item_name, quantity):
                 mobs = ([m for m,v in MOBS.items() if not v["hostile"]])
                 mob = random.choices(mobs, weights=weights, k=1)[0]
                 
-                await conn.execute(
-                    "INSERT INTO barn_upgrades (user_id,guild_id) VALUES ($1,$2) ON CONFLICT DO NOTHING;",
-                    user_id,guild_id
-                )
-                # count current barn occupancy
-                occ = await conn.fetchval(
-                    "SELECT COALESCE(SUM(count),0) FROM barn WHERE user_id = $1 AND guild_id = $2",
-                    user_id,guild_id
-                )
-                size = await conn.fetchval(
-                    "SELECT barn_size FROM new_players_guild WHERE user_id = $1 AND guild_id = $2",
-                    user_id,guild_id
-                )
-                if occ >= size:
-                    sac = True
-                    reward = await sucsac(ctx.channel,ctx.author,mob,is_golden,"because the barn was too full",conn)
-                    note = f"sacrificed for {reward} emeralds (barn is full)."
-                    
-                elif MOBS[mob]["hostile"]:
+                if MOBS[mob]["hostile"]:
                     sac = True
                     reward = await sucsac(ctx.channel,ctx.author,mob,is_golden,"because the mob is hostile",conn)
                     note = f"this mob is not catchable so it was sacrificed for {reward} emeralds"
-                else:
-                    await give_mob(conn, user_id, mob,guild_id)
+                elif (await barn.try_add_mobs(conn, user_id, guild_id, mob))[0]:
                     got.append(mob)
+                else:
+                    sac = True
+                    reward = await sucsac(ctx.channel,ctx.author,mob,is_golden,"because the barn was too full",conn)
+                    note = f"sacrificed for {reward} emeralds (barn is full)."
                 await asyncio.sleep(1)
         # summarize what they got
         summary = {}
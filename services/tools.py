@@ -0,0 +1,98 @@
+# services/tools.py
+from __future__ import annotations
+import time
+from collections import OrderedDict
+from typing import FrozenSet, Optional, Tuple
+
+from constants import TIER_ORDER
+from core import metrics
+
+# ---------------- loadout cache ---------------- #
+# (guild_id, user_id) -> (tool names with uses left, expires_at).
+# Only used to skip the UPDATE when a player owns no tool of a kind; a stale
+# positive just costs one query. Crafting adds to it, so negatives don't stick.
+LOADOUT_TTL_SECONDS = 300
+LOADOUT_CACHE_MAX = 5000
+_loadouts: "OrderedDict[Tuple[int, int], Tuple[FrozenSet[str], float]]" = OrderedDict()
+
+USE_BEST_TOOL_SQL = """
+UPDATE tools t
+   SET uses_left = t.uses_left - 1
+  FROM (
+        SELECT tier
+          FROM tools
+         WHERE guild_id = $1 AND user_id = $2
+           AND tool_name = $3 AND uses_left > 0
+         ORDER BY array_position($4::text[], tier) DESC NULLS LAST
+         LIMIT 1
+         FOR UPDATE
+  ) best
+ WHERE t.guild_id = $1 AND t.user_id = $2
+   AND t.tool_name = $3 AND t.tier = best.tier
+RETURNING t.tier, t.uses_left
+"""
+
+def _loadout_get(guild_id: int, user_id: int) -> Optional[FrozenSet[str]]:
+    key = (guild_id, user_id)
+    item = _loadouts.get(key)
+    if item is None:
+        return None
+    names, exp = item
+    if time.time() >= exp:
+        _loadouts.pop(key, None)
+        return None
+    _loadouts.move_to_end(key)
+    return names
+
+def _loadout_put(guild_id: int, user_id: int, names) -> None:
+    key = (guild_id, user_id)
+    _loadouts[key] = (frozenset(names), time.time() + LOADOUT_TTL_SECONDS)
+    _loadouts.move_to_end(key)
+    while len(_loadouts) > LOADOUT_CACHE_MAX:
+        _loadouts.popitem(last=False)
+
+async def _loadout(conn, guild_id: int, user_id: int) -> FrozenSet[str]:
+    names = _loadout_get(guild_id, user_id)
+    if names is None:
+        rows = await conn.fetch(
+            """
+            SELECT DISTINCT tool_name
+              FROM tools
+             WHERE guild_id = $1 AND user_id = $2 AND uses_left > 0
+            """,
+            guild_id, user_id
+        )
+        names = frozenset(r["tool_name"] for r in rows)
+        _loadout_put(guild_id, user_id, names)
+    return names
+
+def note_tool_gained(guild_id: int, user_id: int, tool_name: str) -> None:
+    """Call after giving a player a tool so a cached 'has none' is corrected."""
+    names = _loadout_get(guild_id, user_id)
+    if names is not None:
+        _loadout_put(guild_id, user_id, names | {tool_name})
+
+def forget_loadout(guild_id: int, user_id: int) -> None:
+    _loadouts.pop((guild_id, user_id), None)
+
+def _loadout_metrics():
+    yield ("cache_entries", "gauge", "Entries held per cache", [({"cache": "tool_loadout"}, len(_loadouts))])
+
+metrics.register_collector(_loadout_metrics)
+
+# ---------------- use best tool ---------------- #
+
+async def use_best_tool(conn, user_id: int, guild_id: int, tool_name: str) -> Tuple[Optional[str], int]:
+    """
+    Spend one use of the player's highest-tier usable `tool_name` in one statement.
+    Returns (tier, uses_left_after), or (None, 0) if they have none.
+    """
+    names = await _loadout(conn, guild_id, user_id)
+    if tool_name not in names:
+        return None, 0
+    row = await conn.fetchrow(USE_BEST_TOOL_SQL, guild_id, user_id, tool_name, TIER_ORDER)
+    if row is None:
+        # cache said yes but they'd run out (or another process used it up)
+        _loadout_put(guild_id, user_id, names - {tool_name})
+        return None, 0
+    return row["tier"], row["uses_left"]
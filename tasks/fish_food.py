@@ -1,54 +1,121 @@
 # tasks/fish_food.py
 import asyncio
 import logging
+import time
+
+from core import leader, metrics
+from db import queries
+
+FISH_FOOD_CHUNK = 500  # owners per upsert; bounds how long player_items rows stay locked
+FISH_FOOD_EVERY = 1800  # seconds (30 minutes)
+
+# When the last grant happened, so restarts, deploys and leader failovers
+# don't hand out an extra round. Seeded with now(): the first grant after
+# this ships is one full interval later.
+FISH_FOOD_TICK_SQL = """
+CREATE TABLE IF NOT EXISTS fish_food_tick (
+    id      BOOLEAN PRIMARY KEY DEFAULT TRUE CHECK (id),
+    last_at TIMESTAMPTZ NOT NULL
+);
+INSERT INTO fish_food_tick (id, last_at) VALUES (TRUE, NOW()) ON CONFLICT DO NOTHING;
+"""
+
+# Last tick timings, for logs / admin inspection.
+tick_stats = {"ticks": 0, "last_seconds": 0.0, "last_rows": 0, "last_pruned": 0, "max_seconds": 0.0}
+
+def _tick_metrics():
+    yield ("fish_food_ticks_total", "counter", "Fish food distribution ticks completed", [({}, tick_stats["ticks"])])
+    yield ("fish_food_last_tick_seconds", "gauge", "Duration of the last fish food tick", [({}, tick_stats["last_seconds"])])
+    yield ("fish_food_last_tick_rows", "gauge", "Owners granted food / fish pruned in the last tick", [
+        ({"kind": "granted"}, tick_stats["last_rows"]), ({"kind": "pruned"}, tick_stats["last_pruned"]),
+    ])
+
+metrics.register_collector(_tick_metrics)
+
+DISTRIBUTE_FOOD = queries.register("fish_food.distribute", """
+    WITH batch AS (
+        SELECT guild_id, user_id, food
+          FROM aquarium_food
+         WHERE (guild_id, user_id) > ($1, $2) AND food > 0
+         ORDER BY guild_id, user_id
+         LIMIT $3
+    ), granted AS (
+        INSERT INTO player_items (guild_id, player_id, item_name, category, quantity, useable)
+        SELECT guild_id, user_id, 'fish food', 'resource', food, TRUE
+          FROM batch
+        ON CONFLICT (guild_id, player_id, item_name)
+        DO UPDATE SET quantity = player_items.quantity + EXCLUDED.quantity
+    )
+    SELECT guild_id, user_id FROM batch ORDER BY guild_id, user_id
+""")
+
+# Claims the tick if it's due; otherwise returns the seconds left (claimed -> 0).
+CLAIM_TICK = queries.register("fish_food.claim", """
+    WITH claimed AS (
+        UPDATE fish_food_tick SET last_at = NOW()
+         WHERE last_at <= NOW() - make_interval(secs => $1)
+        RETURNING 1
+    )
+    SELECT CASE WHEN EXISTS (SELECT 1 FROM claimed) THEN 0.0
+                ELSE GREATEST(1.0, $1 - EXTRACT(EPOCH FROM NOW() - last_at))::float8 END
+      FROM fish_food_tick
+""")
+
+async def distribute_fish_food(db_pool, chunk: int = FISH_FOOD_CHUNK) -> int:
+    """
+    Add each owner's current aquarium_food score to their 'fish food', walking
+    the summary table by primary key in chunks, one short transaction per chunk.
+    """
+    total = 0
+    last_gid, last_uid = -1, -1
+    while True:
+        async with queries.acquire(db_pool, "fish_food") as conn, conn.transaction():
+            rows = await queries.fetch(conn, DISTRIBUTE_FOOD, last_gid, last_uid, chunk)
+        if not rows:
+            break
+        total += len(rows)
+        last_gid, last_uid = rows[-1]["guild_id"], rows[-1]["user_id"]
+        if len(rows) < chunk:
+            break
+        await asyncio.sleep(0)  # let other work at the pool between chunks
+    return total
 
 async def give_fish_food_task(bot, db_pool):
+    from services.fishing import ensure_fish_food_schema, prune_old_fish
     await bot.wait_until_ready()
+    await ensure_fish_food_schema(db_pool)
+    async with db_pool.acquire() as con:
+        await con.execute(FISH_FOOD_TICK_SQL)
     while not bot.is_closed():
+        if not leader.is_leader():  # clustered: only one process grants food
+            await asyncio.sleep(leader.RETRY_SECONDS)
+            continue
+        try:
+            wait = await queries.fetchval(db_pool, CLAIM_TICK, float(FISH_FOOD_EVERY))
+        except Exception as e:
+            logging.exception("Fish food tick claim failed: %s", e)
+            wait = leader.RETRY_SECONDS
+        if wait:
+            # not due yet (e.g. just restarted); the claim above is atomic, so a
+            # leader that loses the lock meanwhile can't grant twice
+            await asyncio.sleep(wait)
+            continue
+        started = time.perf_counter()
         try:
-            async with db_pool.acquire() as conn:
-                # 0) Prune fish older than 24h
-                await conn.execute("""
-                    DELETE FROM aquarium
-                    WHERE time_caught < NOW() - INTERVAL '1 day'
-                """)
-
-                # 1) Compute per (guild,user) uniqueness over most recent 30 fish
-                #    and upsert that amount of "fish food" in one statement.
-                #    NOTE: if you want each tick to grant exactly the uniqueness count,
-                #    this adds that per tick. That's your current design.
-                await conn.execute("""
-                    WITH ranked AS (
-                        SELECT guild_id, user_id, color1, color2, type,
-                               ROW_NUMBER() OVER (
-                                   PARTITION BY user_id, guild_id
-                                   ORDER BY time_caught DESC
-                               ) AS rn
-                        FROM aquarium
-                    ),
-                    limited AS (
-                        SELECT guild_id, user_id, color1, color2, type
-                        FROM ranked
-                        WHERE rn <= 30
-                    ),
-                    agg AS (
-                        SELECT guild_id,
-                               user_id,
-                               COUNT(DISTINCT color1)
-                             + COUNT(DISTINCT color2)
-                             + COUNT(DISTINCT type) AS qty
-                        FROM limited
-                        GROUP BY guild_id, user_id
-                        HAVING COUNT(*) > 0
-                    )
-                    INSERT INTO player_items (guild_id, player_id, item_name, category, quantity, useable)
-                    SELECT guild_id, user_id, 'fish food', 'resource', qty, TRUE
-                    FROM agg
-                    ON CONFLICT (guild_id, player_id, item_name)
-                    DO UPDATE SET quantity = player_items.quantity + EXCLUDED.quantity;
-                """)
-            logging.info("✅ Fish food distributed.")
+            # 0) Prune fish older than 24h (refreshes the affected owners' scores)
+            pruned = await prune_old_fish(db_pool)
+
+            # 1) Grant each owner their precomputed diversity score
+            rows = await distribute_fish_food(db_pool)
+
+            elapsed = time.perf_counter() - started
+            tick_stats["ticks"] += 1
+            tick_stats["last_seconds"] = elapsed
+            tick_stats["last_rows"] = rows
+            tick_stats["last_pruned"] = pruned
+            tick_stats["max_seconds"] = max(tick_stats["max_seconds"], elapsed)
+            logging.info("✅ Fish food distributed to %s owners in %.3fs (pruned %s fish).", rows, elapsed, pruned)
         except Exception as e:
             logging.exception("Fish food task failed: %s", e)
 
-        await asyncio.sleep(1800)  # 30 minutes
+        await asyncio.sleep(FISH_FOOD_EVERY)
@@ -0,0 +1,21 @@
+# tasks/media_purge.py
+import asyncio
+import logging
+
+from core import leader
+
+PURGE_EVERY = 3600  # seconds
+
+async def media_purge_task(bot, db_pool):
+    """Delete short-lived media rows (spawn frames) once they expire."""
+    from services.media import purge_expired
+    await bot.wait_until_ready()
+    while not bot.is_closed():
+        if not leader.is_leader():  # clustered: one process does the deleting
+            await asyncio.sleep(leader.RETRY_SECONDS)
+            continue
+        try:
+            await purge_expired(db_pool)
+        except Exception as e:
+            logging.exception("Media purge failed: %s", e)
+        await asyncio.sleep(PURGE_EVERY)
@@ -0,0 +1,21 @@
+# tasks/purchase_archive.py
+import asyncio
+import logging
+
+from core import leader
+
+ARCHIVE_EVERY = 6 * 3600  # seconds
+
+async def purchase_archive_task(bot, db_pool):
+    """Move old purchase_history into the monthly archive and drop expired limit buckets."""
+    from services.purchase_limits import archive_old_history
+    await bot.wait_until_ready()
+    while not bot.is_closed():
+        if not leader.is_leader():  # clustered: one process does the moving
+            await asyncio.sleep(leader.RETRY_SECONDS)
+            continue
+        try:
+            await archive_old_history(db_pool)
+        except Exception as e:
+            logging.exception("Purchase history archive failed: %s", e)
+        await asyncio.sleep(ARCHIVE_EVERY)
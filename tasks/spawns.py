@@ -5,8 +5,14 @@ from PIL import Image
 import discord
 from constants import MOBS, NOT_SPAWN_MOBS, RARITIES, COLOR_MAP
 from utils.prefixes import get_cached_prefix
+from utils.game_helpers import media_url
+from services import media
+from services.image_utils import is_public_base_url
 import os
 
+FRAME_SECONDS = 15                       # between reveal frames
+SPAWN_MEDIA_GRACE = timedelta(hours=1)   # frames outlive the spawn by this much
+
 def _tasks(bot): return bot.state.setdefault("spawn_tasks", {})
 
 # tasks/spawns.py
@@ -209,31 +215,53 @@ async def spawn_once_in_channel(bot, chan):
     levels     = frame_sizes if pix else zoom_levels
     make_frame = (lambda lvl: pixelate(src, lvl)) if pix else (lambda lvl: zoom_frame_at(src, lvl, center))
 
-    # ---- build the embed once; image will be provided via attachment ----
+    # ---- build the embed once; only its image changes per frame ----
     pref = get_cached_prefix(chan.guild.id if chan.guild else None)
     embed = discord.Embed(
         title="A mob is appearing!",
         description=f"Say its name to catch it.",
         color=discord.Color.blurple()
     )
-    # IMPORTANT: point the embed image to the attachment filename
-    embed.set_image(url="attachment://spawn.png")
     embed.set_footer(text=f"For attribution & licensing, use {pref}credits")
 
-    # first frame
-    buf = io.BytesIO()
-    make_frame(levels[0]).save(buf, format="PNG")
-    buf.seek(0)
-    msg = await chan.send(
-        embed=embed,
-        file=discord.File(buf, "spawn.png")
-    )
+    def png(lvl) -> bytes:
+        buf = io.BytesIO()
+        make_frame(lvl).save(buf, format="PNG")
+        return buf.getvalue()
 
-    # DB insert & expiry
     stay_seconds = RARITIES[MOBS[mob]["rarity"]]["stay"]
     now = datetime.now(timezone.utc)
     expires = now + timedelta(seconds=stay_seconds)
 
+    # URL mode: every frame is rendered and published to /i/ up front (one
+    # insert), so each later frame is an embed-only edit instead of a
+    # multipart re-upload. The frame the message ends on stays in history, so
+    # it never expires; the in-between ones go a while after the spawn.
+    # Attachments when the base URL isn't public.
+    frame_ids = None
+    if is_public_base_url():
+        try:
+            frames = await asyncio.to_thread(lambda: [png(lvl) for lvl in levels])
+            drop_at = max(expires, now + timedelta(seconds=FRAME_SECONDS * len(levels))) + SPAWN_MEDIA_GRACE
+            frame_ids = await media.save_many(
+                bot.db_pool, frames, "image/png", [drop_at] * (len(frames) - 1) + [None]
+            )
+        except Exception as e:
+            logging.warning(f"[spawn] publishing frames failed, attaching instead: {e}")
+
+    # first frame
+    if frame_ids:
+        embed.set_image(url=media_url(frame_ids[0]))
+        msg = await chan.send(embed=embed)
+    else:
+        # IMPORTANT: point the embed image to the attachment filename
+        embed.set_image(url="attachment://spawn.png")
+        msg = await chan.send(
+            embed=embed,
+            file=discord.File(io.BytesIO(await asyncio.to_thread(png, levels[0])), "spawn.png")
+        )
+
+    # DB insert & expiry
     async with bot.db_pool.acquire() as conn:
         rec = await conn.fetchrow(
             """
@@ -245,16 +273,28 @@ async def spawn_once_in_channel(bot, chan):
             chan.guild.id, chan.id, mob, msg.id, now, expires
         )
 
-    # subsequent frames: replace the attachment, keep the same embed (it still points to attachment://spawn.png)
-    for lvl in levels[1:]:
-        await asyncio.sleep(15)
-        buf = io.BytesIO()
-        make_frame(lvl).save(buf, format="PNG")
-        buf.seek(0)
-        await msg.edit(
-            embed=embed,
-            attachments=[discord.File(buf, "spawn.png")]
-        )
+    # subsequent frames: swap the image URL (or replace the attachment; the
+    # embed still points to attachment://spawn.png)
+    shown = 0
+    try:
+        for i, lvl in enumerate(levels[1:], 1):
+            await asyncio.sleep(FRAME_SECONDS)
+            if frame_ids:
+                embed.set_image(url=media_url(frame_ids[i]))
+                await msg.edit(embed=embed)
+            else:
+                await msg.edit(
+                    embed=embed,
+                    attachments=[discord.File(io.BytesIO(await asyncio.to_thread(png, lvl)), "spawn.png")]
+                )
+            shown = i
+    finally:
+        if frame_ids and shown != len(frame_ids) - 1:
+            # reveal cut short: the message stays on this frame, so keep it
+            try:
+                await asyncio.shield(media.keep(bot.db_pool, frame_ids[shown]))
+            except Exception as e:
+                logging.warning(f"[spawn] could not keep frame {frame_ids[shown]}: {e}")
 
     # schedule expiry watcher
     bot.loop.create_task(
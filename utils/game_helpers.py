@@ -24,9 +24,9 @@ if not PUBLIC_BASE_URL:
     raise RuntimeError("PUBLIC_BASE_URL environment variable not set")
 
 
-def media_url(media_id: str) -> str:
-    # nice .png suffix for Discord preview; path still resolves by id only
-    return f"{PUBLIC_BASE_URL}/i/{media_id}.png"
+def media_url(media_id: str, ext: str = "png") -> str:
+    # nice suffix for Discord preview; path still resolves by id only
+    return f"{PUBLIC_BASE_URL}/i/{media_id}.{ext}"
 
 async def save_image_bytes(conn: asyncpg.Connection, data: bytes, mime: str = "image/png") -> str:
     rec = await conn.fetchrow(
@@ -67,43 +67,15 @@ async def sucsac(ctx:commands.Context, user, mob_name: str, is_gold: bool, note:
     reward  = rar_info["emeralds"]
     color   = COLOR_MAP[rar_info["colour"]]
 
-    #check sword
-    swords = await conn.fetch(
-        """
-        SELECT tier, uses_left
-            FROM tools
-            WHERE user_id = $1
-            AND guild_id = $2
-            AND tool_name = 'sword'
-            AND uses_left > 0
-        """,
-        user_id,
-        guild_id
-    )
-    owned_tiers = {r["tier"] for r in swords}
-    best_tier = None
-    for tier in reversed(TIER_ORDER):
-        if tier in owned_tiers:
-            best_tier = tier
-            break
+    #use sword
+    from services.tools import use_best_tool
+    best_tier, _ = await use_best_tool(conn, user_id, guild_id, "sword")
     if is_gold:
         reward*=2
     num = SWORDS[best_tier]
     if best_tier == "diamond" and mob_name.lower() == "chicken":
         await achievements.try_grant(ctx.bot.db_pool, ctx, user_id, "overkill")
     reward += num
-    await conn.execute(
-        """
-        UPDATE tools
-            SET uses_left = uses_left - 1
-            WHERE user_id = $1
-            AND guild_id = $2
-            AND tool_name = 'sword'
-            AND tier = $3
-            AND uses_left > 0
-        """,
-        user_id, guild_id, best_tier
-    )
 
     # grant emeralds
     await give_items(user_id,"emeralds",reward,"emeralds",False,conn,guild_id)
@@ -416,6 +388,105 @@ async def get_items(conn,user_id, item,guild_id:int):
     else:
         return row["quantity"]
 
+async def get_items_many(conn, user_id, items, guild_id: int) -> dict:
+    """Quantities for several items in one query; missing rows -> 0."""
+    items = list(dict.fromkeys(items))
+    rows = await conn.fetch("""
+        SELECT item_name, quantity FROM player_items
+        WHERE guild_id = $1 AND player_id = $2 AND item_name = ANY($3::text[])
+    """, guild_id, user_id, items)
+    have = {r["item_name"]: r["quantity"] for r in rows}
+    return {it: have.get(it, 0) for it in items}
+
+class NotEnoughItems(ValueError):
+    """Raised by apply_items; .shortfalls is [(user_id, item, need, have), ...]."""
+    def __init__(self, shortfalls):
+        self.shortfalls = shortfalls
+        super().__init__("; ".join(
+            f"User {u} does not have enough of '{it}' (needs {need}, has {have})"
+            for u, it, need, have in shortfalls
+        ))
+
+# Every change for a batch goes through one statement: lock the rows we touch,
+# check every net debit is affordable, then debit / delete emptied rows / grant
+# and bump the emerald leaderboard only if all of them are. Returns post-balances.
+APPLY_ITEMS_SQL = """
+WITH req AS (
+    SELECT player_id, item_name, SUM(delta)::bigint AS delta,
+           MIN(category) AS category, BOOL_OR(useable) AS useable
+      FROM unnest($2::bigint[], $3::text[], $4::bigint[], $5::text[], $6::bool[])
+           AS r(player_id, item_name, delta, category, useable)
+     GROUP BY player_id, item_name
+), locked AS (
+    SELECT p.player_id, p.item_name, p.quantity
+      FROM player_items p
+      JOIN req r ON r.player_id = p.player_id AND r.item_name = p.item_name
+     WHERE p.guild_id = $1
+       FOR UPDATE OF p
+), cur AS (
+    SELECT r.*, COALESCE(l.quantity, 0) AS have
+      FROM req r
+      LEFT JOIN locked l ON l.player_id = r.player_id AND l.item_name = r.item_name
+), ok AS (
+    SELECT COALESCE(bool_and(have + delta >= 0), TRUE) AS ok FROM cur
+), debited AS (
+    UPDATE player_items p
+       SET quantity = c.have + c.delta
+      FROM cur c, ok
+     WHERE ok.ok AND c.delta < 0 AND c.have + c.delta > 0
+       AND p.guild_id = $1 AND p.player_id = c.player_id AND p.item_name = c.item_name
+), emptied AS (
+    DELETE FROM player_items p
+     USING cur c, ok
+     WHERE ok.ok AND c.delta < 0 AND c.have + c.delta = 0
+       AND p.guild_id = $1 AND p.player_id = c.player_id AND p.item_name = c.item_name
+), granted AS (
+    INSERT INTO player_items (guild_id, player_id, item_name, category, quantity, useable)
+    SELECT $1, c.player_id, c.item_name, c.category, c.delta, c.useable
+      FROM cur c, ok
+     WHERE ok.ok AND c.delta > 0
+    ON CONFLICT (guild_id, player_id, item_name)
+    DO UPDATE SET quantity = player_items.quantity + EXCLUDED.quantity
+), emeralds AS (
+    INSERT INTO lb_counters (metric, user_id, guild_id, value)
+    SELECT 'overall_emeralds', c.player_id, $1, c.delta
+      FROM cur c, ok
+     WHERE ok.ok AND c.item_name = 'emeralds' AND c.delta > 0
+    ON CONFLICT (metric, user_id, guild_id)
+    DO UPDATE SET value = lb_counters.value + EXCLUDED.value
+)
+SELECT c.player_id, c.item_name, c.delta, c.have, ok.ok
+  FROM cur c, ok
+"""
+
+async def apply_items(conn, guild_id: int, changes) -> dict:
+    """
+    Apply many grants/debits, for one or many players, all-or-nothing in one round trip.
+
+    changes: iterable of (user_id, item, delta) or (user_id, item, delta, category, useable);
+    positive delta grants (category defaults to "items"), negative debits.
+    Deltas for the same (user, item) are netted. Raises NotEnoughItems if any net
+    debit can't be paid (nothing is applied). Returns {(user_id, item): new_quantity}.
+    """
+    uids, names, deltas, cats, useables = [], [], [], [], []
+    for ch in changes:
+        uid, item, delta = ch[0], ch[1], int(ch[2])
+        if delta == 0:
+            continue
+        cat, useable = (ch[3], ch[4]) if len(ch) >= 5 else ("items", False)
+        uids.append(uid); names.append(item); deltas.append(delta)
+        cats.append(cat); useables.append(bool(useable))
+    if not uids:
+        return {}
+
+    rows = await conn.fetch(APPLY_ITEMS_SQL, guild_id, uids, names, deltas, cats, useables)
+    if rows and not rows[0]["ok"]:
+        raise NotEnoughItems([
+            (r["player_id"], r["item_name"], -r["delta"], r["have"])
+            for r in rows if r["have"] + r["delta"] < 0
+        ])
+    return {(r["player_id"], r["item_name"]): r["have"] + r["delta"] for r in rows}
+
 async def give_mob(conn,user_id, mob,guild_id,is_golden = False):
     key = mob.title()
     await conn.execute(